@@ -0,0 +1,252 @@
+"""
+Bar Aggregator - streaming OHLCV/VWAP bars built from ticks
+Every tick is folded into the open bar of each interval in O(1)
+"""
+
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+INTERVALS = {
+    "1s": 1,
+    "1m": 60,
+    "5m": 300,
+    "1h": 3600,
+    "1d": 86400,
+}
+
+# Completed bars kept in memory per symbol; older history lives in the database
+BAR_DEPTHS = {
+    "1s": 120,
+    "1m": 390,
+    "5m": 288,
+    "1h": 168,
+    "1d": 400,
+}
+
+BAR_COLUMNS = ("start", "open", "high", "low", "close", "volume", "vwap")
+
+
+def bar_records(symbols: List[str], bars: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Sealed bars as JSON-ready dicts, one per symbol, starts in epoch seconds"""
+    columns = [bars[name].tolist() for name in BAR_COLUMNS]
+    return [
+        {"symbol": symbol, **dict(zip(BAR_COLUMNS, values))}
+        for symbol, values in zip(symbols, zip(*columns))
+    ]
+
+
+class BarSeries:
+    """Open bars and a ring of completed bars for one interval across all symbols"""
+
+    def __init__(self, seconds: int, depth: int, capacity: int):
+        self.seconds = seconds
+        self.depth = depth
+        self._capacity = capacity
+
+        # Bar currently being built, one per symbol
+        self.is_open = np.zeros(capacity, dtype=bool)
+        self.start = np.zeros(capacity, dtype=np.int64)
+        self.open = np.zeros(capacity, dtype=np.float64)
+        self.high = np.zeros(capacity, dtype=np.float64)
+        self.low = np.zeros(capacity, dtype=np.float64)
+        self.close = np.zeros(capacity, dtype=np.float64)
+        self.volume = np.zeros(capacity, dtype=np.int64)
+        self.notional = np.zeros(capacity, dtype=np.float64)
+
+        # Completed bars
+        self.done = {
+            "start": np.zeros((capacity, depth), dtype=np.int64),
+            "open": np.zeros((capacity, depth), dtype=np.float64),
+            "high": np.zeros((capacity, depth), dtype=np.float64),
+            "low": np.zeros((capacity, depth), dtype=np.float64),
+            "close": np.zeros((capacity, depth), dtype=np.float64),
+            "volume": np.zeros((capacity, depth), dtype=np.int64),
+            "vwap": np.zeros((capacity, depth), dtype=np.float64),
+        }
+        self.head = np.zeros(capacity, dtype=np.int64)
+        self.count = np.zeros(capacity, dtype=np.int64)
+
+    def grow(self, capacity: int):
+        extra = capacity - self._capacity
+        for name in ("is_open", "start", "open", "high", "low", "close", "volume",
+                     "notional", "head", "count"):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros(extra, dtype=array.dtype)]))
+        for name, array in self.done.items():
+            self.done[name] = np.concatenate([array, np.zeros((extra, self.depth), dtype=array.dtype)])
+        self._capacity = capacity
+
+    def update(self, rows: np.ndarray, prices: np.ndarray, volumes: np.ndarray,
+               timestamps: np.ndarray) -> Optional[Dict[str, np.ndarray]]:
+        """Fold one tick per row into the open bars; returns the bars this tick sealed"""
+        buckets = (timestamps // self.seconds).astype(np.int64) * self.seconds
+        was_open = self.is_open[rows]
+        # Any change of bucket seals the bar, including jumps back when a replay seeks
+        rolled = was_open & (buckets != self.start[rows])
+
+        sealed = None
+        if rolled.any():
+            sealed = self._seal(rows[rolled])
+
+        # Start new bars where nothing was open or the interval rolled over
+        fresh = ~was_open | rolled
+        if fresh.any():
+            new_rows = rows[fresh]
+            new_prices = prices[fresh]
+            self.is_open[new_rows] = True
+            self.start[new_rows] = buckets[fresh]
+            self.open[new_rows] = new_prices
+            self.high[new_rows] = new_prices
+            self.low[new_rows] = new_prices
+            self.close[new_rows] = new_prices
+            self.volume[new_rows] = volumes[fresh]
+            self.notional[new_rows] = new_prices * volumes[fresh]
+
+        same = ~fresh
+        if same.any():
+            cur_rows = rows[same]
+            cur_prices = prices[same]
+            self.high[cur_rows] = np.maximum(self.high[cur_rows], cur_prices)
+            self.low[cur_rows] = np.minimum(self.low[cur_rows], cur_prices)
+            self.close[cur_rows] = cur_prices
+            self.volume[cur_rows] += volumes[same]
+            self.notional[cur_rows] += cur_prices * volumes[same]
+
+        return sealed
+
+    def _seal(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        volume = self.volume[rows]
+        vwap = np.divide(self.notional[rows], volume, out=self.close[rows].copy(), where=volume > 0)
+        bars = {
+            "rows": rows,
+            "start": self.start[rows],
+            "open": self.open[rows],
+            "high": self.high[rows],
+            "low": self.low[rows],
+            "close": self.close[rows],
+            "volume": volume,
+            "vwap": vwap,
+        }
+        slots = self.head[rows]
+        for name in BAR_COLUMNS:
+            self.done[name][rows, slots] = bars[name]
+        self.head[rows] = (slots + 1) % self.depth
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.depth)
+        self.is_open[rows] = False
+        return bars
+
+    def completed(self, row: int, limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Up to `limit` most recent completed bars for a row, oldest first"""
+        count = int(self.count[row])
+        n = count if limit is None else max(0, min(limit, count))
+        end = int(self.head[row])
+        order = (np.arange(end - n, end)) % self.depth
+        return {name: self.done[name][row, order] for name in BAR_COLUMNS}
+
+    def oldest_start(self, row: int) -> Optional[int]:
+        """Start of the oldest completed bar still kept for a row"""
+        count = int(self.count[row])
+        if not count:
+            return None
+        return int(self.done["start"][row, (int(self.head[row]) - count) % self.depth])
+
+    def partial(self, row: int) -> Optional[Dict[str, float]]:
+        """The bar currently being built for a row"""
+        if not self.is_open[row]:
+            return None
+        volume = int(self.volume[row])
+        return {
+            "start": int(self.start[row]),
+            "open": float(self.open[row]),
+            "high": float(self.high[row]),
+            "low": float(self.low[row]),
+            "close": float(self.close[row]),
+            "volume": volume,
+            "vwap": float(self.notional[row] / volume) if volume else float(self.close[row]),
+        }
+
+
+class BarAggregator:
+    """Builds bars for every interval from the same tick stream
+
+    Rows are the tick store's symbol rows, so both structures can be
+    updated with the same index arrays.
+    """
+
+    def __init__(self, intervals: Optional[Dict[str, int]] = None,
+                 depths: Optional[Dict[str, int]] = None, capacity: int = 64):
+        intervals = intervals or INTERVALS
+        depths = depths or BAR_DEPTHS
+        self._capacity = capacity
+        self.series: Dict[str, BarSeries] = {
+            name: BarSeries(seconds, depths.get(name, 256), capacity)
+            for name, seconds in intervals.items()
+        }
+
+    @property
+    def intervals(self) -> List[str]:
+        return list(self.series)
+
+    def update(self, rows: np.ndarray, prices: np.ndarray, volumes: np.ndarray,
+               timestamps) -> Dict[str, Dict[str, np.ndarray]]:
+        """Fold one tick per row into every interval; returns sealed bars keyed by interval"""
+        if rows.size == 0:
+            return {}
+        top = int(rows.max()) + 1
+        if top > self._capacity:
+            capacity = max(top, self._capacity * 2)
+            for series in self.series.values():
+                series.grow(capacity)
+            self._capacity = capacity
+
+        timestamps = np.broadcast_to(np.asarray(timestamps, dtype=np.float64), rows.shape)
+        sealed = {}
+        for name, series in self.series.items():
+            bars = series.update(rows, prices, volumes, timestamps)
+            if bars is not None:
+                sealed[name] = bars
+        return sealed
+
+    def covers(self, row: Optional[int], interval: str, since: float) -> bool:
+        """Whether a row's kept bars reach back to the bar holding `since`"""
+        series = self.series[interval]
+        if row is None or row >= self._capacity:
+            return False
+        oldest = series.oldest_start(row)
+        return oldest is not None and oldest <= since - since % series.seconds
+
+    def completed(self, row: int, interval: str) -> Optional[Dict[str, np.ndarray]]:
+        """Every kept completed bar for a symbol row as columns, oldest first"""
+        if row >= self._capacity:
+            return None
+        return self.series[interval].completed(row)
+
+    def bars(self, row: int, interval: str, limit: Optional[int] = None,
+             include_partial: bool = False) -> List[Dict[str, Any]]:
+        """Completed bars for a symbol row as JSON-ready dicts, oldest first"""
+        series = self.series[interval]
+        if row >= self._capacity:
+            return []
+        columns = series.completed(row, limit)
+        result = [
+            {
+                "timestamp": datetime.fromtimestamp(start).isoformat(),
+                "open": o,
+                "high": h,
+                "low": l,
+                "close": c,
+                "volume": v,
+                "vwap": round(w, 4),
+            }
+            for start, o, h, l, c, v, w in zip(*(columns[name].tolist() for name in BAR_COLUMNS))
+        ]
+        if include_partial:
+            bar = series.partial(row)
+            if bar is not None:
+                bar["timestamp"] = datetime.fromtimestamp(bar.pop("start")).isoformat()
+                bar["vwap"] = round(bar["vwap"], 4)
+                bar["partial"] = True
+                result.append(bar)
+        return result
@@ -0,0 +1,86 @@
+"""
+Downsampling - shape-preserving point reduction for chart series
+"""
+
+from typing import Optional
+
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+
+
+def _buckets(values: np.ndarray, count: int) -> np.ndarray:
+    """Split `values` into `count` near-equal buckets as rows of a NaN-padded matrix"""
+    width = -(-values.size // count)
+    padded = np.full(count * width, np.nan)
+    padded[:values.size] = values
+    return padded.reshape(count, width)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Indices kept by largest-triangle-three-buckets
+
+    The first and last points are always kept. The inner points are split
+    into max_points - 2 buckets with the usual fractional bounds (bucket i
+    starts at floor(i * every) + 1, every = (n - 2) / (max_points - 2)), so
+    exactly max_points are returned, and each bucket keeps the point forming the
+    largest triangle with the point kept from the previous bucket and the
+    mean of the next bucket. Bucket means and candidate areas are computed
+    with whole-array operations; only the chain of kept points is sequential.
+    """
+    n = y.size
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    count = max_points - 2
+    every = (n - 2) / count
+    offsets = np.floor(np.arange(count + 1) * every).astype(np.int64) + 1
+    offsets[-1] = n - 1
+    # Buckets differ in width by at most one; pad the narrower ones with NaN
+    index = offsets[:-1, None] + np.arange(int(np.diff(offsets).max()))
+    inside = index < offsets[1:, None]
+    index = np.minimum(index, n - 2)
+    inner_x = np.where(inside, x[index], np.nan)
+    inner_y = np.where(inside, y[index], np.nan)
+
+    # Mean of the following bucket for each bucket; the last one looks at the final point
+    next_x = np.append(np.nanmean(inner_x, axis=1)[1:], x[-1])
+    next_y = np.append(np.nanmean(inner_y, axis=1)[1:], y[-1])
+
+    kept = np.empty(count + 2, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    anchor_x, anchor_y = x[0], y[0]
+    for i in range(count):
+        cand_x, cand_y = inner_x[i], inner_y[i]
+        areas = np.abs((anchor_x - next_x[i]) * (cand_y - anchor_y) - (anchor_x - cand_x) * (next_y[i] - anchor_y))
+        best = int(np.nanargmax(areas))
+        kept[i + 1] = offsets[i] + best
+        anchor_x, anchor_y = cand_x[best], cand_y[best]
+    return kept
+
+
+def minmax(low: np.ndarray, high: np.ndarray, max_points: int) -> np.ndarray:
+    """Indices of the lowest low and highest high in each of max_points / 2 buckets"""
+    n = low.size
+    if max_points >= n or max_points < 2:
+        return np.arange(n)
+
+    count = max_points // 2
+    width = -(-n // count)
+    count = -(-n // width)
+    offsets = np.arange(count) * width
+    lows = np.nanargmin(_buckets(low.astype(np.float64), count), axis=1) + offsets
+    highs = np.nanargmax(_buckets(high.astype(np.float64), count), axis=1) + offsets
+    return np.unique(np.concatenate([lows, highs]))
+
+
+def downsample(x: np.ndarray, close: np.ndarray, max_points: int, method: str = "lttb",
+               low: Optional[np.ndarray] = None, high: Optional[np.ndarray] = None) -> np.ndarray:
+    """Indices of the bars to keep, in order, so at most `max_points` remain"""
+    if method == "lttb":
+        return lttb(x, close, max_points)
+    if method == "minmax":
+        return minmax(close if low is None else low, close if high is None else high, max_points)
+    raise ValueError(f"Unknown downsampling method: {method}")
@@ -0,0 +1,307 @@
+"""
+Market data frame encodings for the WebSocket stream
+Each tick is encoded at most once per encoding and shared by every client using it
+"""
+
+import json
+import struct
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Union
+
+import msgpack
+import numpy as np
+
+Frame = Union[str, bytes]
+
+# Field order used by the array-based encodings
+FIELDS = ["symbol", "price", "volume", "change", "change_percent", "timestamp"]
+
+# Binary frame layout (little-endian)
+BINARY_MAGIC = 0x53  # 'S'
+BINARY_VERSION = 1
+BINARY_UPDATE = 1
+BINARY_SNAPSHOT = 2
+BINARY_PRICE_SCALE = 100
+BINARY_HEADER = struct.Struct("<BBBxIq")
+BINARY_RECORD = np.dtype([
+    ("symbol_id", "<u4"),
+    ("price_delta", "<i4"),     # price minus the symbol's reference price, in 1/100
+    ("volume", "<u4"),
+    ("change", "<i4"),          # in 1/100
+    ("change_bp", "<i2"),       # change_percent in 1/100 of a percent
+    ("ts_offset_ms", "<i4"),    # milliseconds after the header timestamp
+])
+
+
+class TickBatch:
+    """One update of many symbols, with encoded forms cached per encoding"""
+
+    def __init__(self, rows: np.ndarray, symbols: List[str], columns: Dict[str, np.ndarray],
+                 snapshot: bool = False):
+        self.rows = rows
+        self.symbols = symbols
+        self.columns = columns
+        self.snapshot = snapshot
+        self.cache: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def records(self) -> List[Dict[str, Any]]:
+        """JSON-ready dicts, one per symbol"""
+        records = self.cache.get("records")
+        if records is None:
+            prices = self.columns["price"].tolist()
+            volumes = self.columns["volume"].tolist()
+            changes = self.columns["change"].tolist()
+            change_percents = self.columns["change_percent"].tolist()
+            timestamps = self.columns["timestamp"].tolist()
+            iso_cache: Dict[float, str] = {}
+            records = []
+            for i, symbol in enumerate(self.symbols):
+                ts = timestamps[i]
+                iso = iso_cache.get(ts)
+                if iso is None:
+                    iso = iso_cache[ts] = datetime.fromtimestamp(ts).isoformat()
+                records.append({
+                    "symbol": symbol,
+                    "price": prices[i],
+                    "volume": volumes[i],
+                    "timestamp": iso,
+                    "change": changes[i],
+                    "change_percent": change_percents[i],
+                })
+            self.cache["records"] = records
+        return records
+
+
+class JsonCodec:
+    """Default encoding: one JSON text frame per symbol, as the stream always sent"""
+
+    name = "json"
+
+    def message(self, payload: Dict[str, Any]) -> Frame:
+        return json.dumps(payload)
+
+    def known_symbols(self) -> Optional[Frame]:
+        return None
+
+    def prepare(self, batch: TickBatch) -> Optional[Frame]:
+        return None
+
+    def record_strings(self, batch: TickBatch) -> List[str]:
+        strings = batch.cache.get("json_records")
+        if strings is None:
+            strings = batch.cache["json_records"] = [json.dumps(r) for r in batch.records()]
+        return strings
+
+    def frames(self, batch: TickBatch, positions: Optional[List[int]]) -> List[Frame]:
+        if batch.snapshot:
+            return [self.batch_frame(batch, positions)]
+        messages = batch.cache.get("json_messages")
+        if messages is None:
+            messages = batch.cache["json_messages"] = [
+                '{"type": "market_data", "data": ' + s + '}' for s in self.record_strings(batch)
+            ]
+        if positions is None:
+            return messages
+        return [messages[p] for p in positions]
+
+    def batch_frame(self, batch: TickBatch, positions: Optional[List[int]]) -> Frame:
+        """Many symbols in one frame, with "data" keyed by symbol like the REST snapshot"""
+        strings = self.record_strings(batch)
+        symbols = batch.symbols
+        if positions is not None:
+            strings = [strings[p] for p in positions]
+            symbols = [symbols[p] for p in positions]
+        entries = ', '.join(json.dumps(symbol) + ': ' + s for symbol, s in zip(symbols, strings))
+        snapshot = ', "snapshot": true' if batch.snapshot else ''
+        return '{"type": "market_data"' + snapshot + ', "data": {' + entries + '}}'
+
+
+class JsonBatchCodec(JsonCodec):
+    """JSON with every symbol of a tick in a single frame"""
+
+    name = "json-batch"
+
+    def frames(self, batch: TickBatch, positions: Optional[List[int]]) -> List[Frame]:
+        if positions is None:
+            frame = batch.cache.get("json_batch")
+            if frame is None:
+                frame = batch.cache["json_batch"] = self.batch_frame(batch, None)
+            return [frame]
+        return [self.batch_frame(batch, positions)]
+
+
+def _msgpack_array_header(n: int) -> bytes:
+    if n < 16:
+        return bytes([0x90 | n])
+    if n < 0x10000:
+        return b"\xdc" + struct.pack(">H", n)
+    return b"\xdd" + struct.pack(">I", n)
+
+
+class MsgpackCodec:
+    """MessagePack frames with one positional array per symbol and the field names sent once"""
+
+    name = "msgpack"
+
+    def message(self, payload: Dict[str, Any]) -> Frame:
+        return msgpack.packb(payload)
+
+    def known_symbols(self) -> Optional[Frame]:
+        return None
+
+    def prepare(self, batch: TickBatch) -> Optional[Frame]:
+        return None
+
+    def packed_records(self, batch: TickBatch) -> List[bytes]:
+        packed = batch.cache.get("msgpack_records")
+        if packed is None:
+            columns = batch.columns
+            timestamps_ms = (columns["timestamp"] * 1000).astype(np.int64).tolist()
+            packed = batch.cache["msgpack_records"] = [
+                msgpack.packb(record) for record in zip(
+                    batch.symbols,
+                    columns["price"].tolist(),
+                    columns["volume"].tolist(),
+                    columns["change"].tolist(),
+                    columns["change_percent"].tolist(),
+                    timestamps_ms,
+                )
+            ]
+        return packed
+
+    def frames(self, batch: TickBatch, positions: Optional[List[int]]) -> List[Frame]:
+        key = "msgpack_frame"
+        if positions is None and key in batch.cache:
+            return [batch.cache[key]]
+
+        packed = self.packed_records(batch)
+        if positions is not None:
+            packed = [packed[p] for p in positions]
+        # Pre-packed records are spliced into the frame instead of re-encoded
+        head = msgpack.packb({
+            "type": "snapshot" if batch.snapshot else "market_data",
+            "fields": FIELDS,
+        })
+        frame = (bytes([head[0] + 1]) + head[1:] + msgpack.packb("data")
+                 + _msgpack_array_header(len(packed)) + b"".join(packed))
+        if positions is None:
+            batch.cache[key] = frame
+        return [frame]
+
+
+class BinaryCodec:
+    """Fixed-layout binary frames with integer symbol ids and prices relative to a reference
+
+    A frame is a 16 byte header (magic, version, frame type, record count,
+    base timestamp in ms) followed by BINARY_RECORD entries. Symbol ids and
+    reference prices are announced in JSON "symbols" text frames before a
+    symbol first appears in a binary frame.
+    """
+
+    name = "binary"
+
+    def __init__(self):
+        self.reference = np.zeros(0, dtype=np.float64)
+        self.directory: Dict[int, str] = {}
+
+    def message(self, payload: Dict[str, Any]) -> Frame:
+        return json.dumps(payload)
+
+    def _directory_message(self, entries: List[Dict[str, Any]]) -> Frame:
+        return json.dumps({"type": "symbols", "price_scale": BINARY_PRICE_SCALE, "symbols": entries})
+
+    def known_symbols(self) -> Optional[Frame]:
+        """Directory of every symbol announced so far, for newly connected clients"""
+        if not self.directory:
+            return None
+        return self._directory_message([
+            {"id": row, "symbol": symbol, "reference_price": float(self.reference[row])}
+            for row, symbol in self.directory.items()
+        ])
+
+    def prepare(self, batch: TickBatch) -> Optional[Frame]:
+        """Assign reference prices to unseen symbols and return their directory entries"""
+        rows = batch.rows
+        if rows.size == 0:
+            return None
+        top = int(rows.max()) + 1
+        if top > self.reference.size:
+            self.reference = np.concatenate([self.reference, np.zeros(top - self.reference.size)])
+        new = np.flatnonzero(self.reference[rows] == 0)
+        if new.size == 0:
+            return None
+        self.reference[rows[new]] = batch.columns["price"][new]
+        entries = []
+        for position in new.tolist():
+            row = int(rows[position])
+            self.directory[row] = batch.symbols[position]
+            entries.append({
+                "id": row,
+                "symbol": batch.symbols[position],
+                "reference_price": float(self.reference[row]),
+            })
+        return self._directory_message(entries)
+
+    def records(self, batch: TickBatch) -> np.ndarray:
+        records = batch.cache.get("binary_records")
+        if records is None:
+            columns = batch.columns
+            timestamps_ms = np.round(columns["timestamp"] * 1000).astype(np.int64)
+            base = int(timestamps_ms.min()) if timestamps_ms.size else 0
+            records = np.empty(len(batch), dtype=BINARY_RECORD)
+            records["symbol_id"] = batch.rows
+            records["price_delta"] = np.round((columns["price"] - self.reference[batch.rows]) * BINARY_PRICE_SCALE)
+            records["volume"] = np.clip(columns["volume"], 0, np.iinfo(np.uint32).max)
+            records["change"] = np.round(columns["change"] * BINARY_PRICE_SCALE)
+            records["change_bp"] = np.clip(np.round(columns["change_percent"] * 100), -32768, 32767)
+            records["ts_offset_ms"] = np.clip(timestamps_ms - base, 0, np.iinfo(np.int32).max)
+            batch.cache["binary_records"] = records
+            batch.cache["binary_base"] = base
+        return records
+
+    def frames(self, batch: TickBatch, positions: Optional[List[int]]) -> List[Frame]:
+        key = "binary_frame"
+        if positions is None and key in batch.cache:
+            return [batch.cache[key]]
+
+        records = self.records(batch)
+        if positions is not None:
+            records = records[positions]
+        frame_type = BINARY_SNAPSHOT if batch.snapshot else BINARY_UPDATE
+        header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, frame_type,
+                                    len(records), batch.cache["binary_base"])
+        frame = header + records.tobytes()
+        if positions is None:
+            batch.cache[key] = frame
+        return [frame]
+
+
+CODECS = {
+    JsonCodec.name: JsonCodec(),
+    JsonBatchCodec.name: JsonBatchCodec(),
+    MsgpackCodec.name: MsgpackCodec(),
+    BinaryCodec.name: BinaryCodec(),
+}
+
+# WebSocket subprotocol names accepted for negotiation
+SUBPROTOCOLS = {f"samrddhi.{name}": name for name in CODECS}
+
+
+def negotiate(requested: Optional[str], subprotocols: List[str]):
+    """Pick a codec from ?encoding= or the client's offered subprotocols
+
+    Returns (codec, accepted subprotocol); JSON is the default.
+    """
+    if requested:
+        codec = CODECS.get(requested.lower())
+        if codec is None:
+            raise ValueError(f"Unsupported encoding: {requested}")
+        return codec, None
+    for protocol in subprotocols:
+        name = SUBPROTOCOLS.get(protocol)
+        if name:
+            return CODECS[name], protocol
+    return CODECS[JsonCodec.name], None
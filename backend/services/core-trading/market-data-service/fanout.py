@@ -0,0 +1,342 @@
+"""
+WebSocket fan-out for the market data stream
+Frames are encoded once by the broadcaster and handed to per-client writers
+"""
+
+import logging
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+from shared.websocket_queue import QueuedWebSocket
+
+from encoding import CODECS, Frame, JsonCodec, TickBatch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_MAX_DROPPED = 64
+
+# Subscribing to this symbol receives every symbol
+WILDCARD = "*"
+
+
+class ClientConnection(QueuedWebSocket):
+    """A WebSocket client with its own bounded send queue and writer task
+
+    Once the queue is half full, tick updates stop being queued and are
+    conflated instead: only the newest update per symbol is kept, and the
+    writer sends that merged state as soon as the queue drains. The other
+    half of the queue stays available for control messages.
+    """
+
+    def __init__(self, websocket: WebSocket, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 max_dropped: int = DEFAULT_MAX_DROPPED, codec=None):
+        super().__init__(websocket, queue_size, max_dropped)
+        self.codec = codec or CODECS[JsonCodec.name]
+        self.conflate_at = max(1, queue_size // 2)
+        self.conflated = 0
+        # Newest conflated update per symbol: the batch it came in and its position there
+        self._pending: Dict[str, Tuple[TickBatch, int]] = {}
+        self.symbols: Set[str] = set()
+        self.book_symbols: Set[str] = set()
+        # Completed bars of these intervals stream for bar_symbols
+        self.bar_symbols: Set[str] = set()
+        self.bar_intervals: Set[str] = set()
+        # True while the client is on the all-symbols stream it got at connect time
+        self.default_subscription = False
+
+    def send(self, payload: Dict[str, Any]) -> bool:
+        """Encode a control message with the client's codec and queue it"""
+        return self.offer(self.codec.message(payload))
+
+    @property
+    def conflating(self) -> bool:
+        return bool(self._pending)
+
+    def push(self, batch: TickBatch, positions: Optional[List[int]]) -> int:
+        """Queue tick frames for the given batch positions (None = all), or conflate them
+
+        Returns the number of frames queued. While earlier updates are still
+        conflated, newer ones are conflated too so they can't overtake them.
+        """
+        if self.closed:
+            return 0
+        if self._pending or self.queue.qsize() >= self.conflate_at:
+            self._conflate(batch, positions)
+            return 0
+        queued = 0
+        for frame in self.codec.frames(batch, positions):
+            if self.offer(frame):
+                queued += 1
+        return queued
+
+    def _conflate(self, batch: TickBatch, positions: Optional[List[int]]):
+        pending = self._pending
+        before = len(pending)
+        if positions is None:
+            positions = range(len(batch.symbols))
+        symbols = batch.symbols
+        for position in positions:
+            pending[symbols[position]] = (batch, position)
+        # Every update that replaced a still-unsent one for the same symbol was conflated away
+        self.conflated += len(positions) - (len(pending) - before)
+
+    def _conflated_frames(self) -> List[Frame]:
+        """Frames for the merged conflated state, one batch at a time"""
+        pending, self._pending = self._pending, {}
+        everything = WILDCARD in self.symbols
+        groups: Dict[int, Tuple[TickBatch, List[int]]] = {}
+        for symbol, (batch, position) in pending.items():
+            # Skip symbols unsubscribed while their updates were waiting
+            if everything or symbol in self.symbols:
+                groups.setdefault(id(batch), (batch, []))[1].append(position)
+        frames = []
+        for batch, positions in groups.values():
+            frames.extend(self.codec.frames(batch, sorted(positions)))
+        return frames
+
+    async def _after_send(self):
+        if self._pending and self.queue.empty():
+            # Caught up: send the newest state of everything that was conflated
+            for frame in self._conflated_frames():
+                await self._send(frame)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queue.qsize(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+            "conflating_symbols": len(self._pending),
+            "encoding": self.codec.name,
+            "symbols": sorted(self.symbols),
+            "book_symbols": sorted(self.book_symbols),
+            "bar_symbols": sorted(self.bar_symbols),
+            "bar_intervals": sorted(self.bar_intervals),
+        }
+
+
+class FanoutHub:
+    """Registry of connected clients that routes frames to symbol subscribers without blocking"""
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE, max_dropped: int = DEFAULT_MAX_DROPPED):
+        self.queue_size = queue_size
+        self.max_dropped = max_dropped
+        self.clients: Set[ClientConnection] = set()
+        self.subscribers: Dict[str, Set[ClientConnection]] = {}
+        self.book_subscribers: Dict[str, Set[ClientConnection]] = {}
+        self.bar_subscribers: Dict[str, Set[ClientConnection]] = {}
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def connect(self, websocket: WebSocket, symbols: Optional[Iterable[str]] = None,
+                codec=None) -> ClientConnection:
+        """Register an accepted WebSocket, subscribe it and start its writer
+
+        Without explicit symbols the client streams every symbol until its
+        first subscribe request replaces that default.
+        """
+        client = ClientConnection(websocket, self.queue_size, self.max_dropped, codec)
+        client.start()
+        self.clients.add(client)
+        if symbols is None:
+            self.subscribe(client, [WILDCARD])
+            client.default_subscription = True
+        else:
+            self.subscribe(client, symbols)
+        return client
+
+    def disconnect(self, client: ClientConnection):
+        self.clients.discard(client)
+        self.unsubscribe(client, list(client.symbols))
+        self.unsubscribe_book(client, list(client.book_symbols))
+        self.unsubscribe_bars(client, list(client.bar_symbols))
+
+    def subscribe(self, client: ClientConnection, symbols: Iterable[str]) -> List[str]:
+        """Add symbols to a client's subscription; returns the newly added ones"""
+        symbols = list(symbols)
+        if client.default_subscription and symbols:
+            client.default_subscription = False
+            self.unsubscribe(client, [WILDCARD])
+        added = []
+        for symbol in symbols:
+            if symbol not in client.symbols:
+                client.symbols.add(symbol)
+                self.subscribers.setdefault(symbol, set()).add(client)
+                added.append(symbol)
+        return added
+
+    def unsubscribe(self, client: ClientConnection, symbols: Iterable[str]) -> List[str]:
+        """Remove symbols from a client's subscription; returns the removed ones"""
+        removed = []
+        for symbol in symbols:
+            if symbol in client.symbols:
+                client.symbols.discard(symbol)
+                subscribers = self.subscribers.get(symbol)
+                if subscribers is not None:
+                    subscribers.discard(client)
+                    if not subscribers:
+                        del self.subscribers[symbol]
+                removed.append(symbol)
+        return removed
+
+    def subscribe_book(self, client: ClientConnection, symbols: Iterable[str]) -> List[str]:
+        """Add order book symbols to a client's subscription; returns the newly added ones"""
+        added = []
+        for symbol in symbols:
+            if symbol not in client.book_symbols:
+                client.book_symbols.add(symbol)
+                self.book_subscribers.setdefault(symbol, set()).add(client)
+                added.append(symbol)
+        return added
+
+    def unsubscribe_book(self, client: ClientConnection, symbols: Iterable[str]) -> List[str]:
+        """Remove order book symbols from a client's subscription; returns the removed ones"""
+        removed = []
+        for symbol in symbols:
+            if symbol in client.book_symbols:
+                client.book_symbols.discard(symbol)
+                subscribers = self.book_subscribers.get(symbol)
+                if subscribers is not None:
+                    subscribers.discard(client)
+                    if not subscribers:
+                        del self.book_subscribers[symbol]
+                removed.append(symbol)
+        return removed
+
+    def subscribe_bars(self, client: ClientConnection, symbols: Iterable[str], intervals: Iterable[str]) -> List[str]:
+        """Add bar symbols and intervals to a client's subscription; returns the newly added symbols"""
+        client.bar_intervals.update(intervals)
+        added = []
+        for symbol in symbols:
+            if symbol not in client.bar_symbols:
+                client.bar_symbols.add(symbol)
+                self.bar_subscribers.setdefault(symbol, set()).add(client)
+                added.append(symbol)
+        return added
+
+    def unsubscribe_bars(self, client: ClientConnection, symbols: Iterable[str]) -> List[str]:
+        """Remove bar symbols from a client's subscription; returns the removed ones"""
+        removed = []
+        for symbol in symbols:
+            if symbol in client.bar_symbols:
+                client.bar_symbols.discard(symbol)
+                subscribers = self.bar_subscribers.get(symbol)
+                if subscribers is not None:
+                    subscribers.discard(client)
+                    if not subscribers:
+                        del self.bar_subscribers[symbol]
+                removed.append(symbol)
+        if not client.bar_symbols:
+            client.bar_intervals.clear()
+        return removed
+
+    def publish_bars(self, interval: str, records: List[Dict[str, Any]]) -> int:
+        """Send one interval's newly completed bars to their subscribers as a single message each
+
+        Clients on every symbol share one encoding per codec; the others get
+        just their symbols' bars.
+        """
+        if not self.bar_subscribers:
+            return 0
+        wildcard = {c for c in self.bar_subscribers.get(WILDCARD, ()) if interval in c.bar_intervals}
+        targets: Dict[ClientConnection, List[Dict[str, Any]]] = {}
+        for record in records:
+            for client in self.bar_subscribers.get(record["symbol"], ()):
+                if client not in wildcard and interval in client.bar_intervals:
+                    targets.setdefault(client, []).append(record)
+
+        delivered = 0
+        frames: Dict[str, Frame] = {}
+        for client in wildcard:
+            frame = frames.get(client.codec.name)
+            if frame is None:
+                frame = frames[client.codec.name] = client.codec.message({"type": "bars", "interval": interval, "data": records})
+            delivered += self._deliver([client], frame)
+        for client, data in targets.items():
+            delivered += self._deliver([client], client.codec.message({"type": "bars", "interval": interval, "data": data}))
+        return delivered
+
+    def publish_book(self, symbol: str, payload: Dict[str, Any]) -> int:
+        """Send an order book message to the symbol's book subscribers, encoded once per codec"""
+        subscribers = self.book_subscribers.get(symbol)
+        if not subscribers:
+            return 0
+        frames: Dict[str, Frame] = {}
+        delivered = 0
+        for client in list(subscribers):
+            frame = frames.get(client.codec.name)
+            if frame is None:
+                frame = frames[client.codec.name] = client.codec.message(payload)
+            if client.offer(frame):
+                delivered += 1
+            elif client.closed or client.lagging:
+                self._evict(client)
+        return delivered
+
+    def publish(self, batch: TickBatch) -> int:
+        """Route one tick batch to its subscribers; returns the number of frames queued
+
+        Each client gets the positions of its subscribed symbols in the batch
+        and its codec turns them into frames from the batch's shared encodings.
+        """
+        if not self.clients:
+            return 0
+        wildcard = self.subscribers.get(WILDCARD, set())
+        targets: Dict[ClientConnection, Optional[List[int]]] = {}
+        for position, symbol in enumerate(batch.symbols):
+            for client in self.subscribers.get(symbol, ()):
+                if client not in wildcard:
+                    targets.setdefault(client, []).append(position)
+        for client in wildcard:
+            targets[client] = None
+
+        self.prepare(batch)
+        delivered = 0
+        for client, positions in targets.items():
+            delivered += client.push(batch, positions)
+            if client.closed or client.lagging:
+                self._evict(client)
+        return delivered
+
+    def prepare(self, batch: TickBatch):
+        """Let codecs announce state (e.g. new symbol ids) to all of their clients"""
+        for codec in {client.codec for client in self.clients}:
+            control = codec.prepare(batch)
+            if control is not None:
+                self._deliver([c for c in self.clients if c.codec is codec], control)
+
+    def _deliver(self, clients: Iterable[ClientConnection], frame: Frame) -> int:
+        delivered = 0
+        for client in list(clients):
+            if client.offer(frame):
+                delivered += 1
+            elif client.closed or client.lagging:
+                self._evict(client)
+        return delivered
+
+    def _evict(self, client: ClientConnection):
+        self.disconnect(client)
+        if client.evict():
+            self.evicted += 1
+
+    async def close_all(self):
+        for client in list(self.clients):
+            await client.close()
+        self.clients.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self.clients),
+            "evicted": self.evicted,
+            "subscribed_symbols": len(self.subscribers),
+            "book_subscribed_symbols": len(self.book_subscribers),
+            "bar_subscribed_symbols": len(self.bar_subscribers),
+            "dropped": sum(client.dropped for client in self.clients),
+            "conflated": sum(client.conflated for client in self.clients),
+            "conflating_clients": sum(1 for client in self.clients if client.conflating),
+            "queued": sum(client.queue.qsize() for client in self.clients),
+        }
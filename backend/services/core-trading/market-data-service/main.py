@@ -4,15 +4,18 @@ Real-time and historical market data with PostgreSQL backend
 """
 
 import asyncio
+import json
 import logging
-import random
 import sys
 import os
+import tempfile
+import time
 from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 
+import numpy as np
 import uvicorn
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -20,32 +23,160 @@ from sqlalchemy.orm import Session
 # Add path to shared modules
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 
-from shared.database import get_db, MarketData, TradingSignal
+from shared.batch_writer import BatchWriter
+from shared.database import get_db, latest_market_data, trading_signals_page
+from shared.tick_archive import TickArchive, is_valid_symbol
+
+from bars import BarAggregator, INTERVALS, bar_records
+from downsample import METHODS, downsample
+from encoding import TickBatch, negotiate
+from fanout import FanoutHub, ClientConnection, WILDCARD
+from order_book import ASK, BID, OrderBooks
+from persistence import bar_rows, tick_rows, write_market_data
+from replay import ReplayController
+from shared_state import BoardFollower, SharedPriceBoard, acquire_producer_lock, book_columns
+from simulator import BookSimulator, PriceSimulator, DEFAULT_SYMBOLS
+from tick_store import TickStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Models
-class MarketDataPoint(BaseModel):
-    symbol: str
-    price: float
-    volume: int
-    timestamp: datetime
-    change: float
-    change_percent: float
-
 class HistoricalData(BaseModel):
     symbol: str
     data: List[Dict[str, Any]]
     period: str
+    interval: str
+
+class BookLevelUpdate(BaseModel):
+    side: str  # "bid" or "ask"
+    price: float
+    size: int  # 0 removes the level
+
+class BookUpdateRequest(BaseModel):
+    updates: List[BookLevelUpdate]
+    timestamp: Optional[datetime] = None
+
+class ReplayRequest(BaseModel):
+    start: datetime
+    end: datetime
+    symbols: Optional[List[str]] = None
+    speed: float = 1.0  # multiple of real time, 0 = as fast as possible
 
 # Global state
-market_data_cache: Dict[str, MarketDataPoint] = {}
-active_connections: List[WebSocket] = []
+tick_store = TickStore(depth=int(os.getenv("TICK_BUFFER_DEPTH", 512)))
+bar_aggregator = BarAggregator()
+
+# Latest persisted market_data row per symbol, refreshed whenever the writer flushes.
+# Only this process's own writes keep it current, so an entry is trusted for
+# LATEST_CACHE_TTL seconds after it was last written or read back from the table.
+LATEST_CACHE_TTL = float(os.getenv("LATEST_CACHE_TTL", 5))
+latest_rows: Dict[str, Dict[str, Any]] = {}
+latest_checked: Dict[str, float] = {}
+
+def remember_latest_rows(rows: List[Dict[str, Any]]):
+    """Keep the latest-row cache current with rows just written to (or read from) market_data"""
+    now = time.monotonic()
+    for row in rows:
+        latest_checked[row["symbol"]] = now
+        current = latest_rows.get(row["symbol"])
+        if current is None or row["timestamp"] >= current["timestamp"]:
+            latest_rows[row["symbol"]] = {
+                "symbol": row["symbol"],
+                "open_price": row["open_price"],
+                "high_price": row["high_price"],
+                "low_price": row["low_price"],
+                "close_price": row["close_price"],
+                "volume": row["volume"],
+                "vwap": row["vwap"],
+                "timestamp": row["timestamp"]
+            }
+
+market_data_writer = BatchWriter(
+    write_market_data,
+    name="market-data-writer",
+    batch_size=int(os.getenv("WRITER_BATCH_SIZE", 5000)),
+    flush_interval=float(os.getenv("WRITER_FLUSH_INTERVAL", 5)),
+    max_pending=int(os.getenv("WRITER_MAX_PENDING", 100000)),
+    max_attempts=int(os.getenv("WRITER_MAX_ATTEMPTS", 8)),
+    on_flushed=remember_latest_rows
+)
+hub = FanoutHub(
+    queue_size=int(os.getenv("WS_SEND_QUEUE_SIZE", 256)),
+    max_dropped=int(os.getenv("WS_MAX_DROPPED_FRAMES", 64))
+)
+
+# "live" runs the price simulator, "replay" plays back stored market_data rows
+MARKET_DATA_MODE = os.getenv("MARKET_DATA_MODE", "live").lower()
+
+# Seconds between market data updates
+UPDATE_INTERVAL = float(os.getenv("SIM_TICK_INTERVAL", 1.0))
+
+# Completed bars of this interval (and optionally every raw tick) are written to market_data
+BAR_PERSIST_INTERVAL = os.getenv("BAR_PERSIST_INTERVAL", "1m")
+PERSIST_TICKS = os.getenv("PERSIST_TICKS", "false").lower() == "true"
 
-# Sample symbols for simulation
-SYMBOLS = ["AAPL", "GOOGL", "MSFT", "AMZN", "TSLA", "NVDA", "META", "NFLX", "AMD", "INTC"]
+# Serialized /market-data bodies for the current tick store version, keyed by ?since
+SNAPSHOT_CACHE_SIZE = int(os.getenv("SNAPSHOT_CACHE_SIZE", 64))
+snapshot_cache: Dict[Optional[int], bytes] = {}
+snapshot_cache_version = -1
+
+# Append-only per-symbol tick files for long-range history; empty disables the archive
+TICK_ARCHIVE_DIR = os.getenv("TICK_ARCHIVE_DIR", os.path.join(os.path.dirname(__file__), "data", "ticks"))
+ARCHIVE_FLUSH_INTERVAL = float(os.getenv("ARCHIVE_FLUSH_INTERVAL", 5))
+tick_archive = TickArchive(TICK_ARCHIVE_DIR) if TICK_ARCHIVE_DIR else None
+# Every tick stamped before this is on disk; set by the producer's flushes
+archived_through = 0.0
+# The producer's bars starting from here were built from every tick (an earlier bar may be partial)
+bars_complete_from = 0.0
+
+# Length of each /historical-data period in seconds, and its default bar interval
+HISTORY_PERIODS = {
+    "1d": (86400, "1h"),
+    "1w": (7 * 86400, "1d"),
+    "1m": (30 * 86400, "1d"),
+    "3m": (90 * 86400, "1d"),
+    "1y": (365 * 86400, "1d"),
+    "5y": (5 * 365 * 86400, "1d")
+}
+
+# Simulated universe: MARKET_SYMBOLS, padded with synthetic tickers up to SIM_UNIVERSE_SIZE
+SYMBOLS = [s.strip().upper() for s in os.getenv("MARKET_SYMBOLS", "").split(",") if s.strip()] or DEFAULT_SYMBOLS
+simulator = PriceSimulator.with_universe(
+    SYMBOLS,
+    size=int(os.getenv("SIM_UNIVERSE_SIZE", 0)),
+    seed=int(os.environ["SIM_SEED"]) if os.getenv("SIM_SEED") else None,
+    volatility=float(os.getenv("SIM_VOLATILITY", 0.3)),
+    drift=float(os.getenv("SIM_DRIFT", 0.0)),
+    tick_interval=UPDATE_INTERVAL
+)
+simulator_rows = tick_store.register(simulator.symbols)
+
+# L2 order books, simulated around the latest price for BOOK_SYMBOLS in live mode
+BOOK_SYMBOLS = [s.strip().upper() for s in os.getenv("BOOK_SYMBOLS", "").split(",") if s.strip()] or SYMBOLS
+BOOK_LEVELS = int(os.getenv("BOOK_LEVELS", 10))
+BOOK_MAX_LEVELS = int(os.getenv("BOOK_MAX_LEVELS", 50))
+BOOK_STREAM_DEPTH = int(os.getenv("BOOK_STREAM_DEPTH", 10))
+order_books = OrderBooks(max_levels=BOOK_MAX_LEVELS)
+book_simulator = BookSimulator(simulator.rng, levels=BOOK_LEVELS)
+
+# With more than one worker, one elected producer generates (or replays) ticks and
+# publishes them to a shared-memory price board that the other workers mirror
+MARKET_DATA_WORKERS = int(os.getenv("MARKET_DATA_WORKERS", 1))
+SHARED_BOARD_NAME = os.getenv("SHARED_BOARD_NAME", "samrddhi-market-data")
+# Most symbols the price board holds; with more than one worker, symbols added over REST past it are refused
+SHARED_BOARD_CAPACITY = int(os.getenv("SHARED_BOARD_CAPACITY", max(4096, 2 * len(simulator))))
+PRODUCER_LOCK_PATH = os.getenv("PRODUCER_LOCK_PATH", os.path.join(tempfile.gettempdir(), f"{SHARED_BOARD_NAME}.lock"))
+BOOK_BOARD_CAPACITY = int(os.getenv("BOOK_BOARD_CAPACITY", max(1024, 2 * len(BOOK_SYMBOLS))))
+MIRROR_POLL_INTERVAL = float(os.getenv("MIRROR_POLL_INTERVAL", 0.05))
+BOOK_BOARD_COLUMNS = book_columns(BOOK_MAX_LEVELS)
+
+# "producer" runs the simulator or replay, "follower" mirrors the producer's boards
+role = "producer"
+shared_board: Optional[SharedPriceBoard] = None
+book_board: Optional[SharedPriceBoard] = None
+producer_lock: Optional[int] = None
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -64,64 +195,364 @@ app.add_middleware(
 )
 
 # Utility functions
-def generate_mock_price(symbol: str, base_price: Optional[float] = None) -> MarketDataPoint:
-    """Generate mock market data for a symbol"""
-    if base_price is None:
-        base_prices = {
-            "AAPL": 150.0, "GOOGL": 2800.0, "MSFT": 300.0, "AMZN": 3000.0,
-            "TSLA": 200.0, "NVDA": 450.0, "META": 250.0, "NFLX": 400.0,
-            "AMD": 100.0, "INTC": 50.0
-        }
-        base_price = base_prices.get(symbol, 100.0)
-    
-    # Generate small random changes
-    change_percent = random.uniform(-2.0, 2.0)
-    change = base_price * (change_percent / 100)
-    new_price = base_price + change
-    
-    return MarketDataPoint(
-        symbol=symbol,
-        price=round(new_price, 2),
-        volume=random.randint(10000, 1000000),
-        timestamp=datetime.now(),
-        change=round(change, 2),
-        change_percent=round(change_percent, 2)
+def simulate_tick() -> np.ndarray:
+    """Advance the whole simulated universe one step and store the ticks; returns their rows"""
+    prices, volumes, changes, change_percents = simulator.step()
+    tick_store.append_many(simulator_rows, prices, volumes, changes, change_percents, time.time())
+    return simulator_rows
+
+def generate_mock_price(symbol: str) -> Dict[str, Any]:
+    """Add a symbol to the simulated universe and record its opening tick"""
+    global simulator_rows
+    simulator.add_symbols([symbol])
+    simulator_rows = tick_store.register(simulator.symbols)
+    
+    tick_store.append(
+        symbol,
+        price=round(simulator.base_prices.get(symbol, 100.0), 2),
+        volume=int(simulator.rng.integers(*simulator.volume_range)),
+        change=0.0,
+        change_percent=0.0,
+        timestamp=time.time()
+    )
+    return tick_store.latest(symbol)
+
+def parse_symbols(value: Any) -> List[str]:
+    """Normalize a comma separated string or list of symbols"""
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        return []
+    return [s.strip().upper() for s in value if isinstance(s, str) and s.strip()]
+
+def tick_batch(rows: np.ndarray, snapshot: bool = False) -> TickBatch:
+    """Package the latest ticks of the given tick store rows for fan-out"""
+    columns = {name: column[rows] for name, column in tick_store.latest_columns().items()}
+    return TickBatch(rows, tick_store.symbols_at(rows), columns, snapshot=snapshot)
+
+def publish_ticks(rows: np.ndarray):
+    """Fan the latest ticks of the given rows out to WebSocket subscribers"""
+    if not len(hub):
+        return
+    if WILDCARD not in hub.subscribers:
+        symbols = tick_store.symbols_at(rows)
+        rows = rows[[i for i, symbol in enumerate(symbols) if symbol in hub.subscribers]]
+    if rows.size:
+        hub.publish(tick_batch(rows))
+
+def publish_bars(sealed: Dict[str, Dict[str, np.ndarray]]):
+    """Stream bars that just completed to bar channel subscribers, one message per interval"""
+    if not hub.bar_subscribers:
+        return
+    everything = WILDCARD in hub.bar_subscribers
+    for interval, bars in sealed.items():
+        symbols = tick_store.symbols_at(bars["rows"])
+        if not everything:
+            keep = np.array([symbol in hub.bar_subscribers for symbol in symbols], dtype=bool)
+            if not keep.any():
+                continue
+            bars = {name: column[keep] for name, column in bars.items()}
+            symbols = [symbol for symbol, kept in zip(symbols, keep) if kept]
+        hub.publish_bars(interval, bar_records(symbols, bars))
+
+async def process_ticks(rows: np.ndarray, persist: bool = True):
+    """Run freshly stored ticks through bar aggregation, persistence and WebSocket fan-out"""
+    columns = tick_store.latest_columns()
+    prices = columns["price"][rows]
+    volumes = columns["volume"][rows]
+    timestamps = columns["timestamp"][rows]
+    sealed = bar_aggregator.update(rows, prices, volumes, timestamps)
+    
+    # Never waits on the database: when it falls too far behind, the oldest unwritten rows are shed
+    if persist and PERSIST_TICKS:
+        market_data_writer.offer_many(tick_rows(tick_store.symbols_at(rows), prices, volumes, timestamps))
+    bars = sealed.get(BAR_PERSIST_INTERVAL)
+    if persist and bars is not None:
+        market_data_writer.offer_many(bar_rows(tick_store.symbols_at(bars["rows"]), bars))
+    if persist and tick_archive is not None:
+        tick_archive.append(tick_store.symbols_at(rows), prices, volumes, timestamps)
+    
+    if shared_board is not None and role == "producer":
+        shared_board.publish(
+            tick_store.symbols, rows, {name: column[rows] for name, column in columns.items()}, tick_store.version
+        )
+    
+    publish_ticks(rows)
+    publish_bars(sealed)
+
+# First replayed price per tick store row; change is reported against it
+replay_reference = np.zeros(0, dtype=np.float64)
+
+async def replay_ticks(symbols: List[str], prices: np.ndarray, volumes: np.ndarray, timestamps: np.ndarray):
+    """Feed one frame of replayed rows through the same path as live ticks"""
+    global replay_reference
+    rows = tick_store.register(symbols)
+    if len(tick_store) > replay_reference.size:
+        replay_reference = np.concatenate([replay_reference, np.zeros(len(tick_store) - replay_reference.size)])
+    unset = replay_reference[rows] == 0
+    replay_reference[rows[unset]] = prices[unset]
+    reference = replay_reference[rows]
+    
+    tick_store.append_many(
+        rows, prices, volumes,
+        np.round(prices - reference, 2),
+        np.round((prices / reference - 1.0) * 100, 2),
+        timestamps
     )
+    # Replayed rows already live in market_data, so they are not written again
+    await process_ticks(rows, persist=False)
+
+replay = ReplayController(replay_ticks, fetch_size=int(os.getenv("REPLAY_FETCH_SIZE", 5000)))
+
+def simulate_books() -> List[str]:
+    """Re-quote the simulated order books around their latest prices; returns the symbols updated"""
+    now = time.time()
+    updated = []
+    for symbol in BOOK_SYMBOLS:
+        price = tick_store.last_price(symbol)
+        if price is not None:
+            order_books.apply(symbol, book_simulator.step(order_books.book(symbol), price), now)
+            updated.append(symbol)
+    return updated
+
+def process_books(symbols: List[str]):
+    """Share updated order books with follower workers and stream them to book subscribers"""
+    if not symbols:
+        return
+    if book_board is not None and role == "producer":
+        names = order_books.symbols
+        position = {symbol: i for i, symbol in enumerate(names)}
+        ladders = [order_books.get(symbol).ladder(BOOK_MAX_LEVELS) for symbol in symbols]
+        book_board.publish(
+            names,
+            np.array([position[symbol] for symbol in symbols]),
+            {column: np.stack([ladder[column] for ladder in ladders]) for column in BOOK_BOARD_COLUMNS},
+            0
+        )
+    for symbol in symbols:
+        if symbol in hub.book_subscribers:
+            hub.publish_book(symbol, {"type": "order_book", "data": order_books.get(symbol).depth(BOOK_STREAM_DEPTH)})
+
+def send_snapshot(client: ClientConnection, symbols: List[str]):
+    """Send the latest cached data for newly subscribed symbols"""
+    rows = tick_store.populated_rows(None if WILDCARD in symbols else tick_store.rows_for(symbols))
+    if rows.size:
+        batch = tick_batch(rows, snapshot=True)
+        hub.prepare(batch)
+        for frame in client.codec.frames(batch, None):
+            client.offer(frame)
+
+def handle_client_message(client: ClientConnection, message: str):
+    """Apply a subscribe/unsubscribe request from a WebSocket client"""
+    try:
+        request = json.loads(message)
+    except ValueError:
+        request = None
+    
+    if not isinstance(request, dict) or "action" not in request:
+        # Echo back anything that isn't a control message
+        client.send({"type": "echo", "message": message})
+        return
+    
+    action = request.get("action")
+    channel = request.get("channel", "market_data")
+    params = request.get("params") or {}
+    symbols = parse_symbols(request.get("symbols", params.get("symbols")))
+    
+    if action == "ping":
+        client.send({"type": "pong"})
+        return
+    
+    if channel == "order_book":
+        handle_book_message(client, action, symbols)
+        return
+    if channel == "bars":
+        handle_bars_message(client, action, symbols, request.get("intervals", params.get("intervals", ["1m"])))
+        return
+    if channel != "market_data":
+        client.send({"type": "error", "message": f"Unknown channel: {channel}"})
+        return
+    
+    if action == "subscribe":
+        if not symbols:
+            client.send({"type": "error", "message": "No symbols to subscribe"})
+            return
+        added = hub.subscribe(client, symbols)
+        client.send({"type": "subscribed", "symbols": sorted(client.symbols)})
+        if added:
+            send_snapshot(client, added)
+    elif action == "unsubscribe":
+        hub.unsubscribe(client, symbols or list(client.symbols))
+        client.send({"type": "unsubscribed", "symbols": sorted(client.symbols)})
+    else:
+        client.send({"type": "error", "message": f"Unknown action: {action}"})
+
+def handle_book_message(client: ClientConnection, action: str, symbols: List[str]):
+    """Apply a subscribe/unsubscribe request on the order_book channel"""
+    if action == "subscribe":
+        if not symbols:
+            client.send({"type": "error", "message": "No symbols to subscribe"})
+            return
+        added = hub.subscribe_book(client, symbols)
+        client.send({"type": "subscribed", "channel": "order_book", "symbols": sorted(client.book_symbols)})
+        for symbol in added:
+            book = order_books.get(symbol)
+            if book is not None:
+                client.send({"type": "order_book", "data": book.depth(BOOK_STREAM_DEPTH)})
+    elif action == "unsubscribe":
+        hub.unsubscribe_book(client, symbols or list(client.book_symbols))
+        client.send({"type": "unsubscribed", "channel": "order_book", "symbols": sorted(client.book_symbols)})
+    else:
+        client.send({"type": "error", "message": f"Unknown action: {action}"})
+
+def handle_bars_message(client: ClientConnection, action: str, symbols: List[str], intervals: Any):
+    """Apply a subscribe/unsubscribe request on the bars channel"""
+    if action == "subscribe":
+        intervals = [intervals] if isinstance(intervals, str) else intervals
+        if not isinstance(intervals, list) or not intervals:
+            client.send({"type": "error", "message": "No intervals to subscribe"})
+            return
+        unknown = [interval for interval in intervals if interval not in bar_aggregator.series]
+        if unknown:
+            client.send({"type": "error", "message": f"Unknown intervals: {', '.join(map(str, unknown))}"})
+            return
+        if not symbols:
+            client.send({"type": "error", "message": "No symbols to subscribe"})
+            return
+        hub.subscribe_bars(client, symbols, intervals)
+        client.send({
+            "type": "subscribed",
+            "channel": "bars",
+            "symbols": sorted(client.bar_symbols),
+            "intervals": sorted(client.bar_intervals)
+        })
+    elif action == "unsubscribe":
+        hub.unsubscribe_bars(client, symbols or list(client.bar_symbols))
+        client.send({"type": "unsubscribed", "channel": "bars", "symbols": sorted(client.bar_symbols)})
+    else:
+        client.send({"type": "error", "message": f"Unknown action: {action}"})
 
 async def broadcast_market_data():
     """Broadcast real-time market data to all connected WebSocket clients"""
     while True:
         try:
-            # Generate market data for all symbols
-            for symbol in SYMBOLS:
-                market_data = generate_mock_price(symbol)
-                market_data_cache[symbol] = market_data
-                
-                # Broadcast to all connected clients
-                if active_connections:
-                    message = {
-                        "type": "market_data",
-                        "data": market_data.model_dump()
-                    }
-                    disconnected = []
-                    for connection in active_connections:
-                        try:
-                            await connection.send_json(message)
-                        except:
-                            disconnected.append(connection)
-                    
-                    # Remove disconnected clients
-                    for conn in disconnected:
-                        if conn in active_connections:
-                            active_connections.remove(conn)
+            started = time.monotonic()
             
-            # Wait before next update
-            await asyncio.sleep(1)  # Update every second
+            # Generate market data for all symbols in one vectorized step
+            rows = simulate_tick()
+            
+            # Build bars, then encode once per encoding and hand frames to subscribers
+            await process_ticks(rows)
+            process_books(simulate_books())
+            
+            # Wait for the next update, keeping a fixed cadence
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(0.0, UPDATE_INTERVAL - elapsed))
             
         except Exception as e:
             logger.error(f"Error in market data broadcast: {e}")
             await asyncio.sleep(5)
 
+async def flush_tick_archive():
+    """Append buffered ticks to the on-disk archive at a fixed interval"""
+    global archived_through
+    while True:
+        await asyncio.sleep(ARCHIVE_FLUSH_INTERVAL)
+        try:
+            # Swap the buffer on the event loop, write the files off it
+            cutoff = time.time()
+            await asyncio.to_thread(tick_archive.write, tick_archive.take_pending())
+            archived_through = cutoff
+        except Exception as e:
+            logger.error(f"Error flushing tick archive: {e}")
+
+def archive_horizon() -> float:
+    """Time before which the archive holds every tick, so bars ending by then are complete"""
+    if role == "producer":
+        return archived_through
+    # Followers don't see the producer's flushes; allow for two flush intervals
+    return time.time() - 2 * ARCHIVE_FLUSH_INTERVAL
+
+def become_producer():
+    """Create the shared price board and start generating or replaying ticks in this worker"""
+    global role, shared_board, book_board, archived_through, bars_complete_from
+    role = "producer"
+    # Ticks from here on are archived by this process; bars starting after now see all of them
+    archived_through = bars_complete_from = time.time()
+    if MARKET_DATA_WORKERS > 1:
+        shared_board = SharedPriceBoard(SHARED_BOARD_NAME, SHARED_BOARD_CAPACITY, create=True)
+        book_board = SharedPriceBoard(
+            f"{SHARED_BOARD_NAME}-books", BOOK_BOARD_CAPACITY, create=True, columns=BOOK_BOARD_COLUMNS
+        )
+    
+    market_data_writer.start()
+    if MARKET_DATA_MODE == "live":
+        # Carry on from the last mirrored prices when taking over from a previous producer
+        known = np.isin(simulator_rows, tick_store.populated_rows(simulator_rows))
+        if known.any():
+            simulator.prices[known] = tick_store.latest_columns()["price"][simulator_rows[known]]
+        simulate_tick()
+        asyncio.create_task(broadcast_market_data())
+        if tick_archive is not None:
+            asyncio.create_task(flush_tick_archive())
+
+async def mirror_shared_board():
+    """Follow the producer's ticks and order books through its shared boards
+    
+    Mirrored ticks go through the same bar aggregation and fan-out as the
+    producer's, but are never persisted here. If the price board stops
+    changing, the follower tries to take over as producer in case the old
+    one is gone, and otherwise re-opens the boards in case it restarted.
+    """
+    global producer_lock
+    prices = BoardFollower(SHARED_BOARD_NAME)
+    books = BoardFollower(f"{SHARED_BOARD_NAME}-books", BOOK_BOARD_COLUMNS)
+    board_rows = np.zeros(0, dtype=np.int64)  # local tick store row of each price board row
+    last_change = time.monotonic()
+    stale_after = 5 * UPDATE_INTERVAL + 5
+    while True:
+        try:
+            version = prices.version
+            update = prices.poll()
+            if update is not None:
+                names, rows, columns = update
+                if names:
+                    board_rows = np.concatenate([board_rows, tick_store.register(names)])
+                if prices.version != version:
+                    last_change = time.monotonic()
+                if rows.size:
+                    local = board_rows[rows]
+                    tick_store.append_many(
+                        local, columns["price"], columns["volume"], columns["change"],
+                        columns["change_percent"], columns["timestamp"], version=prices.version
+                    )
+                    await process_ticks(local, persist=False)
+            
+            update = books.poll()
+            if update is not None and update[1].size:
+                _, rows, columns = update
+                symbols = [books.symbols[row] for row in rows.tolist()]
+                for i, symbol in enumerate(symbols):
+                    order_books.book(symbol).load({column: values[i] for column, values in columns.items()})
+                process_books(symbols)
+            
+            if time.monotonic() - last_change > stale_after:
+                last_change = time.monotonic()
+                producer_lock = acquire_producer_lock(PRODUCER_LOCK_PATH)
+                if producer_lock is not None:
+                    logger.warning(f"Producer went away; worker {os.getpid()} taking over")
+                    prices.reset()
+                    books.reset()
+                    become_producer()
+                    return
+                prices.reset()
+                books.reset()
+                board_rows = np.zeros(0, dtype=np.int64)
+                
+        except Exception as e:
+            logger.error(f"Error mirroring shared boards: {e}")
+        await asyncio.sleep(MIRROR_POLL_INTERVAL)
+
 # API Routes
 @app.get("/health")
 async def health_check():
@@ -130,54 +561,111 @@ async def health_check():
         "status": "healthy",
         "service": "market-data-service",
         "timestamp": datetime.now().isoformat(),
-        "active_connections": len(active_connections),
-        "tracked_symbols": len(market_data_cache)
+        "role": role,
+        "pid": os.getpid(),
+        "active_connections": len(hub),
+        "tracked_symbols": len(tick_store),
+        "order_books": len(order_books),
+        "websocket": hub.stats(),
+        "persistence": market_data_writer.stats(),
+        "tick_archive": {
+            "directory": TICK_ARCHIVE_DIR,
+            "records_written": tick_archive.records_written,
+            "records_skipped": tick_archive.records_skipped
+        } if tick_archive is not None else None
     }
 
-@app.get("/market-data/{symbol}")
-async def get_market_data(symbol: str):
-    """Get current market data for a symbol"""
-    symbol = symbol.upper()
-    
-    if symbol in market_data_cache:
+def load_latest_rows(db: Session, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Latest market_data rows for symbols, from the cache or one batched query
+
+    The cache is only used by the producer in live mode, the one process
+    writing market_data; followers and replay always read the table.
+    """
+    if role == "producer" and MARKET_DATA_MODE == "live":
+        cutoff = time.monotonic() - LATEST_CACHE_TTL
+        missing = [symbol for symbol in symbols if latest_checked.get(symbol, cutoff) <= cutoff]
+    else:
+        missing = list(symbols)
+    if missing:
+        remember_latest_rows([
+            {
+                "symbol": row.symbol,
+                "open_price": row.open_price,
+                "high_price": row.high_price,
+                "low_price": row.low_price,
+                "close_price": row.close_price,
+                "volume": row.volume,
+                "vwap": row.vwap,
+                "timestamp": row.timestamp
+            }
+            for row in latest_market_data(db, missing).values()
+        ])
+    return {symbol: latest_rows[symbol] for symbol in symbols if symbol in latest_rows}
+
+@app.get("/market-data/latest")
+async def get_latest_market_data_batch(symbols: str, db: Session = Depends(get_db)):
+    """Get the latest stored market data for several symbols (?symbols=A,B,C)"""
+    try:
+        requested = parse_symbols(symbols)
+        if not requested:
+            raise HTTPException(status_code=400, detail="No symbols given")
+        
+        found = load_latest_rows(db, requested)
         return {
             "success": True,
-            "data": market_data_cache[symbol].model_dump()
+            "data": found,
+            "missing": [symbol for symbol in requested if symbol not in found]
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching latest market data for {symbols}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/market-data/{symbol}")
+async def get_market_data(symbol: str, ticks: int = 0):
+    """Get current market data for a symbol, optionally with its recent ticks"""
+    symbol = symbol.upper()
     
-    # Generate fresh data if not in cache
-    market_data = generate_mock_price(symbol)
-    market_data_cache[symbol] = market_data
+    market_data = tick_store.latest(symbol)
+    if market_data is None:
+        if not is_valid_symbol(symbol):
+            raise HTTPException(status_code=400, detail=f"Invalid symbol: {symbol}")
+        if MARKET_DATA_MODE == "replay":
+            raise HTTPException(status_code=404, detail=f"{symbol} has not been replayed yet")
+        if role != "producer":
+            raise HTTPException(status_code=404, detail=f"{symbol} is not in the simulated universe")
+        if shared_board is not None and len(tick_store) >= SHARED_BOARD_CAPACITY:
+            raise HTTPException(status_code=409, detail=f"Symbol limit of {SHARED_BOARD_CAPACITY} reached (SHARED_BOARD_CAPACITY)")
+        # Generate fresh data if not in cache
+        market_data = generate_mock_price(symbol)
     
-    return {
+    response = {
         "success": True,
-        "data": market_data.model_dump()
+        "data": market_data
     }
+    book = order_books.get(symbol)
+    if book is not None:
+        response["quote"] = book.top()
+    if ticks > 0:
+        history = tick_store.history(symbol, ticks)
+        response["ticks"] = {name: column.tolist() for name, column in history.items()}
+    
+    return response
 
 @app.get("/market-data/{symbol}/latest")
 async def get_latest_market_data(symbol: str, db: Session = Depends(get_db)):
     """Get latest market data from database"""
     try:
         symbol = symbol.upper()
-        latest_data = db.query(MarketData).filter(
-            MarketData.symbol == symbol
-        ).order_by(MarketData.timestamp.desc()).first()
+        latest_data = load_latest_rows(db, [symbol]).get(symbol)
         
         if not latest_data:
             raise HTTPException(status_code=404, detail=f"No market data found for {symbol}")
         
         return {
             "success": True,
-            "data": {
-                "symbol": latest_data.symbol,
-                "open_price": latest_data.open_price,
-                "high_price": latest_data.high_price,
-                "low_price": latest_data.low_price,
-                "close_price": latest_data.close_price,
-                "volume": latest_data.volume,
-                "vwap": latest_data.vwap,
-                "timestamp": latest_data.timestamp
-            }
+            "data": latest_data
         }
     except HTTPException:
         raise
@@ -186,10 +674,26 @@ async def get_latest_market_data(symbol: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/trading-signals")
-async def get_trading_signals(db: Session = Depends(get_db)):
-    """Get all trading signals from database"""
+async def get_trading_signals(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    symbol: Optional[str] = None,
+    signal_type: Optional[str] = None,
+    strategy: Optional[str] = None,
+    active_only: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Get trading signals from database, newest first
+    
+    Pass the returned next_cursor back as `cursor` for the following page.
+    """
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
     try:
-        signals = db.query(TradingSignal).order_by(TradingSignal.created_at.desc()).limit(20).all()
+        signals, next_cursor = trading_signals_page(
+            db, limit, cursor, symbol.upper() if symbol else None, signal_type, strategy,
+            datetime.now() if active_only else None
+        )
         
         return {
             "success": True,
@@ -207,117 +711,383 @@ async def get_trading_signals(db: Session = Depends(get_db)):
                     "generated_at": signal.created_at
                 }
                 for signal in signals
-            ]
+            ],
+            "next_cursor": next_cursor
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching trading signals: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def snapshot_body(since: Optional[int]) -> bytes:
+    """Serialized /market-data response, built at most once per tick store version and `since`"""
+    global snapshot_cache_version
+    version = tick_store.version
+    if snapshot_cache_version != version:
+        snapshot_cache.clear()
+        snapshot_cache_version = version
+    
+    body = snapshot_cache.get(since)
+    if body is None:
+        rows = None if since is None else tick_store.changed_rows(since)
+        body = json.dumps({
+            "success": True,
+            "version": version,
+            "since": since,
+            "data": tick_store.snapshot(rows)
+        }).encode()
+        if len(snapshot_cache) < SNAPSHOT_CACHE_SIZE:
+            snapshot_cache[since] = body
+    return body
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names the given ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
 @app.get("/market-data")
-async def get_all_market_data():
-    """Get current market data for all tracked symbols"""
-    if not market_data_cache:
+async def get_all_market_data(request: Request, since: Optional[int] = None):
+    """Get current market data for all tracked symbols
+    
+    The response carries the tick store version as its ETag and in the
+    body; If-None-Match with the current version gets a 304, and
+    ?since=<version> returns only the symbols updated after that version.
+    """
+    if not tick_store.populated_rows().size and MARKET_DATA_MODE == "live" and role == "producer":
         # Initialize with mock data
-        for symbol in SYMBOLS:
-            market_data_cache[symbol] = generate_mock_price(symbol)
+        simulate_tick()
     
-    return {
-        "success": True,
-        "data": {symbol: data.model_dump() for symbol, data in market_data_cache.items()}
-    }
+    etag = f'"{tick_store.version}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    # A version from before a restart can't be diffed against; send everything
+    if since is not None and since > tick_store.version:
+        since = None
+    return Response(content=snapshot_body(since), media_type="application/json", headers={"ETag": etag})
+
+def archived_bars(symbol: str, start: datetime, end: datetime, interval: str,
+                  max_points: Optional[int] = None, method: str = "lttb",
+                  horizon: Optional[float] = None, recent: Optional[Dict[str, np.ndarray]] = None) -> List[Dict[str, Any]]:
+    """Bars aggregated from the tick archive's memory-mapped range for a symbol
+    
+    Ticks still waiting to be flushed are missing from the archive, so bars
+    ending after `horizon` are dropped and taken from `recent` (completed
+    in-memory bars) instead, where it has them.
+    """
+    seconds = INTERVALS[interval]
+    columns = tick_archive.bars(symbol, start, end, seconds)
+    if horizon is not None:
+        keep = columns["start"] + seconds <= horizon
+        if not keep.all():
+            columns = {name: column[keep] for name, column in columns.items()}
+        if recent is not None:
+            take = ((recent["start"] + seconds > horizon) & (recent["start"] >= bars_complete_from)
+                    & (recent["start"] >= start.timestamp()) & (recent["start"] <= end.timestamp()))
+            columns = {name: np.concatenate([columns[name], recent[name][take]]) for name in columns}
+    if max_points and columns["close"].size > max_points:
+        keep = downsample(columns["start"], columns["close"], max_points, method, columns["low"], columns["high"])
+        columns = {name: column[keep] for name, column in columns.items()}
+    return [
+        {
+            "timestamp": datetime.fromtimestamp(ts).isoformat(),
+            "open": o,
+            "high": h,
+            "low": l,
+            "close": c,
+            "volume": v,
+            "vwap": round(w, 4)
+        }
+        for ts, o, h, l, c, v, w in zip(
+            columns["start"].tolist(),
+            columns["open"].tolist(),
+            columns["high"].tolist(),
+            columns["low"].tolist(),
+            columns["close"].tolist(),
+            columns["volume"].tolist(),
+            columns["vwap"].tolist()
+        )
+    ]
+
+def downsample_bars(bars: List[Dict[str, Any]], max_points: Optional[int], method: str) -> List[Dict[str, Any]]:
+    """Reduce a list of bars to at most `max_points` while keeping its shape"""
+    if not max_points or len(bars) <= max_points:
+        return bars
+    keep = downsample(
+        np.arange(len(bars)),
+        np.array([bar["close"] for bar in bars]),
+        max_points,
+        method,
+        np.array([bar["low"] for bar in bars]),
+        np.array([bar["high"] for bar in bars])
+    )
+    return [bars[i] for i in keep.tolist()]
 
 @app.get("/historical-data/{symbol}")
-async def get_historical_data(symbol: str, period: str = "1d"):
-    """Get historical data for a symbol"""
-    symbol = symbol.upper()
+async def get_historical_data(
+    symbol: str,
+    period: str = "1d",
+    interval: Optional[str] = None,
+    include_partial: bool = False,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    max_points: Optional[int] = None,
+    method: str = "lttb"
+):
+    """Get historical OHLCV bars for a symbol
     
-    # Generate mock historical data
-    periods = {
-        "1d": 24,    # 24 hours
-        "1w": 7,     # 7 days
-        "1m": 30,    # 30 days
-        "3m": 90,    # 90 days
-        "1y": 365    # 365 days
-    }
+    Recent bars come from the in-memory bar aggregator. An explicit
+    start/end range, or a period reaching back before the aggregator's
+    oldest kept bar (always the case right after a restart), is served
+    from the on-disk tick archive instead of the database.
     
-    data_points = periods.get(period, 24)
-    historical_data = []
+    With max_points the series is downsampled to at most that many bars,
+    by largest-triangle-three-buckets on close ("lttb") or by keeping each
+    bucket's lowest low and highest high ("minmax").
+    """
+    symbol = symbol.upper()
     
-    base_price = 100.0
-    if symbol in market_data_cache:
-        base_price = market_data_cache[symbol].price
+    period_seconds, default_interval = HISTORY_PERIODS.get(period, HISTORY_PERIODS["1d"])
+    interval = interval or default_interval
+    if interval not in INTERVALS:
+        raise HTTPException(status_code=400, detail=f"Unsupported interval: {interval}")
+    if method not in METHODS:
+        raise HTTPException(status_code=400, detail=f"Unsupported downsampling method: {method}")
+    if max_points is not None and max_points < 3:
+        raise HTTPException(status_code=400, detail="max_points must be at least 3")
     
-    # Generate historical data points
-    for i in range(data_points):
-        timestamp = datetime.now() - timedelta(hours=data_points - i)
-        price_variation = random.uniform(-0.05, 0.05)  # 5% variation
-        price = base_price * (1 + price_variation)
-        
-        historical_data.append({
-            "timestamp": timestamp.isoformat(),
-            "open": round(price * 0.999, 2),
-            "high": round(price * 1.002, 2),
-            "low": round(price * 0.998, 2),
-            "close": round(price, 2),
-            "volume": random.randint(10000, 100000)
-        })
+    data_points = max(1, period_seconds // INTERVALS[interval])
+    row = tick_store.index_of(symbol, create=False)
+    # The ring starts empty after a restart, so it only serves periods it actually reaches back over
+    long_range = (start is not None or end is not None
+                  or not bar_aggregator.covers(row, interval, time.time() - period_seconds))
+    if tick_archive is not None and long_range:
+        end = end or datetime.now()
+        start = start or datetime.fromtimestamp(end.timestamp() - period_seconds)
+        if end < start:
+            raise HTTPException(status_code=400, detail="end must not be before start")
+        horizon = archive_horizon()
+        recent = None
+        if role == "producer" and row is not None and end.timestamp() > horizon:
+            # Followers mirror the latest prices only, so only the producer's bars are exact
+            recent = bar_aggregator.completed(row, interval)
+        try:
+            historical_data = await asyncio.to_thread(
+                archived_bars, symbol, start, end, interval, max_points, method, horizon, recent
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        historical_data = []
+        if row is not None:
+            historical_data = downsample_bars(
+                bar_aggregator.bars(row, interval, data_points, include_partial), max_points, method
+            )
     
     return {
         "success": True,
         "data": HistoricalData(
             symbol=symbol,
             data=historical_data,
-            period=period
+            period=period,
+            interval=interval
         ).model_dump()
     }
 
+@app.get("/order-book/{symbol}")
+async def get_order_book(symbol: str, depth: int = 10):
+    """Get the L2 order book for a symbol, `depth` levels per side"""
+    book = order_books.get(symbol.upper())
+    if book is None:
+        raise HTTPException(status_code=404, detail=f"No order book for {symbol.upper()}")
+    return {"success": True, "data": book.depth(max(0, depth))}
+
+@app.get("/order-book/{symbol}/top")
+async def get_top_of_book(symbol: str):
+    """Get best bid/ask, spread and mid for a symbol"""
+    book = order_books.get(symbol.upper())
+    if book is None:
+        raise HTTPException(status_code=404, detail=f"No order book for {symbol.upper()}")
+    return {"success": True, "data": book.top()}
+
+@app.post("/order-book/{symbol}")
+async def update_order_book(symbol: str, request: BookUpdateRequest):
+    """Apply incremental L2 updates (size 0 removes a level) to a symbol's book"""
+    if role != "producer":
+        raise HTTPException(status_code=409, detail="Order book updates go to the producer worker; retry the request")
+    symbol = symbol.upper()
+    if symbol not in order_books and len(order_books) >= BOOK_BOARD_CAPACITY:
+        raise HTTPException(status_code=409, detail=f"Order book limit of {BOOK_BOARD_CAPACITY} symbols reached")
+    invalid = {update.side for update in request.updates} - {BID, ASK}
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Unknown book side: {', '.join(sorted(invalid))}")
+    timestamp = (request.timestamp or datetime.now()).timestamp()
+    book = order_books.apply(
+        symbol, [(update.side, update.price, update.size) for update in request.updates], timestamp
+    )
+    process_books([symbol])
+    return {"success": True, "data": book.top()}
+
+def require_replay_mode():
+    if MARKET_DATA_MODE != "replay":
+        raise HTTPException(status_code=409, detail="Service is not running in replay mode (MARKET_DATA_MODE=replay)")
+    if role != "producer":
+        raise HTTPException(status_code=409, detail="Replay is controlled by the producer worker; retry the request")
+
+@app.post("/replay/start")
+async def start_replay(request: ReplayRequest):
+    """Replay stored market_data rows for a date range through the live pipeline"""
+    require_replay_mode()
+    if request.end < request.start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    symbols = parse_symbols(request.symbols) if request.symbols else None
+    await replay.play(request.start, request.end, symbols, request.speed)
+    return {"success": True, "replay": replay.status()}
+
+@app.post("/replay/pause")
+async def pause_replay():
+    """Pause playback"""
+    require_replay_mode()
+    replay.pause()
+    return {"success": True, "replay": replay.status()}
+
+@app.post("/replay/resume")
+async def resume_replay():
+    """Resume paused playback"""
+    require_replay_mode()
+    replay.resume()
+    return {"success": True, "replay": replay.status()}
+
+@app.post("/replay/seek")
+async def seek_replay(timestamp: datetime):
+    """Continue playback from another timestamp"""
+    require_replay_mode()
+    try:
+        replay.seek(timestamp)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"success": True, "replay": replay.status()}
+
+@app.post("/replay/speed")
+async def set_replay_speed(speed: float):
+    """Change playback speed (0 = as fast as possible)"""
+    require_replay_mode()
+    replay.set_speed(speed)
+    return {"success": True, "replay": replay.status()}
+
+@app.post("/replay/stop")
+async def stop_replay():
+    """Stop playback"""
+    require_replay_mode()
+    await replay.stop()
+    return {"success": True, "replay": replay.status()}
+
+@app.get("/replay/status")
+async def get_replay_status():
+    """Current playback state and position"""
+    return {"success": True, "mode": MARKET_DATA_MODE, "role": role, "replay": replay.status()}
+
 @app.websocket("/ws/market-data")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time market data"""
-    await websocket.accept()
-    active_connections.append(websocket)
-    logger.info(f"New WebSocket connection. Total: {len(active_connections)}")
+    """WebSocket endpoint for real-time market data
+
+    Clients stream every symbol until they send
+    {"action": "subscribe", "symbols": [...]} (or the frontend's
+    {"action": "subscribe", "channel": "market_data", "params": {"symbols": [...]}}),
+    or connect with ?symbols=AAPL,MSFT. Newly subscribed symbols get a snapshot.
+    Order books stream on the "order_book" channel the same way
+    ({"action": "subscribe", "channel": "order_book", "symbols": [...]}),
+    and completed bars on the "bars" channel, one message per interval as
+    bars close ({"action": "subscribe", "channel": "bars", "symbols": ["*"],
+    "intervals": ["1m", "1h"]}).
+    
+    Frames are JSON by default. A compact encoding (json-batch, msgpack or
+    binary) can be chosen with ?encoding= or a "samrddhi.<encoding>"
+    subprotocol; batched encodings carry every symbol of a tick in one frame.
+    JSON frames that carry several symbols (snapshots and json-batch) key
+    "data" by symbol, the same shape as GET /market-data.
+    """
+    try:
+        codec, subprotocol = negotiate(
+            websocket.query_params.get("encoding"),
+            websocket.scope.get("subprotocols", [])
+        )
+    except ValueError as e:
+        logger.warning(f"Rejecting WebSocket connection: {e}")
+        await websocket.close(code=1003)
+        return
+    
+    await websocket.accept(subprotocol=subprotocol)
+    requested = parse_symbols(websocket.query_params.get("symbols", ""))
+    client = hub.connect(websocket, requested or None, codec)
+    logger.info(f"New WebSocket connection. Total: {len(hub)}")
     
     try:
         # Send initial data
         initial_data = {
             "type": "connection_established",
             "message": "Connected to market data stream",
-            "symbols": SYMBOLS
+            "symbols": simulator.symbols,
+            "encoding": codec.name
         }
-        await websocket.send_json(initial_data)
+        client.send(initial_data)
+        directory = codec.known_symbols()
+        if directory is not None:
+            client.offer(directory)
+        if requested:
+            send_snapshot(client, requested)
         
         # Keep connection alive
-        while True:
+        while not client.closed:
             # Wait for client messages (ping/pong)
             try:
                 message = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
-                # Echo back any received messages
-                await websocket.send_json({"type": "echo", "message": message})
+                handle_client_message(client, message)
             except asyncio.TimeoutError:
                 # Send ping to keep connection alive
-                await websocket.send_json({"type": "ping"})
+                client.send({"type": "ping"})
                 
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
-        if websocket in active_connections:
-            active_connections.remove(websocket)
-        logger.info(f"WebSocket connection closed. Total: {len(active_connections)}")
+        hub.disconnect(client)
+        await client.close()
+        logger.info(f"WebSocket connection closed. Total: {len(hub)}")
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize service on startup"""
+    global role, producer_lock
     logger.info("Starting Market Data Service...")
     
-    # Initialize market data cache
-    for symbol in SYMBOLS:
-        market_data_cache[symbol] = generate_mock_price(symbol)
+    if MARKET_DATA_WORKERS > 1:
+        producer_lock = acquire_producer_lock(PRODUCER_LOCK_PATH)
+        if producer_lock is None:
+            # Another worker produces; serve clients from its shared price board
+            role = "follower"
+            asyncio.create_task(mirror_shared_board())
+            logger.info(f"Worker {os.getpid()} following the shared price board")
     
-    # Start background task for market data updates
-    asyncio.create_task(broadcast_market_data())
+    if role == "producer":
+        # Start simulated market data updates (or the writer alone in replay mode)
+        become_producer()
+        if MARKET_DATA_MODE == "replay" and os.getenv("REPLAY_START") and os.getenv("REPLAY_END"):
+            # Optionally start playing right away
+            await replay.play(
+                datetime.fromisoformat(os.environ["REPLAY_START"]),
+                datetime.fromisoformat(os.environ["REPLAY_END"]),
+                parse_symbols(os.getenv("REPLAY_SYMBOLS", "")) or None,
+                float(os.getenv("REPLAY_SPEED", 1.0))
+            )
+    if MARKET_DATA_MODE == "replay":
+        logger.info("Market data replay mode enabled")
     
     logger.info(f"Market Data Service started successfully on port 8140")
 
@@ -326,12 +1096,22 @@ async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Shutting down Market Data Service...")
     
-    # Close all WebSocket connections
-    for connection in active_connections:
-        try:
-            await connection.close()
-        except:
-            pass
+    # Stop any replay and close all WebSocket connections
+    await replay.stop()
+    await hub.close_all()
+    
+    # Drain buffered ticks and bars to the database
+    if role == "producer":
+        await market_data_writer.stop()
+        if tick_archive is not None:
+            tick_archive.flush()
+    
+    if shared_board is not None:
+        shared_board.close()
+    if book_board is not None:
+        book_board.close()
+    if producer_lock is not None:
+        os.close(producer_lock)
     
     logger.info("Market Data Service shutdown complete")
 
@@ -340,5 +1120,6 @@ if __name__ == "__main__":
         "main:app",
         host="0.0.0.0",
         port=8141,
-        reload=False
+        reload=False,
+        workers=MARKET_DATA_WORKERS
     )
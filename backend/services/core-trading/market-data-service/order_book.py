@@ -0,0 +1,196 @@
+"""
+Order Book - per-symbol L2 price ladders kept in sorted arrays
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+BID = "bid"
+ASK = "ask"
+
+# One incremental L2 change: side, price, new size at that price (0 removes the level)
+LevelUpdate = Tuple[str, float, int]
+
+
+class BookSide:
+    """Price levels for one side, kept sorted so the best level is always last
+
+    Bids are stored by ascending price and asks by descending price
+    (as negated keys), so the top of book is the end of both lists and
+    most inserts and removals near it shift only a few elements.
+    """
+
+    def __init__(self, side: str, max_levels: int):
+        self.side = side
+        self.max_levels = max_levels
+        self._sign = 1.0 if side == BID else -1.0
+        self.keys: List[float] = []
+        self.sizes: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def set(self, price: float, size: int):
+        """Set the size at a price level in O(log n); size 0 removes the level"""
+        key = price * self._sign
+        keys = self.keys
+        i = bisect_left(keys, key)
+        found = i < len(keys) and keys[i] == key
+        if size <= 0:
+            if found:
+                del keys[i]
+                del self.sizes[i]
+            return
+        if found:
+            self.sizes[i] = size
+            return
+        keys.insert(i, key)
+        self.sizes.insert(i, size)
+        if len(keys) > self.max_levels:
+            # Drop the level furthest from the top of book
+            del keys[0]
+            del self.sizes[0]
+
+    def remove_through(self, price: float):
+        """Remove levels at or beyond `price` toward the other side (uncrosses the book)"""
+        i = bisect_left(self.keys, price * self._sign)
+        del self.keys[i:]
+        del self.sizes[i:]
+
+    def best(self) -> Optional[Tuple[float, int]]:
+        if not self.keys:
+            return None
+        return self.keys[-1] * self._sign, self.sizes[-1]
+
+    def load(self, prices: np.ndarray, sizes: np.ndarray):
+        """Replace every level from arrays ordered top of book outward; size 0 entries are padding"""
+        present = sizes > 0
+        self.keys = (prices[present][::-1] * self._sign).tolist()
+        self.sizes = sizes[present][::-1].tolist()
+
+    def levels(self, depth: Optional[int] = None) -> List[List[float]]:
+        """[price, size] pairs from the top of book outward"""
+        n = len(self.keys) if depth is None else min(depth, len(self.keys))
+        sign = self._sign
+        return [[self.keys[-1 - i] * sign, self.sizes[-1 - i]] for i in range(n)]
+
+
+class OrderBook:
+    """L2 book for one symbol with top of book, spread and mid kept current"""
+
+    def __init__(self, symbol: str, max_levels: int = 50):
+        self.symbol = symbol
+        self.bids = BookSide(BID, max_levels)
+        self.asks = BookSide(ASK, max_levels)
+        self.sequence = 0
+        self.timestamp: Optional[float] = None
+        self.bid_price: Optional[float] = None
+        self.bid_size: Optional[int] = None
+        self.ask_price: Optional[float] = None
+        self.ask_size: Optional[int] = None
+        self.spread: Optional[float] = None
+        self.mid: Optional[float] = None
+
+    def apply(self, updates: Iterable[LevelUpdate], timestamp: Optional[float] = None):
+        """Apply incremental L2 updates, then refresh top of book"""
+        for side, price, size in updates:
+            if side == BID:
+                self.bids.set(price, size)
+                if size > 0:
+                    self.asks.remove_through(price)
+            elif side == ASK:
+                self.asks.set(price, size)
+                if size > 0:
+                    self.bids.remove_through(price)
+            else:
+                raise ValueError(f"Unknown book side: {side}")
+        self.sequence += 1
+        self.timestamp = timestamp
+        self._refresh_top()
+
+    def load(self, ladder: Dict[str, np.ndarray], timestamp: Optional[float] = None):
+        """Replace the whole book with a ladder from `ladder()` (e.g. mirrored from another process)"""
+        self.bids.load(ladder["bid_price"], ladder["bid_size"])
+        self.asks.load(ladder["ask_price"], ladder["ask_size"])
+        self.sequence += 1
+        self.timestamp = timestamp
+        self._refresh_top()
+
+    def ladder(self, levels: int) -> Dict[str, np.ndarray]:
+        """Top `levels` per side as fixed-size arrays, zero-padded past the last level"""
+        ladder = {
+            "bid_price": np.zeros(levels), "bid_size": np.zeros(levels, dtype=np.int64),
+            "ask_price": np.zeros(levels), "ask_size": np.zeros(levels, dtype=np.int64),
+        }
+        for side, book_side in (("bid", self.bids), ("ask", self.asks)):
+            top = book_side.levels(levels)
+            if top:
+                prices, sizes = zip(*top)
+                ladder[f"{side}_price"][:len(top)] = prices
+                ladder[f"{side}_size"][:len(top)] = sizes
+        return ladder
+
+    def _refresh_top(self):
+        bid = self.bids.best()
+        ask = self.asks.best()
+        self.bid_price, self.bid_size = bid if bid else (None, None)
+        self.ask_price, self.ask_size = ask if ask else (None, None)
+        if bid and ask:
+            self.spread = round(ask[0] - bid[0], 6)
+            self.mid = round((ask[0] + bid[0]) / 2, 6)
+        else:
+            self.spread = self.mid = None
+
+    def top(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "bid_price": self.bid_price,
+            "bid_size": self.bid_size,
+            "ask_price": self.ask_price,
+            "ask_size": self.ask_size,
+            "spread": self.spread,
+            "mid": self.mid,
+            "sequence": self.sequence,
+        }
+
+    def depth(self, levels: Optional[int] = None) -> Dict[str, Any]:
+        result = self.top()
+        result["bids"] = self.bids.levels(levels)
+        result["asks"] = self.asks.levels(levels)
+        return result
+
+
+class OrderBooks:
+    """Registry of order books keyed by symbol"""
+
+    def __init__(self, max_levels: int = 50):
+        self.max_levels = max_levels
+        self.books: Dict[str, OrderBook] = {}
+
+    def __len__(self) -> int:
+        return len(self.books)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.books
+
+    def get(self, symbol: str) -> Optional[OrderBook]:
+        return self.books.get(symbol)
+
+    @property
+    def symbols(self) -> List[str]:
+        """Symbols in the order their books were created"""
+        return list(self.books)
+
+    def book(self, symbol: str) -> OrderBook:
+        """The book for a symbol, created empty if needed"""
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol, self.max_levels)
+        return book
+
+    def apply(self, symbol: str, updates: Iterable[LevelUpdate], timestamp: Optional[float] = None) -> OrderBook:
+        book = self.book(symbol)
+        book.apply(updates, timestamp)
+        return book
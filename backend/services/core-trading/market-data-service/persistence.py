@@ -0,0 +1,107 @@
+"""
+Bulk persistence of ticks and bars into the market_data table
+"""
+
+import csv
+import io
+import uuid
+from datetime import datetime
+from typing import Dict, List, Any
+
+import numpy as np
+from sqlalchemy import insert
+
+from shared.database import engine, SessionLocal, MarketData
+
+MARKET_DATA_COLUMNS = (
+    "id", "symbol", "timestamp", "open_price", "high_price",
+    "low_price", "close_price", "volume", "vwap"
+)
+
+
+def bar_rows(symbols: List[str], bars: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """market_data rows for a set of sealed bars"""
+    return [
+        {
+            "symbol": symbol,
+            "timestamp": datetime.fromtimestamp(start),
+            "open_price": o,
+            "high_price": h,
+            "low_price": l,
+            "close_price": c,
+            "volume": v,
+            "vwap": w
+        }
+        for symbol, start, o, h, l, c, v, w in zip(
+            symbols,
+            bars["start"].tolist(),
+            bars["open"].tolist(),
+            bars["high"].tolist(),
+            bars["low"].tolist(),
+            bars["close"].tolist(),
+            bars["volume"].tolist(),
+            bars["vwap"].tolist()
+        )
+    ]
+
+
+def tick_rows(symbols: List[str], prices: np.ndarray, volumes: np.ndarray,
+              timestamps: np.ndarray) -> List[Dict[str, Any]]:
+    """market_data rows for raw ticks, stored as single-price bars"""
+    return [
+        {
+            "symbol": symbol,
+            "timestamp": datetime.fromtimestamp(ts),
+            "open_price": price,
+            "high_price": price,
+            "low_price": price,
+            "close_price": price,
+            "volume": volume,
+            "vwap": price
+        }
+        for symbol, price, volume, ts in zip(symbols, prices.tolist(), volumes.tolist(), timestamps.tolist())
+    ]
+
+
+def _copy_market_data(rows: List[Dict[str, Any]]):
+    """Stream rows into market_data with PostgreSQL COPY"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            row.get("id") or str(uuid.uuid4()),
+            row["symbol"],
+            row["timestamp"].isoformat(),
+            row["open_price"],
+            row["high_price"],
+            row["low_price"],
+            row["close_price"],
+            row["volume"],
+            row.get("vwap")
+        ])
+    buffer.seek(0)
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY market_data ({', '.join(MARKET_DATA_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def write_market_data(rows: List[Dict[str, Any]]):
+    """Bulk insert rows into market_data (COPY on PostgreSQL, executemany elsewhere)"""
+    if engine.dialect.name == "postgresql":
+        _copy_market_data(rows)
+        return
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(MarketData), rows)
+        db.commit()
+    finally:
+        db.close()
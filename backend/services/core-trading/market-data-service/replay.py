@@ -0,0 +1,236 @@
+"""
+Historical Replay - streams stored market_data rows through the live pipeline
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from shared.database import engine, MarketData
+
+logger = logging.getLogger(__name__)
+
+# Callback receiving one replayed frame: symbols, prices, volumes, epoch timestamps
+TickHandler = Callable[[List[str], np.ndarray, np.ndarray, np.ndarray], Awaitable[None]]
+
+
+def stream_rows(start: datetime, end: datetime, symbols: Optional[List[str]],
+                fetch_size: int) -> Iterator[List[Any]]:
+    """Yield chunks of (symbol, timestamp, close_price, volume) rows in time order
+
+    Rows come from a server-side cursor, so only `fetch_size` rows are held
+    at a time no matter how long the range is.
+    """
+    query = select(
+        MarketData.symbol, MarketData.timestamp, MarketData.close_price, MarketData.volume
+    ).where(
+        MarketData.timestamp >= start, MarketData.timestamp <= end
+    ).order_by(MarketData.timestamp, MarketData.id)
+    if symbols:
+        query = query.where(MarketData.symbol.in_(symbols))
+
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=fetch_size).execute(query)
+        for chunk in result.partitions(fetch_size):
+            yield chunk
+
+
+class ReplayController:
+    """Plays back a date range of stored bars at a configurable speed
+
+    Rows sharing a timestamp are delivered together as one frame. Speed is
+    a multiple of real time (1 = as recorded, 10 = ten times faster);
+    speed 0 replays as fast as the pipeline accepts frames. Playback can
+    be paused, resumed and moved to another timestamp while running.
+    """
+
+    def __init__(self, on_ticks: TickHandler, fetch_size: int = 5000):
+        self.on_ticks = on_ticks
+        self.fetch_size = fetch_size
+        self.state = "idle"
+        self.start: Optional[datetime] = None
+        self.end: Optional[datetime] = None
+        self.symbols: Optional[List[str]] = None
+        self.speed = 1.0
+        self.position: Optional[datetime] = None
+        self.frames = 0
+        self.rows = 0
+        self._resume = asyncio.Event()
+        self._seek_to: Optional[datetime] = None
+        self._reanchor = False
+        # Set to cut short the wait before the next frame when controls change
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def play(self, start: datetime, end: datetime, symbols: Optional[List[str]] = None,
+                   speed: float = 1.0):
+        """Start (or restart) playback of a range"""
+        await self.stop()
+        self.start, self.end, self.symbols = start, end, symbols
+        self.speed = max(0.0, speed)
+        self.position = None
+        self.frames = self.rows = 0
+        self._seek_to = None
+        self._resume.set()
+        self.state = "playing"
+        self._task = asyncio.create_task(self._run(start))
+
+    def pause(self):
+        if self.state == "playing":
+            self._resume.clear()
+            self.state = "paused"
+            self._wake.set()
+
+    def resume(self):
+        if self.state == "paused":
+            self.state = "playing"
+            self._resume.set()
+            self._wake.set()
+
+    def seek(self, timestamp: datetime):
+        """Continue playback from another point in the range; while paused, it resumes from there
+
+        Raises RuntimeError when nothing is playing and ValueError when the
+        timestamp is outside the range being replayed.
+        """
+        if self._task is None or self._task.done():
+            raise RuntimeError("No replay in progress")
+        try:
+            inside = self.start <= timestamp <= self.end
+        except TypeError:
+            # Naive and timezone-aware datetimes don't compare
+            inside = False
+        if not inside:
+            raise ValueError(f"timestamp must be between {self.start.isoformat()} and {self.end.isoformat()}")
+        self._seek_to = timestamp
+        self.position = timestamp
+        self._wake.set()
+
+    def set_speed(self, speed: float):
+        self.speed = max(0.0, speed)
+        # Re-anchor the clock so the new speed applies from the current position
+        self._reanchor = True
+        self._wake.set()
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        if self.state != "idle":
+            self.state = "stopped"
+
+    async def _run(self, start: datetime):
+        try:
+            position = start
+            while position is not None:
+                position = await self._play_from(position)
+            self.state = "finished"
+            logger.info(f"Replay finished after {self.frames} frames ({self.rows} rows)")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.state = "error"
+            logger.error(f"Replay failed: {e}")
+
+    async def _play_from(self, start: datetime) -> Optional[datetime]:
+        """Play from `start` until the range ends or a seek asks for a new start"""
+        chunks = stream_rows(start, self.end, self.symbols, self.fetch_size)
+        anchor_wall = time.monotonic()
+        anchor_ts: Optional[float] = None
+        pending: List[Any] = []
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    if pending:
+                        await self._emit(pending)
+                    return None
+                pending.extend(chunk)
+
+                # Everything except the last timestamp is complete
+                last_ts = pending[-1][1]
+                cut = len(pending)
+                while cut > 0 and pending[cut - 1][1] == last_ts:
+                    cut -= 1
+                ready, pending = pending[:cut], pending[cut:]
+
+                for frame in self._frames(ready):
+                    frame_ts = frame[0][1].timestamp()
+                    while True:
+                        if self._seek_to is not None:
+                            target, self._seek_to = self._seek_to, None
+                            return target
+                        if not self._resume.is_set():
+                            # Paused: wake on resume, and on seek so it re-positions right away
+                            self._wake.clear()
+                            await self._wake.wait()
+                            anchor_ts = None
+                            continue
+                        if anchor_ts is None or self._reanchor:
+                            anchor_wall, anchor_ts = time.monotonic(), frame_ts
+                            self._reanchor = False
+                        delay = 0.0
+                        if self.speed > 0:
+                            delay = anchor_wall + (frame_ts - anchor_ts) / self.speed - time.monotonic()
+                        if delay <= 0 or not await self._interruptible_sleep(delay):
+                            break
+                    await self._emit(frame)
+        finally:
+            try:
+                chunks.close()
+            except ValueError:
+                # Cancelled while a worker thread was still fetching; it closes on its own
+                pass
+
+    async def _interruptible_sleep(self, delay: float) -> bool:
+        """Sleep for `delay` seconds; returns True if a control change cut it short"""
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    @staticmethod
+    def _frames(rows: List[Any]) -> Iterator[List[Any]]:
+        start = 0
+        for i in range(1, len(rows) + 1):
+            if i == len(rows) or rows[i][1] != rows[start][1]:
+                yield rows[start:i]
+                start = i
+
+    async def _emit(self, frame: List[Any]):
+        # Keep the last row per symbol so each frame holds unique symbols
+        latest = {row[0]: row for row in frame}
+        rows = list(latest.values())
+        symbols = [row[0] for row in rows]
+        prices = np.array([row[2] for row in rows], dtype=np.float64)
+        volumes = np.array([row[3] for row in rows], dtype=np.int64)
+        timestamps = np.array([row[1].timestamp() for row in rows], dtype=np.float64)
+        await self.on_ticks(symbols, prices, volumes, timestamps)
+        self.position = rows[-1][1]
+        self.frames += 1
+        self.rows += len(frame)
+        # Yield to the event loop even when replaying as fast as possible
+        await asyncio.sleep(0)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "start": self.start.isoformat() if self.start else None,
+            "end": self.end.isoformat() if self.end else None,
+            "symbols": self.symbols,
+            "speed": self.speed,
+            "position": self.position.isoformat() if self.position else None,
+            "frames": self.frames,
+            "rows": self.rows,
+        }
@@ -0,0 +1,206 @@
+"""
+Shared Price Board - latest state per symbol in shared memory
+Lets one producer process feed any number of uvicorn workers
+"""
+
+import fcntl
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Header slots (uint64): seqlock sequence, tick version, symbol count, capacity
+SEQUENCE, VERSION, COUNT, CAPACITY = range(4)
+HEADER_SLOTS = 4
+
+NAME_WIDTH = 16
+
+TICK_COLUMNS = {
+    "price": np.float64,
+    "volume": np.int64,
+    "change": np.float64,
+    "change_percent": np.float64,
+    "timestamp": np.float64,
+}
+
+
+def book_columns(levels: int) -> Dict[str, np.dtype]:
+    """Board columns holding `levels` price levels per side of an order book"""
+    return {
+        "bid_price": np.dtype((np.float64, (levels,))),
+        "bid_size": np.dtype((np.int64, (levels,))),
+        "ask_price": np.dtype((np.float64, (levels,))),
+        "ask_size": np.dtype((np.int64, (levels,))),
+    }
+
+
+def acquire_producer_lock(path: str) -> Optional[int]:
+    """Try to become the producer; returns the held lock's file descriptor, or None
+
+    The lock is released by the kernel when the holder exits, so a stale
+    lock file never blocks a restart.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    return fd
+
+
+class SharedPriceBoard:
+    """Fixed-capacity columns of the latest state per symbol, guarded by a seqlock
+
+    Columns default to the latest tick (TICK_COLUMNS); any fixed-size dtype
+    works, including sub-array dtypes for per-symbol ladders.
+
+    The producer bumps the sequence to an odd value, writes, then bumps it
+    back to even. Readers copy what they need and retry if the sequence was
+    odd or moved underneath them, so they never block the producer. Every
+    publish carries the producer's tick store version and stamps the rows it
+    touched with it, so a reader can pick up exactly the rows that changed
+    since its last read and keep the same version numbering.
+    """
+
+    def __init__(self, name: str, capacity: int = 0, create: bool = False,
+                 columns: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.column_types = {column: np.dtype(dtype) for column, dtype in (columns or TICK_COLUMNS).items()}
+        if create:
+            try:
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+            size = self._size(capacity, self.column_types)
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            # Only the producer owns the segment; don't let this process's exit unlink it
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+            capacity = int(np.ndarray(HEADER_SLOTS, dtype=np.uint64, buffer=self._shm.buf)[CAPACITY])
+
+        self.owner = create
+        self.capacity = capacity
+        buf = self._shm.buf
+        offset = 0
+        self._header = np.ndarray(HEADER_SLOTS, dtype=np.uint64, buffer=buf, offset=offset)
+        offset += HEADER_SLOTS * 8
+        self._names = np.ndarray(capacity, dtype=f"S{NAME_WIDTH}", buffer=buf, offset=offset)
+        offset += capacity * NAME_WIDTH
+        self._columns: Dict[str, np.ndarray] = {}
+        for column, dtype in list(self.column_types.items()) + [("stamp", np.dtype(np.uint64))]:
+            self._columns[column] = np.ndarray(capacity, dtype=dtype, buffer=buf, offset=offset)
+            offset += capacity * dtype.itemsize
+        if create:
+            self._header[CAPACITY] = capacity
+
+    @staticmethod
+    def _size(capacity: int, column_types: Dict[str, np.dtype]) -> int:
+        row = NAME_WIDTH + 8 + sum(dtype.itemsize for dtype in column_types.values())
+        return HEADER_SLOTS * 8 + capacity * row
+
+    @property
+    def version(self) -> int:
+        return int(self._header[VERSION])
+
+    def __len__(self) -> int:
+        return int(self._header[COUNT])
+
+    def publish(self, symbols: Sequence[str], rows: np.ndarray, columns: Dict[str, np.ndarray], version: int):
+        """Write the latest values of `rows`; `symbols` is the producer's full row-ordered universe"""
+        count = len(symbols)
+        if count > self.capacity:
+            raise ValueError(f"Shared price board holds {self.capacity} symbols, {count} registered")
+        header = self._header
+        header[SEQUENCE] += 1
+        try:
+            known = int(header[COUNT])
+            if count > known:
+                self._names[known:count] = [symbol.encode()[:NAME_WIDTH] for symbol in symbols[known:count]]
+                header[COUNT] = count
+            version = max(version, int(header[VERSION]) + 1)
+            for column in self.column_types:
+                self._columns[column][rows] = columns[column]
+            self._columns["stamp"][rows] = version
+            header[VERSION] = version
+        finally:
+            header[SEQUENCE] += 1
+
+    def changes(self, since: int, known: int) -> Tuple[int, List[str], np.ndarray, Dict[str, np.ndarray]]:
+        """Rows updated after version `since`
+
+        Returns (version, names of rows from `known` on, changed rows, their
+        column values). Everything returned is a private copy.
+        """
+        header = self._header
+        while True:
+            sequence = int(header[SEQUENCE])
+            if sequence & 1:
+                time.sleep(0)
+                continue
+            version = int(header[VERSION])
+            count = int(header[COUNT])
+            names = [name.decode() for name in self._names[known:count].tolist()] if count > known else []
+            if version == since:
+                rows = np.zeros(0, dtype=np.int64)
+                columns = {column: np.zeros(0, dtype=dtype) for column, dtype in self.column_types.items()}
+            else:
+                rows = np.flatnonzero(self._columns["stamp"][:count] > since)
+                columns = {column: self._columns[column][rows] for column in self.column_types}
+            if int(header[SEQUENCE]) == sequence:
+                return version, names, rows, columns
+
+    def close(self):
+        # Drop our views before releasing the mapping
+        self._header = self._names = None
+        self._columns = {}
+        self._shm.close()
+        if self.owner:
+            # Workers forked from one parent share a resource tracker, and a follower
+            # unregistering the name removes ours too; re-register so unlink balances
+            resource_tracker.register(self._shm._name, "shared_memory")
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class BoardFollower:
+    """A reader's position on a producer's board, opening it once it exists"""
+
+    def __init__(self, name: str, columns: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.columns = columns
+        self.board: Optional[SharedPriceBoard] = None
+        self.version = 0
+        self.symbols: List[str] = []
+
+    def poll(self) -> Optional[Tuple[List[str], np.ndarray, Dict[str, np.ndarray]]]:
+        """(new symbol names, changed rows, their values) since the last poll, or None if not attached"""
+        if self.board is None:
+            try:
+                board = SharedPriceBoard(self.name, columns=self.columns)
+            except FileNotFoundError:
+                return None
+            if not board.capacity:
+                board.close()
+                return None
+            self.board, self.version, self.symbols = board, 0, []
+        self.version, names, rows, columns = self.board.changes(self.version, len(self.symbols))
+        self.symbols.extend(names)
+        return names, rows, columns
+
+    def reset(self):
+        """Drop the mapping so the next poll re-opens the board, e.g. after a producer restart"""
+        if self.board is not None:
+            self.board.close()
+        self.board = None
+        self.version = 0
+        self.symbols = []
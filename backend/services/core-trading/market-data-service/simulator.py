@@ -0,0 +1,150 @@
+"""
+Price Simulator - vectorized geometric Brownian motion for a whole universe
+plus simulated L2 quote updates for order books
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from order_book import ASK, BID, LevelUpdate, OrderBook
+
+DEFAULT_SYMBOLS = ["AAPL", "GOOGL", "MSFT", "AMZN", "TSLA", "NVDA", "META", "NFLX", "AMD", "INTC"]
+
+DEFAULT_BASE_PRICES = {
+    "AAPL": 150.0, "GOOGL": 2800.0, "MSFT": 300.0, "AMZN": 3000.0,
+    "TSLA": 200.0, "NVDA": 450.0, "META": 250.0, "NFLX": 400.0,
+    "AMD": 100.0, "INTC": 50.0
+}
+
+# Trading seconds in a year, used to scale annualized drift and volatility
+SECONDS_PER_YEAR = 252 * 6.5 * 3600
+
+
+class PriceSimulator:
+    """Random-walks every symbol in the universe with one vectorized step per tick
+
+    Each step applies S *= exp((mu - sigma^2 / 2) dt + sigma sqrt(dt) Z) with
+    annualized drift `mu` and volatility `sigma`. Change and change percent
+    are reported against the price each symbol started the session at.
+    Passing the same seed reproduces the same paths.
+    """
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        base_prices: Optional[Dict[str, float]] = None,
+        volatility: float = 0.3,
+        drift: float = 0.0,
+        tick_interval: float = 1.0,
+        seed: Optional[int] = None,
+        volume_range: Tuple[int, int] = (10000, 1000000),
+    ):
+        self.rng = np.random.default_rng(seed)
+        self.volatility = volatility
+        self.drift = drift
+        self.tick_interval = tick_interval
+        self.volume_range = volume_range
+        self.base_prices = dict(DEFAULT_BASE_PRICES)
+        if base_prices:
+            self.base_prices.update(base_prices)
+
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.prices = np.zeros(0, dtype=np.float64)
+        self.reference = np.zeros(0, dtype=np.float64)
+        self.add_symbols(symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index
+
+    @classmethod
+    def with_universe(cls, symbols: Sequence[str], size: int, seed: Optional[int] = None, **kwargs) -> "PriceSimulator":
+        """Build a simulator padded with synthetic SIM##### tickers up to `size` symbols"""
+        symbols = list(symbols)
+        rng = np.random.default_rng(seed)
+        extra = max(0, size - len(symbols))
+        synthetic = [f"SIM{i:05d}" for i in range(extra)]
+        # Log-normal spread of starting prices centred around $100
+        base_prices = dict(zip(synthetic, np.round(np.exp(rng.normal(np.log(100.0), 0.8, extra)), 2).tolist()))
+        base_prices.update(kwargs.pop("base_prices", None) or {})
+        return cls(symbols + synthetic, base_prices=base_prices, seed=seed, **kwargs)
+
+    def add_symbols(self, symbols: Sequence[str]) -> List[str]:
+        """Add symbols to the universe; returns the ones that were new"""
+        new = [s for s in dict.fromkeys(symbols) if s not in self._index]
+        if not new:
+            return []
+        for symbol in new:
+            self._index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        start = np.array([self.base_prices.get(s, 100.0) for s in new], dtype=np.float64)
+        self.prices = np.concatenate([self.prices, start])
+        self.reference = np.concatenate([self.reference, start])
+        return new
+
+    def step(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Advance every symbol by one tick
+
+        Returns (prices, volumes, changes, change_percents), with money values
+        rounded to cents and percentages to two decimals.
+        """
+        n = len(self.symbols)
+        dt = self.tick_interval / SECONDS_PER_YEAR
+        sigma = self.volatility
+        shocks = self.rng.standard_normal(n)
+        self.prices *= np.exp((self.drift - 0.5 * sigma * sigma) * dt + sigma * np.sqrt(dt) * shocks)
+
+        prices = np.round(self.prices, 2)
+        changes = np.round(self.prices - self.reference, 2)
+        change_percents = np.round((self.prices / self.reference - 1.0) * 100, 2)
+        volumes = self.rng.integers(self.volume_range[0], self.volume_range[1], n)
+        return prices, volumes, changes, change_percents
+
+
+class BookSimulator:
+    """Incremental L2 updates that keep a simulated book quoted around the last price
+
+    Each step re-quotes the top of book on both sides, clears any levels
+    left inside the new spread, and changes the size of a random subset of
+    the deeper levels.
+    """
+
+    def __init__(self, rng: np.random.Generator, levels: int = 10, tick_size: float = 0.01,
+                 spread_bps: float = 2.0, size_range: Tuple[int, int] = (100, 5000), churn: float = 0.3):
+        self.rng = rng
+        self.levels = levels
+        self.tick_size = tick_size
+        self.spread_bps = spread_bps
+        self.size_range = size_range
+        self.churn = churn
+
+    def step(self, book: OrderBook, price: float) -> List[LevelUpdate]:
+        tick = self.tick_size
+        half_spread = max(1, int(round(price * self.spread_bps / 20000 / tick)))
+        center = int(round(price / tick))
+        best_bid = center - half_spread
+        best_ask = center + half_spread
+
+        updates: List[LevelUpdate] = []
+        # Levels the price moved through would otherwise sit inside the spread
+        for bid_price, _ in book.bids.levels():
+            if bid_price <= round(best_bid * tick, 6):
+                break
+            updates.append((BID, bid_price, 0))
+        for ask_price, _ in book.asks.levels():
+            if ask_price >= round(best_ask * tick, 6):
+                break
+            updates.append((ASK, ask_price, 0))
+
+        offsets = np.arange(self.levels)
+        changed = (offsets == 0) | (self.rng.random(self.levels) < self.churn)
+        bid_sizes = self.rng.integers(self.size_range[0], self.size_range[1], self.levels)
+        ask_sizes = self.rng.integers(self.size_range[0], self.size_range[1], self.levels)
+        for i in np.flatnonzero(changed).tolist():
+            updates.append((BID, round((best_bid - i) * tick, 6), int(bid_sizes[i])))
+            updates.append((ASK, round((best_ask + i) * tick, 6), int(ask_sizes[i])))
+        return updates
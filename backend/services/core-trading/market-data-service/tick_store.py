@@ -0,0 +1,249 @@
+"""
+Tick Store - columnar ring buffers for real-time market data
+Keeps the last N ticks per symbol in preallocated NumPy arrays
+"""
+
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_DEPTH = 512
+DEFAULT_SYMBOL_CAPACITY = 64
+
+
+class TickStore:
+    """Per-symbol ring buffers of (price, volume, change, change_percent, timestamp) columns
+
+    Each symbol owns one row of a 2-D array per column, so appends are O(1)
+    index writes and a whole universe can be appended in one vectorized call.
+    The most recent tick of every symbol is mirrored into 1-D "last" columns
+    so snapshot reads are plain slices with no per-symbol gathering.
+
+    Every write bumps `version` and stamps the rows it touched with it, so
+    readers can tell whether anything changed and which rows did.
+    """
+
+    def __init__(self, depth: int = DEFAULT_DEPTH, symbol_capacity: int = DEFAULT_SYMBOL_CAPACITY):
+        if depth < 1:
+            raise ValueError("depth must be at least 1")
+        self.depth = depth
+        self._capacity = max(1, symbol_capacity)
+        self._index: Dict[str, int] = {}
+        self._symbols: List[str] = []
+
+        rows = self._capacity
+        self._price = np.zeros((rows, depth), dtype=np.float64)
+        self._volume = np.zeros((rows, depth), dtype=np.int64)
+        self._change = np.zeros((rows, depth), dtype=np.float64)
+        self._change_percent = np.zeros((rows, depth), dtype=np.float64)
+        self._timestamp = np.zeros((rows, depth), dtype=np.float64)
+        self._head = np.zeros(rows, dtype=np.int64)
+        self._count = np.zeros(rows, dtype=np.int64)
+
+        self._last_price = np.zeros(rows, dtype=np.float64)
+        self._last_volume = np.zeros(rows, dtype=np.int64)
+        self._last_change = np.zeros(rows, dtype=np.float64)
+        self._last_change_percent = np.zeros(rows, dtype=np.float64)
+        self._last_timestamp = np.zeros(rows, dtype=np.float64)
+
+        self.version = 0
+        self._updated = np.zeros(rows, dtype=np.int64)
+
+    # Symbol registry
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index and self._count[self._index[symbol]] > 0
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._symbols)
+
+    def symbols_at(self, rows: np.ndarray) -> List[str]:
+        return [self._symbols[row] for row in rows.tolist()]
+
+    def index_of(self, symbol: str, create: bool = True) -> Optional[int]:
+        """Return the row for a symbol, registering it if needed"""
+        row = self._index.get(symbol)
+        if row is None and create:
+            row = len(self._symbols)
+            if row >= self._capacity:
+                self._grow(self._capacity * 2)
+            self._index[symbol] = row
+            self._symbols.append(symbol)
+        return row
+
+    def register(self, symbols: Sequence[str]) -> np.ndarray:
+        """Register many symbols at once and return their rows"""
+        return np.fromiter((self.index_of(s) for s in symbols), dtype=np.int64, count=len(symbols))
+
+    def _grow(self, capacity: int):
+        extra = capacity - self._capacity
+
+        def pad(array: np.ndarray) -> np.ndarray:
+            shape = (extra,) + array.shape[1:]
+            return np.concatenate([array, np.zeros(shape, dtype=array.dtype)])
+
+        for name in ("_price", "_volume", "_change", "_change_percent", "_timestamp",
+                     "_head", "_count", "_last_price", "_last_volume", "_last_change",
+                     "_last_change_percent", "_last_timestamp", "_updated"):
+            setattr(self, name, pad(getattr(self, name)))
+        self._capacity = capacity
+
+    # Writes
+    def append(self, symbol: str, price: float, volume: int, change: float,
+               change_percent: float, timestamp: float):
+        """Append a single tick in O(1)"""
+        row = self.index_of(symbol)
+        slot = self._head[row]
+        self._price[row, slot] = price
+        self._volume[row, slot] = volume
+        self._change[row, slot] = change
+        self._change_percent[row, slot] = change_percent
+        self._timestamp[row, slot] = timestamp
+        self._head[row] = (slot + 1) % self.depth
+        if self._count[row] < self.depth:
+            self._count[row] += 1
+
+        self._last_price[row] = price
+        self._last_volume[row] = volume
+        self._last_change[row] = change
+        self._last_change_percent[row] = change_percent
+        self._last_timestamp[row] = timestamp
+
+        self.version += 1
+        self._updated[row] = self.version
+
+    def append_many(self, rows: np.ndarray, prices: np.ndarray, volumes: np.ndarray,
+                    changes: np.ndarray, change_percents: np.ndarray, timestamps,
+                    version: Optional[int] = None):
+        """Append one tick for each of the given rows in a single vectorized step
+
+        Rows must be unique within one call. `version` overrides the next
+        local version, for stores mirroring another store's versions.
+        """
+        slots = self._head[rows]
+        self._price[rows, slots] = prices
+        self._volume[rows, slots] = volumes
+        self._change[rows, slots] = changes
+        self._change_percent[rows, slots] = change_percents
+        self._timestamp[rows, slots] = timestamps
+        self._head[rows] = (slots + 1) % self.depth
+        self._count[rows] = np.minimum(self._count[rows] + 1, self.depth)
+
+        self._last_price[rows] = prices
+        self._last_volume[rows] = volumes
+        self._last_change[rows] = changes
+        self._last_change_percent[rows] = change_percents
+        self._last_timestamp[rows] = timestamps
+
+        self.version = max(self.version + 1, version or 0)
+        self._updated[rows] = self.version
+
+    # Reads
+    def last_price(self, symbol: str) -> Optional[float]:
+        row = self._index.get(symbol)
+        if row is None or self._count[row] == 0:
+            return None
+        return float(self._last_price[row])
+
+    def latest(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Most recent tick for a symbol as a JSON-ready dict"""
+        row = self._index.get(symbol)
+        if row is None or self._count[row] == 0:
+            return None
+        return {
+            "symbol": symbol,
+            "price": float(self._last_price[row]),
+            "volume": int(self._last_volume[row]),
+            "timestamp": datetime.fromtimestamp(self._last_timestamp[row]).isoformat(),
+            "change": float(self._last_change[row]),
+            "change_percent": float(self._last_change_percent[row]),
+        }
+
+    def latest_columns(self) -> Dict[str, np.ndarray]:
+        """Zero-copy views of the latest tick for every registered symbol"""
+        n = len(self._symbols)
+        return {
+            "price": self._last_price[:n],
+            "volume": self._last_volume[:n],
+            "change": self._last_change[:n],
+            "change_percent": self._last_change_percent[:n],
+            "timestamp": self._last_timestamp[:n],
+        }
+
+    def populated_rows(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """The given rows (default: all) that hold at least one tick"""
+        if rows is None:
+            return np.flatnonzero(self._count[:len(self._symbols)])
+        return rows[self._count[rows] > 0]
+
+    def changed_rows(self, since: int) -> np.ndarray:
+        """Rows written after version `since`"""
+        return np.flatnonzero(self._updated[:len(self._symbols)] > since)
+
+    def rows_for(self, symbols: Sequence[str]) -> np.ndarray:
+        """Rows of the known symbols among the given ones"""
+        rows = [self._index.get(symbol) for symbol in symbols]
+        return np.array([row for row in rows if row is not None], dtype=np.int64)
+
+    def snapshot(self, rows: Optional[np.ndarray] = None) -> Dict[str, Dict[str, Any]]:
+        """Latest tick for every symbol (or the given rows) keyed by symbol"""
+        rows = self.populated_rows(rows)
+        if rows.size == 0:
+            return {}
+
+        prices = self._last_price[rows].tolist()
+        volumes = self._last_volume[rows].tolist()
+        changes = self._last_change[rows].tolist()
+        change_percents = self._last_change_percent[rows].tolist()
+        timestamps = self._last_timestamp[rows].tolist()
+        iso_cache: Dict[float, str] = {}
+
+        result = {}
+        for i, row in enumerate(rows.tolist()):
+            ts = timestamps[i]
+            iso = iso_cache.get(ts)
+            if iso is None:
+                iso = iso_cache[ts] = datetime.fromtimestamp(ts).isoformat()
+            symbol = self._symbols[row]
+            result[symbol] = {
+                "symbol": symbol,
+                "price": prices[i],
+                "volume": volumes[i],
+                "timestamp": iso,
+                "change": changes[i],
+                "change_percent": change_percents[i],
+            }
+        return result
+
+    def history(self, symbol: str, limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Up to `limit` most recent ticks for a symbol, oldest first
+
+        Returns views into the ring when the window does not wrap around the
+        end of the buffer; a wrapped window is stitched into a new array.
+        """
+        row = self._index.get(symbol)
+        if row is None:
+            return {name: np.empty(0) for name in ("price", "volume", "change", "change_percent", "timestamp")}
+
+        count = int(self._count[row])
+        n = count if limit is None else max(0, min(limit, count))
+        end = int(self._head[row])
+        start = end - n
+
+        def window(column: np.ndarray) -> np.ndarray:
+            data = column[row]
+            if start >= 0:
+                return data[start:end]
+            return np.concatenate([data[start:], data[:end]])
+
+        return {
+            "price": window(self._price),
+            "volume": window(self._volume),
+            "change": window(self._change),
+            "change_percent": window(self._change_percent),
+            "timestamp": window(self._timestamp),
+        }
@@ -0,0 +1,90 @@
+"""
+Backtest Engine - replays a strategy over a bar history with whole-array operations
+"""
+
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from indicators import SeriesCache
+from strategies import evaluate
+
+SECONDS_PER_YEAR = 365 * 86400
+
+
+def positions(buy: np.ndarray, sell: np.ndarray, hold_bars: int, allow_short: bool = True) -> np.ndarray:
+    """Position held after each bar's close (+1 long, -1 short, 0 flat)
+
+    A signal opens a position at its bar's close for at most `hold_bars`
+    bars, the same window a live signal stays active for. A newer signal
+    replaces it; without shorting, a sell only closes a long.
+    """
+    n = buy.size
+    direction = np.where(buy, 1, np.where(sell, -1 if allow_short else 0, 0)).astype(np.int8)
+    signalled = buy | sell
+    index = np.arange(n)
+    last = np.maximum.accumulate(np.where(signalled, index, -1))
+    held = np.where(last >= 0, direction[np.maximum(last, 0)], 0)
+    return np.where((last >= 0) & (index - last < hold_bars), held, 0).astype(np.int8)
+
+
+def run_backtest(bars: Dict[str, np.ndarray], strategy: str, parameters: Dict[str, Any], bar_seconds: int,
+                 hold_bars: int, allow_short: bool = True, cost_bps: float = 0.0,
+                 equity_points: int = 0, cache: Optional[SeriesCache] = None) -> Dict[str, Any]:
+    """Equity curve and performance statistics for one strategy on one symbol's bars
+
+    Indicators are computed for every bar at once, the strategy's rule gives
+    buy/sell masks, and positions, returns and trades follow from array
+    operations. A position opened at a bar's close earns the next bar's
+    return; `cost_bps` is charged on every change in position. Pass the
+    same `cache` for repeated runs over the same bars to reuse indicators.
+    """
+    if cache is None:
+        cache = SeriesCache(bars["high"], bars["low"], bars["close"], bars["volume"])
+    n = cache.close.size
+    buy, sell, _ = evaluate(strategy, cache.series(parameters), parameters)
+    position = positions(buy, sell, hold_bars, allow_short)
+
+    bar_returns = cache.returns
+    # Position carried into each bar from the previous close
+    exposure = np.concatenate([[0], position[:-1]]).astype(np.float64)
+    turnover = np.abs(np.diff(position.astype(np.float64), prepend=0.0))
+    returns = exposure * bar_returns - turnover * cost_bps / 10000.0
+
+    equity = np.cumprod(1.0 + returns)
+    drawdown = equity / np.maximum.accumulate(equity) - 1.0 if n else equity
+
+    # A trade is a run of bars carrying the same non-zero position
+    active = exposure != 0
+    starts = active & (exposure != np.concatenate([[0.0], exposure[:-1]]))
+    trade_ids = np.cumsum(starts) - 1
+    trade_log_returns = np.bincount(trade_ids[active], weights=np.log1p(returns[active]), minlength=int(starts.sum()))
+    trade_returns = np.expm1(trade_log_returns)
+    wins = trade_returns[trade_returns > 0]
+    losses = trade_returns[trade_returns < 0]
+
+    std = returns[1:].std() if n > 2 else 0.0
+    sharpe = float(returns[1:].mean() / std * np.sqrt(SECONDS_PER_YEAR / bar_seconds)) if std > 0 else 0.0
+    gross_loss = -losses.sum()
+
+    results = {
+        "bars": int(n),
+        "buy_signals": int(buy.sum()),
+        "sell_signals": int(sell.sum()),
+        "total_trades": int(trade_returns.size),
+        "winning_trades": int(wins.size),
+        "win_rate": float(wins.size / trade_returns.size) if trade_returns.size else 0.0,
+        "total_return": float(equity[-1] - 1.0) if n else 0.0,
+        "max_drawdown": float(drawdown.min()) if n else 0.0,
+        "sharpe_ratio": sharpe,
+        "profit_factor": float(wins.sum() / gross_loss) if gross_loss > 0 else None,
+        "exposure": float(active.mean()) if n else 0.0,
+    }
+    if equity_points and n:
+        step = max(1, -(-n // equity_points))
+        keep = np.unique(np.append(np.arange(0, n, step), n - 1))
+        results["equity_curve"] = [
+            {"start": start, "equity": round(value, 6)}
+            for start, value in zip(np.asarray(bars["start"])[keep].tolist(), equity[keep].tolist())
+        ]
+    return results
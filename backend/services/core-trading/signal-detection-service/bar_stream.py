@@ -0,0 +1,115 @@
+"""
+Bar Stream - completed bars pushed by market-data-service over its WebSocket
+"""
+
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import websockets
+
+from market_data import BAR_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Called with (interval, symbols, bar columns) for every bars message, one message at a time
+BarHandler = Callable[[str, List[str], Dict[str, np.ndarray]], Awaitable[None]]
+
+
+def stream_url(base_url: str) -> str:
+    """market-data-service's WebSocket endpoint for an http(s) base URL"""
+    base_url = base_url.rstrip("/")
+    if base_url.startswith("https://"):
+        base_url = "wss://" + base_url[len("https://"):]
+    elif base_url.startswith("http://"):
+        base_url = "ws://" + base_url[len("http://"):]
+    return f"{base_url}/ws/market-data"
+
+
+def parse_bar_message(data: List[Dict]) -> Dict[str, np.ndarray]:
+    """Bar dicts from a bars message to columns"""
+    return {
+        field: np.array([bar[field] for bar in data], dtype=np.int64 if field == "start" else np.float64)
+        for field in BAR_FIELDS
+    }
+
+
+class BarStream:
+    """Subscribes to the bars channel and hands each batch of completed bars to a handler
+
+    Tick updates are unsubscribed on connect, so only one message per
+    interval arrives as bars close. The connection is re-established with
+    exponential backoff; `connected` tells callers whether bars are flowing
+    or they need to fall back to polling.
+    """
+
+    def __init__(self, url: str, intervals: Sequence[str], handler: BarHandler,
+                 symbols: Optional[Sequence[str]] = None, max_backoff: float = 30.0):
+        self.url = url
+        self.intervals = sorted(intervals)
+        self.symbols = list(symbols) if symbols else ["*"]
+        self.handler = handler
+        self.max_backoff = max_backoff
+        self.connected = False
+        self.messages = 0
+        self.bars = 0
+        self.reconnects = 0
+
+    async def run(self):
+        backoff = 1.0
+        while True:
+            try:
+                async with websockets.connect(self.url, max_size=None) as websocket:
+                    await websocket.send(json.dumps({"action": "unsubscribe", "channel": "market_data"}))
+                    await websocket.send(json.dumps({
+                        "action": "subscribe",
+                        "channel": "bars",
+                        "symbols": self.symbols,
+                        "intervals": self.intervals
+                    }))
+                    self.connected = True
+                    backoff = 1.0
+                    logger.info(f"Streaming {', '.join(self.intervals)} bars from {self.url}")
+                    async for message in websocket:
+                        await self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Bar stream disconnected: {e}; retrying in {backoff:.0f}s")
+            finally:
+                self.connected = False
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def _dispatch(self, message):
+        try:
+            payload = json.loads(message)
+        except (TypeError, ValueError):
+            return
+        if not isinstance(payload, dict):
+            return
+        if payload.get("type") == "error":
+            logger.warning(f"Bar stream error: {payload.get('message')}")
+            return
+        if payload.get("type") != "bars" or not payload.get("data"):
+            return
+        data = payload["data"]
+        self.messages += 1
+        self.bars += len(data)
+        try:
+            await self.handler(payload["interval"], [bar["symbol"] for bar in data], parse_bar_message(data))
+        except Exception as e:
+            logger.error(f"Error handling {payload.get('interval')} bars: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "url": self.url,
+            "connected": self.connected,
+            "intervals": self.intervals,
+            "messages": self.messages,
+            "bars": self.bars,
+            "reconnects": self.reconnects,
+        }
@@ -0,0 +1,499 @@
+"""
+Indicator Engine - streaming technical indicators for many symbols at once
+Each new bar updates every indicator in O(1) per symbol
+"""
+
+import math
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_PARAMETERS = {
+    "rsi_period": 14,
+    "fast_period": 12,
+    "slow_period": 26,
+    "signal_period": 9,
+    "bb_period": 20,
+    "bb_std": 2.0,
+    "atr_period": 14,
+    "volume_period": 20,
+}
+
+# Strategy parameter names that mean an indicator parameter under another name
+PARAMETER_ALIASES = {
+    "period": "bb_period",
+    "std_dev": "bb_std",
+}
+
+OUTPUTS = (
+    "close", "rsi", "macd", "macd_signal", "macd_hist", "prev_macd_hist",
+    "bb_middle", "bb_upper", "bb_lower", "bb_width", "prev_bb_width", "bb_width_avg",
+    "atr", "volume_ratio",
+)
+
+
+# Settings that are whole numbers of bars; windows and warm-up grow with them
+PERIOD_SETTINGS = {"rsi_period", "fast_period", "slow_period", "signal_period", "bb_period", "atr_period", "volume_period"}
+MAX_PERIOD = 1000
+MAX_BB_STD = 10.0
+
+
+def setting_value(name: str, value: Any) -> Any:
+    """An indicator setting coerced to its type; raises ValueError if it's not a number in range"""
+    try:
+        number = None if isinstance(value, bool) else float(value)
+    except (TypeError, ValueError):
+        number = None
+    if number is None or not math.isfinite(number):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+    if name in PERIOD_SETTINGS:
+        if number != int(number) or not 1 <= number <= MAX_PERIOD:
+            raise ValueError(f"{name} must be a whole number of bars from 1 to {MAX_PERIOD}, got {value!r}")
+        return int(number)
+    if not 0 < number <= MAX_BB_STD:
+        raise ValueError(f"{name} must be above 0 and at most {MAX_BB_STD}, got {value!r}")
+    return number
+
+
+def indicator_parameters(parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Indicator settings for a strategy's parameters, defaults filled in; raises ValueError on a bad setting"""
+    result = dict(DEFAULT_PARAMETERS)
+    for name, value in (parameters or {}).items():
+        name = PARAMETER_ALIASES.get(name, name)
+        if name in DEFAULT_PARAMETERS:
+            result[name] = setting_value(name, value)
+    return result
+
+
+class IndicatorEngine:
+    """Wilder RSI, EMA MACD, Bollinger Bands and Wilder ATR for a universe of symbols
+
+    State is one array per quantity with a row per symbol, so a bar for
+    every symbol is folded in with a handful of vectorized operations.
+    Only what the recurrences need is kept: running averages, EMAs, the
+    previous close, and for Bollinger a ring of the last `bb_period`
+    closes with their running sum and sum of squares. Values read as NaN
+    until each indicator has seen enough bars.
+    """
+
+    def __init__(self, timeframe: str, parameters: Optional[Dict[str, Any]] = None, capacity: int = 64):
+        self.timeframe = timeframe
+        self.parameters = indicator_parameters(parameters)
+        self._index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self._capacity = capacity
+
+        p = self.parameters
+        self._alpha_fast = 2.0 / (p["fast_period"] + 1)
+        self._alpha_slow = 2.0 / (p["slow_period"] + 1)
+        self._alpha_signal = 2.0 / (p["signal_period"] + 1)
+        self._alpha_volume = 2.0 / (p["volume_period"] + 1)
+        self._alpha_width = 2.0 / (p["bb_period"] + 1)
+
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.last_start = np.full(capacity, -1, dtype=np.int64)
+        self.prev_close = np.zeros(capacity)
+        self.avg_gain = np.zeros(capacity)
+        self.avg_loss = np.zeros(capacity)
+        self.ema_fast = np.zeros(capacity)
+        self.ema_slow = np.zeros(capacity)
+        self.ema_signal = np.zeros(capacity)
+        self.atr_state = np.zeros(capacity)
+        self.volume_ema = np.zeros(capacity)
+        self.width_ema = np.zeros(capacity)
+        self.window = np.zeros((capacity, p["bb_period"]))
+        self.window_head = np.zeros(capacity, dtype=np.int64)
+        self.window_sum = np.zeros(capacity)
+        self.window_sumsq = np.zeros(capacity)
+        self.values = {name: np.full(capacity, np.nan) for name in OUTPUTS}
+        # Bumped whenever a bar is folded in, so readers can cache anything derived from the values
+        self.version = 0
+
+    # Symbol registry
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index
+
+    def row(self, symbol: str) -> Optional[int]:
+        return self._index.get(symbol)
+
+    def register(self, symbols: Sequence[str]) -> np.ndarray:
+        rows = []
+        for symbol in symbols:
+            row = self._index.get(symbol)
+            if row is None:
+                row = self._index[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            rows.append(row)
+        if len(self.symbols) > self._capacity:
+            self._grow(max(len(self.symbols), self._capacity * 2))
+        return np.array(rows, dtype=np.int64)
+
+    def _grow(self, capacity: int):
+        extra = capacity - self._capacity
+        for name in ("count", "last_start", "prev_close", "avg_gain", "avg_loss", "ema_fast", "ema_slow",
+                     "ema_signal", "atr_state", "volume_ema", "width_ema", "window_head",
+                     "window_sum", "window_sumsq"):
+            array = getattr(self, name)
+            fill = -1 if name == "last_start" else 0
+            setattr(self, name, np.concatenate([array, np.full(extra, fill, dtype=array.dtype)]))
+        self.window = np.concatenate([self.window, np.zeros((extra, self.window.shape[1]))])
+        for name, array in self.values.items():
+            self.values[name] = np.concatenate([array, np.full(extra, np.nan)])
+        self._capacity = capacity
+
+    # Updates
+    def update(self, rows: np.ndarray, start: np.ndarray, high: np.ndarray, low: np.ndarray,
+               close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+        """Fold one completed bar per row into every indicator; returns the rows that advanced
+
+        Bars that don't start after the row's last bar are ignored, so
+        feeding overlapping history is harmless. Rows must be unique.
+        """
+        fresh = start > self.last_start[rows]
+        if not fresh.all():
+            rows, start, high, low, close, volume = (a[fresh] for a in (rows, start, high, low, close, volume))
+        if rows.size == 0:
+            return rows
+        p = self.parameters
+        high = high.astype(np.float64)
+        low = low.astype(np.float64)
+        close = close.astype(np.float64)
+        volume = volume.astype(np.float64)
+
+        count = self.count[rows] + 1
+        first = count == 1
+        prev_close = np.where(first, close, self.prev_close[rows])
+        out = self.values
+
+        # Wilder RSI: simple average of the first `rsi_period` changes, then smoothing
+        n = p["rsi_period"]
+        change = close - prev_close
+        gain = np.maximum(change, 0.0)
+        loss = np.maximum(-change, 0.0)
+        changes = count - 1
+        avg_gain = self.avg_gain[rows]
+        avg_loss = self.avg_loss[rows]
+        warming = changes <= n
+        avg_gain = np.where(warming, avg_gain + gain, (avg_gain * (n - 1) + gain) / n)
+        avg_loss = np.where(warming, avg_loss + loss, (avg_loss * (n - 1) + loss) / n)
+        seeded = changes == n
+        avg_gain[seeded] /= n
+        avg_loss[seeded] /= n
+        self.avg_gain[rows] = avg_gain
+        self.avg_loss[rows] = avg_loss
+        rsi = np.where(
+            avg_loss > 0,
+            100.0 - 100.0 / (1.0 + avg_gain / np.where(avg_loss > 0, avg_loss, 1.0)),
+            np.where(avg_gain > 0, 100.0, 50.0)
+        )
+        out["rsi"][rows] = np.where(changes >= n, rsi, np.nan)
+
+        # MACD: EMAs seeded with the first close, signal seeded with the first MACD
+        ema_fast = np.where(first, close, self.ema_fast[rows] + self._alpha_fast * (close - self.ema_fast[rows]))
+        ema_slow = np.where(first, close, self.ema_slow[rows] + self._alpha_slow * (close - self.ema_slow[rows]))
+        macd = ema_fast - ema_slow
+        signal = np.where(first, macd, self.ema_signal[rows] + self._alpha_signal * (macd - self.ema_signal[rows]))
+        self.ema_fast[rows] = ema_fast
+        self.ema_slow[rows] = ema_slow
+        self.ema_signal[rows] = signal
+        macd_ready = count >= p["slow_period"]
+        signal_ready = count >= p["slow_period"] + p["signal_period"] - 1
+        out["prev_macd_hist"][rows] = out["macd_hist"][rows]
+        out["macd"][rows] = np.where(macd_ready, macd, np.nan)
+        out["macd_signal"][rows] = np.where(signal_ready, signal, np.nan)
+        out["macd_hist"][rows] = np.where(signal_ready, macd - signal, np.nan)
+
+        # Bollinger: running sum and sum of squares over a ring of the last closes
+        m = p["bb_period"]
+        head = self.window_head[rows]
+        oldest = self.window[rows, head]
+        full = count > m
+        window_sum = self.window_sum[rows] + close - np.where(full, oldest, 0.0)
+        window_sumsq = self.window_sumsq[rows] + close * close - np.where(full, oldest * oldest, 0.0)
+        self.window[rows, head] = close
+        self.window_head[rows] = (head + 1) % m
+        self.window_sum[rows] = window_sum
+        self.window_sumsq[rows] = window_sumsq
+        size = np.minimum(count, m)
+        mean = window_sum / size
+        std = np.sqrt(np.maximum(window_sumsq / size - mean * mean, 0.0))
+        bb_ready = count >= m
+        upper = mean + p["bb_std"] * std
+        lower = mean - p["bb_std"] * std
+        width = np.where(mean != 0, (upper - lower) / np.where(mean != 0, mean, 1.0), 0.0)
+        width_ema = np.where(count <= m, width, self.width_ema[rows] + self._alpha_width * (width - self.width_ema[rows]))
+        self.width_ema[rows] = width_ema
+        out["prev_bb_width"][rows] = out["bb_width"][rows]
+        out["bb_middle"][rows] = np.where(bb_ready, mean, np.nan)
+        out["bb_upper"][rows] = np.where(bb_ready, upper, np.nan)
+        out["bb_lower"][rows] = np.where(bb_ready, lower, np.nan)
+        out["bb_width"][rows] = np.where(bb_ready, width, np.nan)
+        out["bb_width_avg"][rows] = np.where(bb_ready, width_ema, np.nan)
+
+        # Wilder ATR over true range, seeded with the mean of the first `atr_period` ranges
+        k = p["atr_period"]
+        true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+        atr = self.atr_state[rows]
+        atr = np.where(count <= k, atr + true_range, (atr * (k - 1) + true_range) / k)
+        atr_seeded = count == k
+        atr[atr_seeded] /= k
+        self.atr_state[rows] = atr
+        out["atr"][rows] = np.where(count >= k, atr, np.nan)
+
+        # Volume relative to its EMA before this bar
+        volume_ema = self.volume_ema[rows]
+        out["volume_ratio"][rows] = np.where(first | (volume_ema <= 0), np.nan, volume / np.where(volume_ema > 0, volume_ema, 1.0))
+        self.volume_ema[rows] = np.where(first, volume, volume_ema + self._alpha_volume * (volume - volume_ema))
+
+        out["close"][rows] = close
+        self.prev_close[rows] = close
+        self.count[rows] = count
+        self.last_start[rows] = start
+        self.version += 1
+        return rows
+
+    def warm_up(self, symbol: str, bars: Dict[str, np.ndarray]) -> int:
+        """Feed a symbol's bar history oldest first; returns how many bars were new"""
+        row = self.register([symbol])
+        fed = 0
+        for i in range(bars["close"].size):
+            fed += self.update(
+                row, bars["start"][i:i + 1], bars["high"][i:i + 1], bars["low"][i:i + 1],
+                bars["close"][i:i + 1], bars["volume"][i:i + 1]
+            ).size
+        return fed
+
+    def warm_up_stacked(self, rows: np.ndarray, bars: Dict[str, np.ndarray]):
+        """Feed many rows' histories at once, given as (rows, bars) matrices aligned on the newest bar
+
+        Slots with a negative start are padding. Each step folds one bar
+        into every row that has one, so a whole universe warms up in as
+        many vectorized updates as its longest history has bars.
+        """
+        start = bars["start"]
+        for t in range(start.shape[1]):
+            present = start[:, t] >= 0
+            if present.any():
+                self.update(rows[present], start[present, t], bars["high"][present, t], bars["low"][present, t],
+                            bars["close"][present, t], bars["volume"][present, t])
+
+    # Reads
+    def ready(self, row: int) -> bool:
+        """True once every indicator has a value for the row"""
+        return all(not np.isnan(self.values[name][row]) for name in ("rsi", "macd_hist", "bb_middle", "atr"))
+
+    def latest(self, symbol: str) -> Optional[Dict[str, Optional[float]]]:
+        """Current indicator values for a symbol (None where still warming up)"""
+        row = self._index.get(symbol)
+        if row is None:
+            return None
+        result = {name: float(values[row]) for name, values in self.values.items()}
+        result = {name: (None if np.isnan(value) else value) for name, value in result.items()}
+        result["bars"] = int(self.count[row])
+        return result
+
+    def momentum(self, rows: np.ndarray) -> np.ndarray:
+        """Return from the oldest close in the Bollinger window to the latest (bb_period - 1 bars)
+
+        NaN until the window is full.
+        """
+        full = self.count[rows] >= self.parameters["bb_period"]
+        oldest = self.window[rows, self.window_head[rows]]
+        close = self.values["close"][rows]
+        return np.where(full & (oldest > 0), close / np.where(oldest > 0, oldest, 1.0) - 1.0, np.nan)
+
+    def columns(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """Indicator values for the given rows, one array per output"""
+        return {name: values[rows] for name, values in self.values.items()}
+
+
+def linear_filter(x: np.ndarray, decay: float, initial: float = 0.0) -> np.ndarray:
+    """y[t] = decay * y[t-1] + x[t] with y[-1] = initial, without a per-element loop
+
+    The series is cut into blocks short enough that decay ** -block stays
+    well inside float64 precision. Within a block the recurrence has the
+    closed form decay**j * cumsum(x[k] * decay**-k), computed for all
+    blocks at once; only the carry between blocks is sequential.
+    """
+    n = x.size
+    if n == 0:
+        return x.astype(np.float64)
+    if decay <= 0:
+        return x.astype(np.float64)
+    block = n if decay >= 1 else int(max(1, min(n, np.log(1e6) / -np.log(decay))))
+    count = -(-n // block)
+    padded = np.zeros(count * block)
+    padded[:n] = x
+    blocks = padded.reshape(count, block)
+    steps = np.arange(block)
+    local = np.cumsum(blocks * decay ** -steps, axis=1) * decay ** steps
+
+    # State entering each block, carried from the end of the previous one
+    tail = decay ** block
+    ends = local[:, -1].tolist()
+    carries = np.empty(count)
+    carry = float(initial)
+    for b in range(count):
+        carries[b] = carry
+        carry = tail * carry + ends[b]
+    return (local + carries[:, None] * decay ** (steps + 1)).ravel()[:n]
+
+
+def _ema(x: np.ndarray, period: int) -> np.ndarray:
+    """EMA seeded with the first value"""
+    alpha = 2.0 / (period + 1)
+    result = np.empty(x.size)
+    if x.size:
+        result[0] = x[0]
+        result[1:] = linear_filter(alpha * x[1:], 1.0 - alpha, x[0])
+    return result
+
+
+def _wilder(x: np.ndarray, period: int, first: int) -> np.ndarray:
+    """Wilder average of x, NaN before index first + period - 1 and seeded with the mean up to there"""
+    result = np.full(x.size, np.nan)
+    seed_at = first + period - 1
+    if x.size > seed_at:
+        seed = x[first:seed_at + 1].mean()
+        result[seed_at] = seed
+        result[seed_at + 1:] = linear_filter(x[seed_at + 1:] / period, (period - 1) / period, seed)
+    return result
+
+
+def _shift(x: np.ndarray) -> np.ndarray:
+    return np.concatenate([[np.nan], x[:-1]]) if x.size else x
+
+
+class SeriesCache:
+    """Indicator building blocks for one bar history, each computed once per distinct setting
+
+    EMAs, Wilder averages and rolling windows are memoized by period, so
+    many indicator configurations over the same bars (e.g. a parameter
+    sweep) only pay for the periods they add.
+    """
+
+    def __init__(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+        self.index = np.arange(self.close.size)
+        self._memo: Dict[Tuple, Any] = {}
+
+    def _cached(self, key: Tuple, build):
+        value = self._memo.get(key)
+        if value is None:
+            value = self._memo[key] = build()
+        return value
+
+    @property
+    def returns(self) -> np.ndarray:
+        """Close-to-close return of each bar (0 for the first)"""
+        def build():
+            result = np.zeros(self.close.size)
+            result[1:] = self.close[1:] / self.close[:-1] - 1.0
+            return result
+        return self._cached(("returns",), build)
+
+    def ema(self, field: str, period: int) -> np.ndarray:
+        return self._cached(("ema", field, period), lambda: _ema(getattr(self, field), period))
+
+    def rsi(self, period: int) -> np.ndarray:
+        def build():
+            change = np.diff(self.close, prepend=self.close[:1])
+            avg_gain = _wilder(np.maximum(change, 0.0), period, 1)
+            avg_loss = _wilder(np.maximum(-change, 0.0), period, 1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rsi = np.where(avg_loss > 0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss),
+                               np.where(avg_gain > 0, 100.0, 50.0))
+            return np.where(np.isnan(avg_gain), np.nan, rsi)
+        return self._cached(("rsi", period), build)
+
+    def macd(self, fast: int, slow: int, signal: int) -> Dict[str, np.ndarray]:
+        def build():
+            macd = self.ema("close", fast) - self.ema("close", slow)
+            signal_line = _ema(macd, signal)
+            index = self.index
+            ready = index >= slow + signal - 2
+            hist = np.where(ready, macd - signal_line, np.nan)
+            return {
+                "macd": np.where(index >= slow - 1, macd, np.nan),
+                "macd_signal": np.where(ready, signal_line, np.nan),
+                "macd_hist": hist,
+                "prev_macd_hist": _shift(hist),
+            }
+        return self._cached(("macd", fast, slow, signal), build)
+
+    def window(self, period: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rolling mean and population std of close over full windows"""
+        def build():
+            if self.close.size < period:
+                return np.zeros(0), np.zeros(0)
+            windows = np.lib.stride_tricks.sliding_window_view(self.close, period)
+            return windows.mean(axis=1), windows.std(axis=1)
+        return self._cached(("window", period), build)
+
+    def bollinger(self, period: int, width: float) -> Dict[str, np.ndarray]:
+        def build():
+            n = self.close.size
+            out = {name: np.full(n, np.nan) for name in ("bb_middle", "bb_upper", "bb_lower", "bb_width", "bb_width_avg")}
+            mean, std = self.window(period)
+            if mean.size:
+                upper = mean + width * std
+                lower = mean - width * std
+                bandwidth = np.where(mean != 0, (upper - lower) / np.where(mean != 0, mean, 1.0), 0.0)
+                out["bb_middle"][period - 1:] = mean
+                out["bb_upper"][period - 1:] = upper
+                out["bb_lower"][period - 1:] = lower
+                out["bb_width"][period - 1:] = bandwidth
+                out["bb_width_avg"][period - 1:] = _ema(bandwidth, period)
+            out["prev_bb_width"] = _shift(out["bb_width"])
+            return out
+        return self._cached(("bollinger", period, width), build)
+
+    def atr(self, period: int) -> np.ndarray:
+        def build():
+            close = self.close
+            prev_close = np.concatenate([close[:1], close[:-1]])
+            true_range = np.maximum(self.high - self.low,
+                                    np.maximum(np.abs(self.high - prev_close), np.abs(self.low - prev_close)))
+            return _wilder(true_range, period, 0)
+        return self._cached(("atr", period), build)
+
+    def volume_ratio(self, period: int) -> np.ndarray:
+        def build():
+            previous = _shift(self.ema("volume", period))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.where(previous > 0, self.volume / previous, np.nan)
+        return self._cached(("volume_ratio", period), build)
+
+    def series(self, parameters: Optional[Dict[str, Any]] = None) -> Dict[str, np.ndarray]:
+        """Every IndicatorEngine output, one value per bar, for the given settings
+
+        The values match what the streaming engine reports after each bar.
+        """
+        p = indicator_parameters(parameters)
+        out = {"close": self.close, "rsi": self.rsi(p["rsi_period"])}
+        out.update(self.macd(p["fast_period"], p["slow_period"], p["signal_period"]))
+        out.update(self.bollinger(p["bb_period"], p["bb_std"]))
+        out["atr"] = self.atr(p["atr_period"])
+        out["volume_ratio"] = self.volume_ratio(p["volume_period"])
+        return out
+
+
+class IndicatorRegistry:
+    """One engine per timeframe and distinct indicator configuration"""
+
+    def __init__(self):
+        self.engines: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], IndicatorEngine] = {}
+
+    def engine(self, timeframe: str, parameters: Optional[Dict[str, Any]] = None) -> IndicatorEngine:
+        settings = indicator_parameters(parameters)
+        key = (timeframe, tuple(sorted(settings.items())))
+        engine = self.engines.get(key)
+        if engine is None:
+            engine = self.engines[key] = IndicatorEngine(timeframe, settings)
+        return engine
@@ -4,16 +4,44 @@ Detects trading signals and opportunities
 """
 
 import asyncio
+import json
 import logging
+import multiprocessing
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
-import random
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 
+import httpx
+import numpy as np
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+# Add path to shared modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from shared.batch_writer import BatchWriter
+from shared.database import get_db, trading_signals_page, TradingSignal as TradingSignalRecord
+from shared.tick_archive import TickArchive
+
+from backtest import run_backtest
+from bar_stream import BarStream, stream_url
+from indicators import DEFAULT_PARAMETERS, PARAMETER_ALIASES, IndicatorEngine, IndicatorRegistry, indicator_parameters
+from market_data import TIMEFRAMES, MarketDataClient
+from optimizer import METRICS, combinations, expand_values, optimize_shard, rank, shard
+from persistence import SIGNAL_ID_PREFIX, last_signal_number, load_active_signals, signal_row, write_signals
+from resample import BASE_TIMEFRAME, BarCache
+from rules import RuleError
+from scanner import scan_shard, stack_bars
+from screener import METRICS as SCREENER_METRICS, Screener, parse_weights
+from signal_feed import SignalFeed, SignalSubscriber
+from signal_store import SignalStore
+from strategies import EXPRESSION_PARAMETERS, evaluate, has_rule, pinned_settings, prepare_parameters, rule_parameters
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -67,11 +95,91 @@ class MarketAnalysis(BaseModel):
     bollinger_bands: Dict[str, float]
     analysis_time: datetime
 
+class ScanRequest(BaseModel):
+    symbols: Optional[List[str]] = None  # None = tracked symbols, ["*"] = every market data symbol
+    strategies: Optional[List[str]] = None  # None = every enabled strategy
+    stream: bool = False  # NDJSON, one line per completed shard
+
+class OptimizeRequest(BaseModel):
+    symbol: str
+    start_date: str
+    end_date: str
+    # Candidate values per parameter: a list, or {"min": .., "max": .., "step": ..}
+    parameters: Dict[str, Any]
+    search: str = "grid"  # 'grid' or 'random'
+    samples: int = 100  # parameter sets tried by random search
+    metric: str = "sharpe_ratio"
+    top: int = 10
+    timeframe: Optional[str] = None
+    hold_bars: Optional[int] = None
+    allow_short: bool = True
+    cost_bps: float = 0.0
+    seed: Optional[int] = None
+
 # In-memory storage for demo
-signals_db: Dict[str, TradingSignal] = {}
+# Expired signals stay queryable with active_only=false for SIGNAL_RETENTION seconds, then are evicted
+SIGNAL_RETENTION = float(os.getenv("SIGNAL_RETENTION", 86400))
+signal_store = SignalStore(retention=timedelta(seconds=SIGNAL_RETENTION))
+
+# Every generated signal is also written to trading_signals, which keeps the full history
+PERSIST_SIGNALS = os.getenv("PERSIST_SIGNALS", "true").lower() == "true"
+signal_writer = BatchWriter(
+    write_signals,
+    name="signal-writer",
+    batch_size=int(os.getenv("WRITER_BATCH_SIZE", 500)),
+    flush_interval=float(os.getenv("WRITER_FLUSH_INTERVAL", 1)),
+    max_pending=int(os.getenv("WRITER_MAX_PENDING", 100000)),
+    max_attempts=int(os.getenv("WRITER_MAX_ATTEMPTS", 8))
+)
 strategies_db: Dict[str, SignalStrategy] = {}
 signal_counter = 1000
 
+# Indicators are computed from market-data-service bars
+MARKET_DATA_URL = os.getenv("MARKET_DATA_URL", "http://localhost:8140")
+INDICATOR_WARMUP_BARS = int(os.getenv("INDICATOR_WARMUP_BARS", 200))
+SIGNAL_REFRESH_INTERVAL = float(os.getenv("SIGNAL_REFRESH_INTERVAL", 60))
+# Bars a signal stays active for
+SIGNAL_TTL_BARS = int(os.getenv("SIGNAL_TTL_BARS", 4))
+# Symbols evaluated on every refresh; symbols scanned or analysed are added as they come
+tracked_symbols = {s.strip().upper() for s in os.getenv("SIGNAL_SYMBOLS", "").split(",") if s.strip()}
+indicators = IndicatorRegistry()
+market_data: Optional[MarketDataClient] = None
+# Bars for every timeframe, shared by all engines and extended from streamed 1m bars
+BAR_CACHE_SYMBOLS = int(os.getenv("BAR_CACHE_SYMBOLS", 2000))
+bar_cache: Optional[BarCache] = None
+# Last bar start each (strategy, symbol) was evaluated on, so a bar signals at most once
+evaluated_bars: Dict[Tuple[str, str], int] = {}
+refresh_task: Optional[asyncio.Task] = None
+
+# Strategies run as market-data-service pushes completed bars; polling only covers stream outages
+BAR_STREAM_ENABLED = os.getenv("SIGNAL_BAR_STREAM", "true").lower() == "true"
+MARKET_DATA_WS_URL = os.getenv("MARKET_DATA_WS_URL", stream_url(MARKET_DATA_URL))
+bar_stream: Optional[BarStream] = None
+bar_stream_task: Optional[asyncio.Task] = None
+# New signals are pushed to /ws/signals subscribers
+signal_feed = SignalFeed(
+    queue_size=int(os.getenv("WS_SEND_QUEUE_SIZE", 256)),
+    max_dropped=int(os.getenv("WS_MAX_DROPPED_FRAMES", 64))
+)
+
+# Universe scans: symbols per worker task, worker processes (0 = threads in this process), concurrent bar fetches
+SCAN_SHARD_SIZE = int(os.getenv("SCAN_SHARD_SIZE", 250))
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", os.cpu_count() or 1))
+SCAN_FETCH_CONCURRENCY = int(os.getenv("SCAN_FETCH_CONCURRENCY", 32))
+scan_pool: Optional[ProcessPoolExecutor] = None
+# Largest parameter sweep a single optimization request may run
+OPTIMIZE_MAX_COMBINATIONS = int(os.getenv("OPTIMIZE_MAX_COMBINATIONS", 10000))
+
+# Screener rankings per timeframe, over engines with default indicator settings
+SCREENER_MAX_K = int(os.getenv("SCREENER_MAX_K", 500))
+screeners: Dict[str, Screener] = {}
+# Latest bar each (timeframe, symbol) was last caught up for, so symbols without data aren't refetched every request
+caught_up: Dict[Tuple[str, str], int] = {}
+
+# Backtests read bars straight from market-data-service's tick archive when it is mounted here
+TICK_ARCHIVE_DIR = os.getenv("TICK_ARCHIVE_DIR", "")
+tick_archive = TickArchive(TICK_ARCHIVE_DIR) if TICK_ARCHIVE_DIR and os.path.isdir(TICK_ARCHIVE_DIR) else None
+
 # Initialize demo strategies
 def init_demo_strategies():
     strategies_db["rsi_oversold"] = SignalStrategy(
@@ -100,126 +208,570 @@ def init_demo_strategies():
 
 init_demo_strategies()
 
-def generate_mock_signal(symbol: str) -> TradingSignal:
-    """Generate a mock trading signal"""
+def next_signal_id() -> str:
     global signal_counter
-    
-    signal_id = f"SIG_{signal_counter:06d}"
+    signal_id = f"{SIGNAL_ID_PREFIX}{signal_counter:06d}"
     signal_counter += 1
-    
-    strategies = list(strategies_db.keys())
-    strategy = random.choice(strategies)
-    signal_types = ["buy", "sell", "hold"]
-    signal_type = random.choice(signal_types)
-    
-    # Generate mock price and levels
-    base_price = random.uniform(100, 1000)
-    
+    return signal_id
+
+def rounded(values: Dict[str, Optional[float]]) -> Dict[str, Any]:
+    return {name: (round(value, 4) if isinstance(value, float) else value) for name, value in values.items()}
+
+def build_signal(strategy_key: str, strategy: SignalStrategy, symbol: str, signal_type: str,
+                 confidence: float, values: Dict[str, Optional[float]]) -> TradingSignal:
+    """A signal at the bar's close, with target and stop a multiple of ATR away"""
+    close = values["close"]
+    atr = values["atr"] or 0.0
+    target = atr * float(strategy.parameters.get("target_atr", 2.0))
+    stop = atr * float(strategy.parameters.get("stop_atr", 1.5))
+    direction = 1 if signal_type == "buy" else -1
+    now = datetime.now()
     return TradingSignal(
-        id=signal_id,
+        id=next_signal_id(),
         symbol=symbol,
         signal_type=signal_type,
-        strategy=strategy,
-        confidence=random.uniform(0.6, 0.95),
-        price_target=base_price * random.uniform(1.02, 1.15) if signal_type == "buy" else base_price * random.uniform(0.85, 0.98),
-        stop_loss=base_price * random.uniform(0.92, 0.98) if signal_type == "buy" else base_price * random.uniform(1.02, 1.08),
-        timeframe=random.choice(["5m", "15m", "1h", "4h", "1d"]),
-        indicators={
-            "rsi": random.uniform(20, 80),
-            "macd": random.uniform(-2, 2),
-            "bb_position": random.uniform(0, 1),
-            "volume_ratio": random.uniform(0.5, 2.0)
-        },
-        created_at=datetime.now(),
-        expires_at=datetime.now() + timedelta(hours=random.randint(1, 24))
+        strategy=strategy_key,
+        confidence=round(float(confidence), 4),
+        price_target=round(close + direction * target, 4) if atr else None,
+        stop_loss=round(close - direction * stop, 4) if atr else None,
+        timeframe=strategy.timeframe,
+        indicators=rounded(values),
+        created_at=now,
+        expires_at=now + timedelta(seconds=TIMEFRAMES[strategy.timeframe][1] * SIGNAL_TTL_BARS)
     )
 
+async def record_signals(signals: List[TradingSignal]):
+    """Keep new signals in memory, push them to subscribers and queue them for the database"""
+    for signal in signals:
+        signal_store.add(signal)
+    if signal_feed.subscribers and signals:
+        signal_feed.publish([signal.model_dump(mode="json") for signal in signals])
+    if PERSIST_SIGNALS and signals:
+        # Never waits on the database; if it falls too far behind, the oldest unwritten rows are shed
+        signal_writer.offer_many(signal_row(signal) for signal in signals)
+
+def signal_from_record(record: TradingSignalRecord) -> TradingSignal:
+    return TradingSignal(
+        id=record.id,
+        symbol=record.symbol,
+        signal_type=record.signal_type,
+        strategy=record.strategy,
+        confidence=record.confidence,
+        price_target=record.price_target,
+        stop_loss=record.stop_loss,
+        timeframe=record.timeframe,
+        indicators=record.indicators or {},
+        created_at=record.created_at,
+        expires_at=record.expires_at
+    )
+
+async def restore_signals():
+    """Reload still-active signals and continue the id sequence after a restart"""
+    global signal_counter
+    records = await asyncio.to_thread(load_active_signals, datetime.now())
+    for record in records:
+        signal_store.add(signal_from_record(record))
+    signal_counter = max(signal_counter, await asyncio.to_thread(last_signal_number) + 1)
+    logger.info(f"Restored {len(records)} active signals")
+
+async def sync_bars(engine: IndicatorEngine, symbol: str) -> int:
+    """Feed the engine every bar completed since it last saw the symbol; returns how many were new"""
+    row = engine.row(symbol)
+    since = int(engine.last_start[row]) if row is not None and engine.count[row] else None
+    try:
+        bars = await bar_cache.bars(symbol, engine.timeframe, INDICATOR_WARMUP_BARS, since)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Market data unavailable: {e}")
+    return engine.warm_up(symbol, bars)
+
+async def sync_symbols(engine: IndicatorEngine, symbols: List[str]):
+    """Catch many symbols up with a bounded number of requests in flight, skipping any that fail
+    
+    Symbols the engine has no bars for yet are warmed up together, one
+    vectorized update per bar rather than per symbol and bar.
+    """
+    rows = engine.register(symbols)
+    cold = [symbol for symbol, count in zip(symbols, engine.count[rows].tolist()) if count == 0]
+    if cold:
+        errors: Dict[str, str] = {}
+        histories = await fetch_histories(cold, engine.timeframe, errors)
+        for symbol, error in errors.items():
+            logger.warning(f"Skipping {symbol}: {error}")
+        names = list(histories)
+        if names:
+            engine.warm_up_stacked(engine.register(names), stack_bars([histories[name] for name in names]))
+        cold = set(cold)
+        symbols = [symbol for symbol in symbols if symbol not in cold]
+    semaphore = asyncio.Semaphore(SCAN_FETCH_CONCURRENCY)
+    
+    async def sync(symbol: str):
+        async with semaphore:
+            try:
+                await sync_bars(engine, symbol)
+            except HTTPException as e:
+                logger.warning(f"Skipping {symbol}: {e.detail}")
+    
+    await asyncio.gather(*(sync(symbol) for symbol in symbols))
+
+def strategy_engine(strategy: SignalStrategy) -> IndicatorEngine:
+    return indicators.engine(strategy.timeframe, strategy.parameters)
+
+def evaluate_rows(key: str, strategy: SignalStrategy, engine: IndicatorEngine, rows: np.ndarray) -> List[TradingSignal]:
+    """Run one strategy on the latest bar of many engine rows at once; a bar signals at most once"""
+    rows = rows[engine.count[rows] > 0]
+    if rows.size == 0:
+        return []
+    buy, sell, confidence = evaluate(key, engine.columns(rows), strategy.parameters)
+    new_signals = []
+    for i in np.flatnonzero(buy | sell).tolist():
+        row = int(rows[i])
+        symbol = engine.symbols[row]
+        bar_start = int(engine.last_start[row])
+        if evaluated_bars.get((key, symbol)) == bar_start:
+            continue
+        evaluated_bars[(key, symbol)] = bar_start
+        signal_type = "buy" if buy[i] else "sell"
+        new_signals.append(build_signal(key, strategy, symbol, signal_type, confidence[i], engine.latest(symbol)))
+    return new_signals
+
+async def evaluate_symbol(symbol: str) -> List[TradingSignal]:
+    """Run every enabled strategy on the symbol's latest completed bar, once per bar"""
+    new_signals = []
+    for key, strategy in list(strategies_db.items()):
+        if not strategy.enabled or not has_rule(key, strategy.parameters) or strategy.timeframe not in TIMEFRAMES:
+            continue
+        engine = strategy_engine(strategy)
+        await sync_bars(engine, symbol)
+        row = engine.row(symbol)
+        if row is not None:
+            new_signals.extend(evaluate_rows(key, strategy, engine, np.array([row])))
+    await record_signals(new_signals)
+    return new_signals
+
+async def on_bars(interval: str, symbols: List[str], bars: Dict[str, np.ndarray]):
+    """Derive every timeframe from streamed 1m bars and run strategies on the bars that closed
+    
+    The shared bar cache turns each 1m bar into the bars it completes on
+    every cached timeframe. A completed bar that directly follows an
+    engine's last bar is folded in for all its symbols at once; symbols
+    new to the engine or the cache, that missed bars (e.g. across a
+    reconnect) or whose bar began before the cache had them catch up
+    through the cache instead, which seeds it for the closes that follow.
+    Only tracked symbols are evaluated.
+    """
+    if interval != BASE_TIMEFRAME:
+        return
+    sealed = bar_cache.ingest(symbols, bars)
+    streamed = [symbol for symbol in symbols if symbol in tracked_symbols]
+    if not streamed:
+        return
+    base_end = int(bars["start"].max()) + TIMEFRAMES[BASE_TIMEFRAME][1]
+    
+    plans = scan_plans(None)
+    # Keep screened timeframes current too, with no strategies to run
+    default_settings = tuple(sorted(indicator_parameters().items()))
+    for timeframe in screeners:
+        plans.setdefault((timeframe, default_settings), [])
+    
+    new_signals = []
+    for (timeframe, settings), strategies in plans.items():
+        seconds = TIMEFRAMES[timeframe][1]
+        batches = sealed.get(timeframe, [])
+        lagging = []
+        if base_end % seconds == 0:
+            # Symbols whose bar closes now but that the cache didn't seal it for
+            # (not cached on this timeframe yet, or cached mid-bar) catch up through it
+            covered = {name for names, _ in batches for name in names}
+            lagging = [symbol for symbol in streamed if symbol not in covered]
+        if not batches and not lagging:
+            continue
+        engine = indicators.engine(timeframe, dict(settings))
+        touched = list(lagging)
+        for names, columns in batches:
+            tracked = np.array([name in tracked_symbols for name in names], dtype=bool)
+            if not tracked.any():
+                continue
+            names = [name for name, keep in zip(names, tracked) if keep]
+            columns = {field: column[tracked] for field, column in columns.items()}
+            rows = engine.register(names)
+            follows = (engine.count[rows] > 0) & (engine.last_start[rows] == columns["start"] - seconds)
+            if follows.any():
+                engine.update(rows[follows], *(columns[field][follows] for field in ("start", "high", "low", "close", "volume")))
+            lagging.extend(name for name, ok in zip(names, follows) if not ok)
+            touched.extend(names)
+        if lagging:
+            await sync_symbols(engine, lagging)
+        if not touched:
+            continue
+        rows = engine.register(touched)
+        # Evaluate the rows whose newest bar is the one closing with this 1m bar
+        current = np.unique(rows[engine.last_start[rows] == base_end - seconds])
+        for key, _ in strategies:
+            new_signals.extend(evaluate_rows(key, strategies_db[key], engine, current))
+    if new_signals:
+        logger.info(f"Generated {len(new_signals)} signals on bar close")
+    await record_signals(new_signals)
+
+async def scan_symbols(requested: Optional[List[str]]) -> List[str]:
+    if requested is None:
+        return sorted(tracked_symbols)
+    if "*" in requested:
+        try:
+            return await market_data.symbols()
+        except httpx.HTTPError as e:
+            raise HTTPException(status_code=502, detail=f"Market data unavailable: {e}")
+    return sorted({symbol.upper() for symbol in requested})
+
+def scan_plans(requested: Optional[List[str]]) -> Dict[Tuple[str, Tuple], List[Tuple[str, Dict[str, Any]]]]:
+    """Strategies to scan grouped by timeframe and indicator settings, so each group is computed once"""
+    if requested is None:
+        keys = [key for key, strategy in strategies_db.items() if strategy.enabled]
+    else:
+        unknown = [key for key in requested if key not in strategies_db]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Strategy not found: {', '.join(unknown)}")
+        keys = requested
+    plans: Dict[Tuple[str, Tuple], List[Tuple[str, Dict[str, Any]]]] = {}
+    for key in keys:
+        strategy = strategies_db[key]
+        if not has_rule(key, strategy.parameters) or strategy.timeframe not in TIMEFRAMES:
+            continue
+        settings = tuple(sorted(indicator_parameters(strategy.parameters).items()))
+        plans.setdefault((strategy.timeframe, settings), []).append((key, strategy.parameters))
+    return plans
+
+async def fetch_histories(symbols: List[str], timeframe: str, errors: Dict[str, str],
+                          store: bool = True) -> Dict[str, Dict[str, np.ndarray]]:
+    """Bar histories for many symbols with a bounded number of requests in flight
+    
+    With store=False symbols that aren't cached yet are read without being added to the bar cache.
+    """
+    semaphore = asyncio.Semaphore(SCAN_FETCH_CONCURRENCY)
+    
+    async def fetch(symbol: str):
+        async with semaphore:
+            try:
+                return symbol, await bar_cache.bars(symbol, timeframe, INDICATOR_WARMUP_BARS, store=store)
+            except httpx.HTTPError as e:
+                errors[symbol] = f"Market data unavailable: {e}"
+                return symbol, None
+    
+    results = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+    return {symbol: bars for symbol, bars in results if bars is not None and bars["close"].size}
+
+def get_scan_pool() -> Optional[ProcessPoolExecutor]:
+    """Worker processes shared by universe scans and parameter sweeps"""
+    global scan_pool
+    if scan_pool is None and SCAN_WORKERS > 0:
+        # Spawned workers don't inherit the event loop or client connections
+        scan_pool = ProcessPoolExecutor(max_workers=SCAN_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return scan_pool
+
+async def run_shard(timeframe: str, settings: Tuple, strategies: List[Tuple[str, Dict[str, Any]]],
+                    symbols: List[str], bars: Dict[str, np.ndarray]) -> Tuple[List[str], List[Dict[str, Any]]]:
+    pool = get_scan_pool()
+    args = (timeframe, dict(settings), strategies, symbols, bars)
+    if pool is None:
+        hits = await asyncio.to_thread(scan_shard, *args)
+    else:
+        hits = await asyncio.get_running_loop().run_in_executor(pool, scan_shard, *args)
+    return symbols, hits
+
+async def run_scan(symbols: List[str], plans: Dict[Tuple[str, Tuple], List[Tuple[str, Dict[str, Any]]]],
+                   errors: Dict[str, str]) -> AsyncIterator[Tuple[List[str], List[TradingSignal]]]:
+    """Signals per shard as shards complete; each symbol's bars are fetched once per timeframe"""
+    histories: Dict[str, Dict[str, Dict[str, np.ndarray]]] = {}
+    tasks = []
+    for (timeframe, settings), strategies in plans.items():
+        if timeframe not in histories:
+            # One-off universe scans read through the bar cache without filling it
+            histories[timeframe] = await fetch_histories(symbols, timeframe, errors, store=False)
+        bars = histories[timeframe]
+        names = list(bars)
+        for i in range(0, len(names), SCAN_SHARD_SIZE):
+            names_chunk = names[i:i + SCAN_SHARD_SIZE]
+            tasks.append(asyncio.create_task(
+                run_shard(timeframe, settings, strategies, names_chunk, stack_bars([bars[symbol] for symbol in names_chunk]))
+            ))
+    
+    try:
+        for task in asyncio.as_completed(tasks):
+            names_chunk, hits = await task
+            new_signals = []
+            for hit in hits:
+                key, symbol = hit["strategy"], hit["symbol"]
+                if evaluated_bars.get((key, symbol)) == hit["bar_start"]:
+                    continue
+                evaluated_bars[(key, symbol)] = hit["bar_start"]
+                signal = build_signal(key, strategies_db[key], symbol, hit["signal_type"], hit["confidence"], hit["indicators"])
+                new_signals.append(signal)
+            await record_signals(new_signals)
+            yield names_chunk, new_signals
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def refresh_signals():
+    """Evaluate tracked symbols by polling whenever bars aren't being streamed"""
+    while True:
+        streaming = bar_stream is not None and bar_stream.connected
+        for symbol in ([] if streaming else sorted(tracked_symbols)):
+            try:
+                signals = await evaluate_symbol(symbol)
+                if signals:
+                    logger.info(f"Generated {len(signals)} signals for {symbol}")
+            except HTTPException as e:
+                logger.warning(f"Skipping {symbol}: {e.detail}")
+            except Exception as e:
+                logger.error(f"Error evaluating {symbol}: {e}")
+        signal_store.evict_expired()
+        await asyncio.sleep(SIGNAL_REFRESH_INTERVAL)
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "signal-detection-service"}
+    return {
+        "status": "healthy",
+        "service": "signal-detection-service",
+        "tracked_symbols": len(tracked_symbols),
+        "indicator_engines": len(indicators.engines),
+        "signals": len(signal_store),
+        "signals_evicted": signal_store.evicted,
+        "persistence": signal_writer.stats() if PERSIST_SIGNALS else None,
+        "bar_stream": bar_stream.stats() if bar_stream else None,
+        "bar_cache": bar_cache.stats() if bar_cache else None,
+        "websocket": signal_feed.stats(),
+        "screener": {
+            timeframe: {"symbols": len(screener.engine), "hits": screener.hits, "misses": screener.misses}
+            for timeframe, screener in screeners.items()
+        }
+    }
 
 @app.get("/signals", response_model=List[TradingSignal])
 async def get_signals(
     symbol: Optional[str] = None,
     signal_type: Optional[str] = None,
     strategy: Optional[str] = None,
-    active_only: bool = True
+    active_only: bool = True,
+    limit: Optional[int] = None,
+    before: Optional[str] = None
 ):
-    """Get trading signals with optional filters"""
-    signals = list(signals_db.values())
-    
-    if symbol:
-        signals = [s for s in signals if s.symbol == symbol]
-    
-    if signal_type:
-        signals = [s for s in signals if s.signal_type == signal_type]
-    
-    if strategy:
-        signals = [s for s in signals if s.strategy == strategy]
+    """Get trading signals with optional filters, newest first
     
-    if active_only:
-        now = datetime.now()
-        signals = [s for s in signals if not s.expires_at or s.expires_at > now]
+    Page through results with `limit`, passing the id of the last signal
+    received as `before` to get the next page.
+    """
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+    try:
+        return signal_store.query(symbol, signal_type, strategy, active_only, limit, before)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown signal id for before: {before}")
+
+@app.get("/signals/history")
+async def get_signal_history(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    symbol: Optional[str] = None,
+    signal_type: Optional[str] = None,
+    strategy: Optional[str] = None,
+    active_only: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Page through every stored signal newest first, filtered in the database
     
-    return sorted(signals, key=lambda x: x.created_at, reverse=True)
+    Pass the returned next_cursor back as `cursor` for the following page.
+    """
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+    try:
+        records, next_cursor = trading_signals_page(
+            db, limit, cursor, symbol.upper() if symbol else None, signal_type, strategy,
+            datetime.now() if active_only else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "signals": [signal_from_record(record) for record in records],
+        "next_cursor": next_cursor
+    }
 
 @app.get("/signals/{signal_id}", response_model=TradingSignal)
-async def get_signal(signal_id: str):
-    """Get a specific signal"""
-    if signal_id not in signals_db:
+async def get_signal(signal_id: str, db: Session = Depends(get_db)):
+    """Get a specific signal, from memory or from the stored history"""
+    signal = signal_store.get(signal_id)
+    if signal is None and PERSIST_SIGNALS:
+        record = db.get(TradingSignalRecord, signal_id)
+        if record is not None:
+            signal = signal_from_record(record)
+    if signal is None:
         raise HTTPException(status_code=404, detail="Signal not found")
-    return signals_db[signal_id]
+    return signal
+
+@app.post("/signals/scan")
+async def scan_universe(request: ScanRequest):
+    """Scan many symbols at once, sharding the universe across worker processes"""
+    symbols = await scan_symbols(request.symbols)
+    plans = scan_plans(request.strategies)
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No symbols to scan")
+    if not plans:
+        raise HTTPException(status_code=400, detail="No strategies with rules to scan")
+    errors: Dict[str, str] = {}
+    
+    if request.stream:
+        async def lines():
+            total = 0
+            async for names_chunk, new_signals in run_scan(symbols, plans, errors):
+                total += len(new_signals)
+                yield json.dumps({
+                    "symbols": names_chunk,
+                    "signals": [signal.model_dump(mode="json") for signal in new_signals]
+                }) + "\n"
+            yield json.dumps({
+                "done": True,
+                "symbols_scanned": len(symbols) - len(errors),
+                "signals_generated": total,
+                "errors": errors
+            }) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    
+    new_signals = []
+    async for _, shard_signals in run_scan(symbols, plans, errors):
+        new_signals.extend(shard_signals)
+    logger.info(f"Scanned {len(symbols)} symbols, generated {len(new_signals)} signals")
+    return {
+        "symbols_scanned": len(symbols) - len(errors),
+        "signals_generated": len(new_signals),
+        "signals": new_signals,
+        "errors": errors
+    }
 
 @app.post("/signals/scan/{symbol}")
 async def scan_symbol(symbol: str):
-    """Scan a symbol for trading signals"""
-    # Generate 1-3 signals for the symbol
-    num_signals = random.randint(1, 3)
-    new_signals = []
+    """Scan a symbol for trading signals on its latest completed bars"""
+    symbol = symbol.upper()
+    new_signals = await evaluate_symbol(symbol)
+    tracked_symbols.add(symbol)
     
-    for _ in range(num_signals):
-        signal = generate_mock_signal(symbol)
-        signals_db[signal.id] = signal
-        new_signals.append(signal)
-    
-    logger.info(f"Generated {num_signals} signals for {symbol}")
+    logger.info(f"Generated {len(new_signals)} signals for {symbol}")
     return {
         "symbol": symbol,
-        "signals_generated": num_signals,
+        "signals_generated": len(new_signals),
         "signals": new_signals
     }
 
+async def catch_up(engine: IndicatorEngine, symbols: List[str]):
+    """Sync the symbols whose latest completed bar the engine hasn't seen, once per bar"""
+    seconds = TIMEFRAMES[engine.timeframe][1]
+    expected = int(datetime.now().timestamp()) // seconds * seconds - seconds
+    rows = engine.register(symbols)
+    stale = [
+        symbol for symbol, last_start in zip(symbols, engine.last_start[rows].tolist())
+        if last_start < expected and caught_up.get((engine.timeframe, symbol)) != expected
+    ]
+    for symbol in stale:
+        caught_up[(engine.timeframe, symbol)] = expected
+    if stale:
+        await sync_symbols(engine, stale)
+
+@app.get("/screener")
+async def get_screener(
+    metric: str = "momentum",
+    timeframe: str = "1h",
+    k: int = 20,
+    side: str = "both",
+    weights: Optional[str] = None,
+    symbols: Optional[str] = None
+):
+    """Rank the universe by an indicator score and return the top and/or bottom k
+    
+    `metric` is one of momentum, rsi, rsi_distance, volume_surge, trend,
+    volatility and bb_position, or "composite" with `weights` such as
+    momentum:1,volume_surge:0.5 (a weighted sum of cross-sectional
+    z-scores). The universe is the tracked symbols, or `symbols` if given.
+    Rankings are cached until the next bar closes.
+    """
+    if timeframe not in TIMEFRAMES:
+        raise HTTPException(status_code=400, detail=f"Unsupported timeframe: {timeframe}")
+    if not 1 <= k <= SCREENER_MAX_K:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {SCREENER_MAX_K}")
+    if side not in ("top", "bottom", "both"):
+        raise HTTPException(status_code=400, detail="side must be top, bottom or both")
+    if metric == "composite":
+        try:
+            metric_weights = parse_weights(weights or "")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif metric in SCREENER_METRICS:
+        metric_weights = {metric: 1.0}
+    else:
+        raise HTTPException(status_code=400, detail=f"Unsupported metric: {metric}")
+    
+    requested = sorted({s.strip().upper() for s in symbols.split(",") if s.strip()}) if symbols else None
+    if requested:
+        tracked_symbols.update(requested)
+    universe = requested or sorted(tracked_symbols)
+    if not universe:
+        raise HTTPException(status_code=400, detail="No symbols to screen")
+    
+    screener = screeners.get(timeframe)
+    if screener is None:
+        screener = screeners[timeframe] = Screener(indicators.engine(timeframe))
+    await catch_up(screener.engine, universe)
+    
+    result = screener.rank(
+        metric_weights, k,
+        ("top", "bottom") if side == "both" else (side,),
+        frozenset(requested) if requested else None
+    )
+    return {
+        "timeframe": timeframe,
+        "metric": metric,
+        "weights": metric_weights if metric == "composite" else None,
+        "k": k,
+        **result,
+        "as_of": datetime.fromtimestamp(result["as_of"]).isoformat() if result["as_of"] is not None else None
+    }
+
 @app.get("/analysis/{symbol}", response_model=MarketAnalysis)
-async def get_market_analysis(symbol: str):
-    """Get detailed market analysis for a symbol"""
-    # Generate mock analysis data
-    base_price = random.uniform(100, 1000)
+async def get_market_analysis(symbol: str, timeframe: str = "1h"):
+    """Get detailed market analysis for a symbol from its streaming indicators"""
+    symbol = symbol.upper()
+    if timeframe not in TIMEFRAMES:
+        raise HTTPException(status_code=400, detail=f"Unsupported timeframe: {timeframe}")
+    engine = indicators.engine(timeframe)
+    await sync_bars(engine, symbol)
+    row = engine.row(symbol)
+    if row is None or not engine.ready(row):
+        raise HTTPException(status_code=404, detail=f"Not enough market data for {symbol}")
+    tracked_symbols.add(symbol)
+    
+    values = engine.latest(symbol)
+    close, atr = values["close"], values["atr"]
+    if values["macd_hist"] > 0 and close > values["bb_middle"]:
+        trend = "bullish"
+    elif values["macd_hist"] < 0 and close < values["bb_middle"]:
+        trend = "bearish"
+    else:
+        trend = "neutral"
     
     analysis = MarketAnalysis(
         symbol=symbol,
-        trend=random.choice(["bullish", "bearish", "neutral"]),
-        momentum=random.uniform(-1.0, 1.0),
-        volatility=random.uniform(0.1, 0.5),
-        support_levels=[
-            base_price * random.uniform(0.85, 0.95),
-            base_price * random.uniform(0.75, 0.85),
-            base_price * random.uniform(0.65, 0.75)
-        ],
-        resistance_levels=[
-            base_price * random.uniform(1.05, 1.15),
-            base_price * random.uniform(1.15, 1.25),
-            base_price * random.uniform(1.25, 1.35)
-        ],
-        rsi=random.uniform(20, 80),
+        trend=trend,
+        momentum=round((values["rsi"] - 50) / 50, 4),
+        volatility=round(atr / close, 4) if close else 0.0,
+        support_levels=[round(level, 4) for level in sorted([values["bb_lower"], close - atr, close - 2 * atr], reverse=True)],
+        resistance_levels=[round(level, 4) for level in sorted([values["bb_upper"], close + atr, close + 2 * atr])],
+        rsi=round(values["rsi"], 4),
         macd={
-            "macd": random.uniform(-2, 2),
-            "signal": random.uniform(-2, 2),
-            "histogram": random.uniform(-1, 1)
+            "macd": round(values["macd"], 4),
+            "signal": round(values["macd_signal"], 4),
+            "histogram": round(values["macd_hist"], 4)
         },
         bollinger_bands={
-            "upper": base_price * random.uniform(1.02, 1.05),
-            "middle": base_price,
-            "lower": base_price * random.uniform(0.95, 0.98)
+            "upper": round(values["bb_upper"], 4),
+            "middle": round(values["bb_middle"], 4),
+            "lower": round(values["bb_lower"], 4)
         },
         analysis_time=datetime.now()
     )
@@ -233,11 +785,103 @@ async def get_strategies():
 
 @app.put("/strategies/{strategy_name}")
 async def update_strategy(strategy_name: str, strategy: SignalStrategy):
-    """Update a signal strategy"""
+    """Update a signal strategy
+    
+    Conditions can be given as expressions in the parameters instead of
+    using a built-in rule, e.g. {"buy_rule": "rsi(14) < rsi_threshold and
+    volume_ratio > 1.5", "sell_rule": "close > bb_upper", "rsi_threshold": 30}.
+    They are compiled here, once, and run over whole indicator columns.
+    """
+    try:
+        strategy.parameters = prepare_parameters(strategy.parameters)
+    except RuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     strategies_db[strategy_name] = strategy
     logger.info(f"Updated strategy {strategy_name}")
     return {"message": f"Strategy {strategy_name} updated"}
 
+@app.post("/strategies/{strategy_name}/optimize")
+async def optimize_strategy(strategy_name: str, request: OptimizeRequest):
+    """Search a strategy's parameter space by backtesting each set, best first by `metric`
+    
+    Parameter sets are grouped by indicator settings and spread over the
+    worker processes; within a worker, every EMA, Wilder average and
+    rolling window is computed once per distinct period and reused.
+    """
+    if strategy_name not in strategies_db:
+        raise HTTPException(status_code=404, detail="Strategy not found")
+    if not has_rule(strategy_name, strategies_db[strategy_name].parameters):
+        raise HTTPException(status_code=400, detail=f"Strategy {strategy_name} has no rule to optimize")
+    if request.metric not in METRICS:
+        raise HTTPException(status_code=400, detail=f"Unsupported metric: {request.metric}")
+    strategy = strategies_db[strategy_name]
+    timeframe = request.timeframe or strategy.timeframe
+    if timeframe not in TIMEFRAMES:
+        raise HTTPException(status_code=400, detail=f"Unsupported timeframe: {timeframe}")
+    hold_bars = request.hold_bars or SIGNAL_TTL_BARS
+    
+    known = set(strategy.parameters) | set(DEFAULT_PARAMETERS) | set(PARAMETER_ALIASES) | set(rule_parameters(strategy_name, strategy.parameters))
+    unknown = sorted(set(request.parameters) - known)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown parameters for {strategy_name}: {', '.join(unknown)}")
+    pinned = set(pinned_settings(strategy.parameters)) | set(EXPRESSION_PARAMETERS)
+    fixed = sorted(name for name in request.parameters if PARAMETER_ALIASES.get(name, name) in pinned)
+    if fixed:
+        raise HTTPException(status_code=400, detail=f"Fixed by the strategy's rule, can't be searched: {', '.join(fixed)}")
+    try:
+        space = {name: expand_values(spec, OPTIMIZE_MAX_COMBINATIONS) for name, spec in request.parameters.items()}
+        start = datetime.fromisoformat(request.start_date)
+        end = datetime.fromisoformat(request.end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    grid_size = 1
+    for values in space.values():
+        grid_size *= len(values)
+    if request.search == "grid" and grid_size > OPTIMIZE_MAX_COMBINATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Grid has {grid_size} combinations, limit is {OPTIMIZE_MAX_COMBINATIONS}; use random search"
+        )
+    try:
+        combos = combinations(strategy.parameters, space, request.search,
+                              min(request.samples, OPTIMIZE_MAX_COMBINATIONS), request.seed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not combos:
+        raise HTTPException(status_code=400, detail="No valid parameter combinations")
+    
+    symbol = request.symbol.upper()
+    bars = await load_bars(symbol, timeframe, start, end)
+    if bars["close"].size < 2:
+        raise HTTPException(status_code=404, detail=f"No bars for {symbol} between {request.start_date} and {request.end_date}")
+    
+    started = datetime.now()
+    pool = get_scan_pool()
+    args = (TIMEFRAMES[timeframe][1], hold_bars, request.allow_short, request.cost_bps)
+    shards = shard(combos, SCAN_WORKERS if pool else 1)
+    if pool is None:
+        outputs = [await asyncio.to_thread(optimize_shard, bars, strategy_name, shards[0], *args)]
+    else:
+        loop = asyncio.get_running_loop()
+        outputs = await asyncio.gather(*(
+            loop.run_in_executor(pool, optimize_shard, bars, strategy_name, part, *args) for part in shards
+        ))
+    results = rank([result for output in outputs for result in output], request.metric)
+    elapsed = (datetime.now() - started).total_seconds()
+    logger.info(f"Optimized {strategy_name} on {symbol}: {len(combos)} parameter sets in {elapsed:.2f}s")
+    
+    return {
+        "strategy": strategy_name,
+        "symbol": symbol,
+        "period": f"{request.start_date} to {request.end_date}",
+        "timeframe": timeframe,
+        "search": request.search,
+        "metric": request.metric,
+        "evaluated": len(results),
+        "elapsed_seconds": round(elapsed, 3),
+        "results": results[:max(1, request.top)]
+    }
+
 @app.post("/strategies/{strategy_name}/toggle")
 async def toggle_strategy(strategy_name: str):
     """Enable/disable a strategy"""
@@ -256,35 +900,176 @@ async def toggle_strategy(strategy_name: str):
         "message": f"Strategy {strategy_name} {status}"
     }
 
+async def load_bars(symbol: str, timeframe: str, start: datetime, end: datetime) -> Dict[str, np.ndarray]:
+    """A symbol's bars over a range, from the tick archive if mounted, else from market-data-service"""
+    if tick_archive is not None and symbol in tick_archive.symbols():
+        return await asyncio.to_thread(tick_archive.bars, symbol, start, end, TIMEFRAMES[timeframe][1])
+    try:
+        return await market_data.range(symbol, timeframe, start, end)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Market data unavailable: {e}")
+
 @app.post("/signals/backtest")
 async def backtest_strategy(
     strategy_name: str,
     symbol: str,
     start_date: str,
-    end_date: str
+    end_date: str,
+    timeframe: Optional[str] = None,
+    hold_bars: int = SIGNAL_TTL_BARS,
+    allow_short: bool = True,
+    cost_bps: float = 0.0,
+    equity_points: int = 0
 ):
-    """Backtest a strategy (mock implementation)"""
+    """Backtest a strategy on a symbol's bar history with its live parameters
+    
+    Entries are the strategy's buy/sell signals; a position is held for
+    `hold_bars` bars (by default as long as a live signal stays active) or
+    until the next signal. `equity_points` > 0 adds a sampled equity curve.
+    """
     if strategy_name not in strategies_db:
         raise HTTPException(status_code=404, detail="Strategy not found")
+    if not has_rule(strategy_name, strategies_db[strategy_name].parameters):
+        raise HTTPException(status_code=400, detail=f"Strategy {strategy_name} has no rule to backtest")
+    strategy = strategies_db[strategy_name]
+    timeframe = timeframe or strategy.timeframe
+    if timeframe not in TIMEFRAMES:
+        raise HTTPException(status_code=400, detail=f"Unsupported timeframe: {timeframe}")
+    if hold_bars < 1:
+        raise HTTPException(status_code=400, detail="hold_bars must be at least 1")
+    try:
+        start = datetime.fromisoformat(start_date)
+        end = datetime.fromisoformat(end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {e}")
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end_date must be after start_date")
     
-    # Mock backtest results
-    total_trades = random.randint(50, 200)
-    winning_trades = random.randint(int(total_trades * 0.4), int(total_trades * 0.7))
+    symbol = symbol.upper()
+    bars = await load_bars(symbol, timeframe, start, end)
+    if bars["close"].size < 2:
+        raise HTTPException(status_code=404, detail=f"No bars for {symbol} between {start_date} and {end_date}")
     
-    results = {
+    results = await asyncio.to_thread(
+        run_backtest, bars, strategy_name, strategy.parameters, TIMEFRAMES[timeframe][1],
+        hold_bars, allow_short, cost_bps, equity_points
+    )
+    return {
         "strategy": strategy_name,
         "symbol": symbol,
         "period": f"{start_date} to {end_date}",
-        "total_trades": total_trades,
-        "winning_trades": winning_trades,
-        "win_rate": winning_trades / total_trades,
-        "total_return": random.uniform(-0.2, 0.5),
-        "max_drawdown": random.uniform(-0.15, -0.05),
-        "sharpe_ratio": random.uniform(0.5, 2.5),
-        "profit_factor": random.uniform(0.8, 2.2)
+        "timeframe": timeframe,
+        **results
     }
+
+@app.websocket("/ws/signals")
+async def signals_websocket(websocket: WebSocket):
+    """Push signals as they are generated
     
-    return results
+    Every new signal is sent unless the client narrows the feed with
+    ?symbols=AAPL,MSFT and/or ?strategies=rsi_oversold, or later with
+    {"action": "subscribe", "symbols": [...], "strategies": [...]}.
+    Messages are {"type": "signals", "data": [...]}.
+    """
+    await websocket.accept()
+    subscriber = signal_feed.connect(
+        websocket,
+        parse_names(websocket.query_params.get("symbols", "")),
+        parse_names(websocket.query_params.get("strategies", ""), upper=False)
+    )
+    logger.info(f"New signal subscriber. Total: {len(signal_feed)}")
+    try:
+        subscriber.send({
+            "type": "connection_established",
+            "symbols": sorted(subscriber.symbols),
+            "strategies": sorted(subscriber.strategies)
+        })
+        while not subscriber.closed:
+            try:
+                message = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
+            except asyncio.TimeoutError:
+                subscriber.send({"type": "ping"})
+                continue
+            handle_subscriber_message(subscriber, message)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Signal WebSocket error: {e}")
+    finally:
+        signal_feed.disconnect(subscriber)
+        await subscriber.close()
+        logger.info(f"Signal subscriber disconnected. Total: {len(signal_feed)}")
+
+def parse_names(value: Any, upper: bool = True) -> List[str]:
+    """Normalize a comma separated string or list of symbols or strategy names"""
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        return []
+    return [(name.strip().upper() if upper else name.strip()) for name in value if isinstance(name, str) and name.strip()]
+
+def handle_subscriber_message(subscriber: SignalSubscriber, message: str):
+    """Apply a subscribe/unsubscribe request from a signal subscriber"""
+    try:
+        request = json.loads(message)
+    except ValueError:
+        request = None
+    if not isinstance(request, dict):
+        subscriber.send({"type": "error", "message": "Expected a JSON object"})
+        return
+    action = request.get("action")
+    symbols = parse_names(request.get("symbols", []))
+    strategies = parse_names(request.get("strategies", []), upper=False)
+    if action == "ping":
+        subscriber.send({"type": "pong"})
+        return
+    if action == "subscribe":
+        subscriber.symbols.update(symbols)
+        subscriber.strategies.update(strategies)
+    elif action == "unsubscribe":
+        subscriber.symbols.difference_update(symbols)
+        subscriber.strategies.difference_update(strategies)
+    else:
+        subscriber.send({"type": "error", "message": f"Unknown action: {action}"})
+        return
+    subscriber.send({
+        "type": "subscribed",
+        "symbols": sorted(subscriber.symbols),
+        "strategies": sorted(subscriber.strategies)
+    })
+
+@app.on_event("startup")
+async def startup_event():
+    """Start the market data client, the bar stream and the signal refresh loop"""
+    global market_data, bar_cache, refresh_task, bar_stream, bar_stream_task
+    if PERSIST_SIGNALS:
+        try:
+            await restore_signals()
+        except Exception as e:
+            logger.error(f"Could not restore signals from the database: {e}")
+        signal_writer.start()
+    market_data = MarketDataClient(MARKET_DATA_URL)
+    bar_cache = BarCache(market_data, INDICATOR_WARMUP_BARS, BAR_CACHE_SYMBOLS)
+    if BAR_STREAM_ENABLED:
+        bar_stream = BarStream(MARKET_DATA_WS_URL, [BASE_TIMEFRAME], on_bars)
+        bar_stream_task = asyncio.create_task(bar_stream.run())
+    refresh_task = asyncio.create_task(refresh_signals())
+    logger.info(f"Signal Detection Service started, reading bars from {MARKET_DATA_URL}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the bar stream and refresh loop and close the market data client"""
+    if bar_stream_task:
+        bar_stream_task.cancel()
+    if refresh_task:
+        refresh_task.cancel()
+    await signal_feed.close_all()
+    if market_data:
+        await market_data.close()
+    if scan_pool:
+        scan_pool.shutdown(cancel_futures=True)
+    # Drain buffered signals to the database
+    await signal_writer.stop()
 
 if __name__ == "__main__":
     uvicorn.run(
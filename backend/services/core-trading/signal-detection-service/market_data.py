@@ -0,0 +1,125 @@
+"""
+Market Data Client - OHLCV bars from market-data-service as NumPy columns
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+BAR_FIELDS = ("start", "open", "high", "low", "close", "volume")
+
+# Strategy timeframe -> (market-data interval it is built from, seconds per bar)
+TIMEFRAMES = {
+    "1m": ("1m", 60),
+    "5m": ("5m", 300),
+    "15m": ("5m", 900),
+    "1h": ("1h", 3600),
+    "4h": ("1h", 4 * 3600),
+    "1d": ("1d", 86400),
+}
+
+# market-data-service /historical-data periods, shortest first
+PERIODS = (
+    ("1d", 86400),
+    ("1w", 7 * 86400),
+    ("1m", 30 * 86400),
+    ("3m", 90 * 86400),
+    ("1y", 365 * 86400),
+    ("5y", 5 * 365 * 86400),
+)
+
+
+def empty_bars() -> Dict[str, np.ndarray]:
+    return {field: np.zeros(0, dtype=np.int64 if field == "start" else np.float64) for field in BAR_FIELDS}
+
+
+def resample(bars: Dict[str, np.ndarray], seconds: int) -> Dict[str, np.ndarray]:
+    """Aggregate bars into `seconds`-wide bars aligned to the epoch"""
+    if bars["start"].size == 0:
+        return bars
+    bucket = bars["start"] // seconds
+    edges = np.flatnonzero(np.diff(bucket)) + 1
+    starts = np.concatenate([[0], edges])
+    ends = np.concatenate([edges, [bucket.size]]) - 1
+    return {
+        "start": bucket[starts] * seconds,
+        "open": bars["open"][starts],
+        "high": np.maximum.reduceat(bars["high"], starts),
+        "low": np.minimum.reduceat(bars["low"], starts),
+        "close": bars["close"][ends],
+        "volume": np.add.reduceat(bars["volume"], starts),
+    }
+
+
+def parse_bars(data: list) -> Dict[str, np.ndarray]:
+    """/historical-data bar dicts to columns, oldest first"""
+    if not data:
+        return empty_bars()
+    return {
+        "start": np.array([int(datetime.fromisoformat(bar["timestamp"]).timestamp()) for bar in data], dtype=np.int64),
+        "open": np.array([bar["open"] for bar in data], dtype=np.float64),
+        "high": np.array([bar["high"] for bar in data], dtype=np.float64),
+        "low": np.array([bar["low"] for bar in data], dtype=np.float64),
+        "close": np.array([bar["close"] for bar in data], dtype=np.float64),
+        "volume": np.array([bar["volume"] for bar in data], dtype=np.float64),
+    }
+
+
+class MarketDataClient:
+    """Fetches completed bars for a strategy timeframe, resampling where market data has no native interval"""
+
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def close(self):
+        await self._client.aclose()
+
+    async def symbols(self) -> List[str]:
+        """Every symbol market-data-service has a latest tick for"""
+        response = await self._client.get(f"{self.base_url}/market-data")
+        response.raise_for_status()
+        return sorted(response.json()["data"])
+
+    async def _fetch(self, symbol: str, timeframe: str, params: Dict[str, str]) -> Dict[str, np.ndarray]:
+        """Bars from /historical-data, resampled to the timeframe where needed"""
+        interval, seconds = TIMEFRAMES[timeframe]
+        response = await self._client.get(
+            f"{self.base_url}/historical-data/{symbol}",
+            params=dict(params, interval=interval),
+        )
+        response.raise_for_status()
+        bars = parse_bars(response.json()["data"]["data"])
+        if seconds != TIMEFRAMES[interval][1]:
+            bars = resample(bars, seconds)
+        return bars
+
+    async def bars(self, symbol: str, timeframe: str, count: int,
+                   since: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Up to `count` completed bars for `timeframe`, or only those starting after `since`"""
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        seconds = TIMEFRAMES[timeframe][1]
+        now = int(datetime.now().timestamp())
+        span = seconds * count if since is None else max(seconds, now - since + seconds)
+        period = next((name for name, length in PERIODS if length >= span), PERIODS[-1][0])
+
+        bars = await self._fetch(symbol, timeframe, {
+            "period": period,
+            "start": datetime.fromtimestamp(now - span).isoformat(),
+        })
+        # Archive-backed ranges and resampled bars can end with a bar that is still open
+        if bars["start"].size and bars["start"][-1] + seconds > now:
+            bars = {field: column[:-1] for field, column in bars.items()}
+        if since is not None:
+            keep = bars["start"] > since
+            bars = {field: column[keep] for field, column in bars.items()}
+        return {field: column[-count:] for field, column in bars.items()}
+
+    async def range(self, symbol: str, timeframe: str, start: datetime, end: datetime) -> Dict[str, np.ndarray]:
+        """Every bar for `timeframe` starting in [start, end)"""
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        return await self._fetch(symbol, timeframe, {"start": start.isoformat(), "end": end.isoformat()})
@@ -0,0 +1,117 @@
+"""
+Strategy Optimizer - grid and random search over strategy parameters
+Combinations sharing indicator settings run together so their arrays are reused
+"""
+
+import itertools
+import math
+import random
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+from backtest import run_backtest
+from indicators import SeriesCache, indicator_parameters
+
+METRICS = ("sharpe_ratio", "total_return", "win_rate", "profit_factor", "max_drawdown")
+
+
+def expand_values(spec: Any, max_values: int) -> List[Any]:
+    """A parameter's candidate values from a list, or a {"min", "max", "step"} range (inclusive)
+
+    Raises ValueError for a malformed spec or one with more than `max_values` values.
+    """
+    if isinstance(spec, dict):
+        try:
+            low, high, step = spec["min"], spec["max"], spec.get("step", 1)
+        except KeyError:
+            raise ValueError("A parameter range needs min and max")
+        if any(isinstance(v, bool) or not isinstance(v, (int, float)) or not math.isfinite(v) for v in (low, high, step)):
+            raise ValueError("A parameter range's min, max and step must be numbers")
+        if step <= 0 or high < low:
+            raise ValueError("A parameter range needs max >= min and a positive step")
+        # Size the range before allocating it
+        if math.ceil((high - low) / step) + 1 > max_values:
+            raise ValueError(f"A parameter range may have at most {max_values} values")
+        values = np.arange(low, high + step / 2, step)
+        is_int = all(isinstance(v, int) for v in (low, high, step))
+        return [int(v) if is_int else round(float(v), 10) for v in values]
+    if isinstance(spec, (list, tuple)) and spec:
+        if len(spec) > max_values:
+            raise ValueError(f"A parameter may have at most {max_values} values")
+        return list(spec)
+    raise ValueError("Parameter values must be a non-empty list or a {min, max, step} range")
+
+
+def valid(parameters: Dict[str, Any]) -> bool:
+    try:
+        settings = indicator_parameters(parameters)
+    except ValueError:
+        return False
+    return settings["fast_period"] < settings["slow_period"]
+
+
+def _grid_point(position: int, sizes: List[int]) -> List[int]:
+    """Per-parameter value indexes of the grid point at a flat position"""
+    indexes = []
+    for size in reversed(sizes):
+        position, index = divmod(position, size)
+        indexes.append(index)
+    return indexes[::-1]
+
+
+def combinations(base: Dict[str, Any], space: Dict[str, List[Any]], search: str, samples: int,
+                 seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Parameter sets to evaluate: the full grid, or `samples` distinct grid points at random"""
+    names = sorted(space)
+    grid = itertools.product(*(space[name] for name in names))
+    if search == "random":
+        # Sample grid positions without materializing the whole grid
+        sizes = [len(space[name]) for name in names]
+        total = math.prod(sizes)
+        picks = random.Random(seed).sample(range(total), min(samples, total))
+        grid = (tuple(space[name][i] for name, i in zip(names, _grid_point(pick, sizes))) for pick in picks)
+    elif search != "grid":
+        raise ValueError(f"Unknown search: {search}")
+    result = []
+    for values in grid:
+        parameters = dict(base, **dict(zip(names, values)))
+        if valid(parameters):
+            result.append(parameters)
+    return result
+
+
+def indicator_key(parameters: Dict[str, Any]) -> tuple:
+    return tuple(sorted(indicator_parameters(parameters).items()))
+
+
+def shard(combos: List[Dict[str, Any]], shards: int) -> List[List[Dict[str, Any]]]:
+    """Split combinations into contiguous runs ordered by indicator settings
+
+    Sets that differ only in rule thresholds land in the same shard, so
+    each worker computes every indicator configuration it sees once.
+    """
+    ordered = sorted(combos, key=indicator_key)
+    size = -(-len(ordered) // max(1, shards))
+    return [ordered[i:i + size] for i in range(0, len(ordered), size)]
+
+
+def optimize_shard(bars: Dict[str, np.ndarray], strategy: str, combos: Sequence[Dict[str, Any]], bar_seconds: int,
+                   hold_bars: int, allow_short: bool, cost_bps: float) -> List[Dict[str, Any]]:
+    """Backtest each parameter set over the same bars, sharing one indicator cache"""
+    cache = SeriesCache(bars["high"], bars["low"], bars["close"], bars["volume"])
+    results = []
+    for parameters in combos:
+        stats = run_backtest(bars, strategy, parameters, bar_seconds, hold_bars, allow_short, cost_bps, cache=cache)
+        results.append(dict(stats, parameters=parameters))
+    return results
+
+
+def rank(results: List[Dict[str, Any]], metric: str) -> List[Dict[str, Any]]:
+    """Best first by `metric`; a profit factor without losing trades counts as unbounded"""
+    def score(result: Dict[str, Any]) -> float:
+        value = result[metric]
+        if value is None:
+            return float("inf") if result["winning_trades"] else float("-inf")
+        return value
+    return sorted(results, key=score, reverse=True)
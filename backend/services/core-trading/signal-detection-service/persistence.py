@@ -0,0 +1,74 @@
+"""
+Persistence of generated signals into the trading_signals table
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import func, insert
+
+from shared.database import SessionLocal, TradingSignal
+
+SIGNAL_ID_PREFIX = "SIG_"
+
+
+def signal_row(signal: Any) -> Dict[str, Any]:
+    """trading_signals row for a generated signal"""
+    return {
+        "id": signal.id,
+        "symbol": signal.symbol,
+        "signal_type": signal.signal_type,
+        "strategy": signal.strategy,
+        "confidence": signal.confidence,
+        "price_target": signal.price_target,
+        "stop_loss": signal.stop_loss,
+        "timeframe": signal.timeframe,
+        "indicators": signal.indicators,
+        "created_at": signal.created_at,
+        "expires_at": signal.expires_at
+    }
+
+
+def write_signals(rows: List[Dict[str, Any]]):
+    """Insert a batch of signals in one round-trip"""
+    db = SessionLocal()
+    try:
+        db.execute(insert(TradingSignal), rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+def load_active_signals(now: datetime) -> List[TradingSignal]:
+    """Signals that had not yet expired at `now`, oldest first"""
+    db = SessionLocal()
+    try:
+        return (
+            db.query(TradingSignal)
+            .filter((TradingSignal.expires_at.is_(None)) | (TradingSignal.expires_at > now))
+            .order_by(TradingSignal.created_at, TradingSignal.id)
+            .all()
+        )
+    finally:
+        db.close()
+
+
+def last_signal_number() -> int:
+    """Highest numeric suffix among stored SIG_ ids, so new ids never collide after a restart"""
+    db = SessionLocal()
+    try:
+        signal_id = (
+            db.query(TradingSignal.id)
+            .filter(TradingSignal.id.like(f"{SIGNAL_ID_PREFIX}%"))
+            .order_by(func.length(TradingSignal.id).desc(), TradingSignal.id.desc())
+            .limit(1)
+            .scalar()
+        )
+    finally:
+        db.close()
+    if signal_id is None:
+        return 0
+    try:
+        return int(signal_id[len(SIGNAL_ID_PREFIX):])
+    except ValueError:
+        return 0
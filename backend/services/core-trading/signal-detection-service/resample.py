@@ -0,0 +1,328 @@
+"""
+Bar Cache - every strategy timeframe derived incrementally from streamed 1m bars
+One cache is shared by all strategies, engines and the screener; cold symbols are evicted LRU
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from market_data import BAR_FIELDS, TIMEFRAMES, MarketDataClient
+
+BASE_TIMEFRAME = "1m"
+BASE_SECONDS = TIMEFRAMES[BASE_TIMEFRAME][1]
+
+# Sealed bars for one timeframe: (symbols, columns), rows unique within a batch
+SealedBatch = Tuple[List[str], Dict[str, np.ndarray]]
+
+
+class TimeframeBars:
+    """Open bar and a ring of completed bars for one timeframe, a row per cached symbol
+
+    Base bars are folded into the open bar; it is sealed by the base bar
+    that ends its bucket, or by the first base bar of a later bucket if
+    that one never came. Until a row has been seen from the start of a
+    bucket (`valid_from`), its open bar is incomplete and is not sealed;
+    readers catch that bar up from market data instead.
+    """
+
+    def __init__(self, seconds: int, depth: int, capacity: int):
+        self.seconds = seconds
+        self.depth = depth
+        self._capacity = capacity
+        self.loaded = np.zeros(capacity, dtype=bool)
+        self.valid_from = np.zeros(capacity, dtype=np.int64)
+        self.last_base = np.full(capacity, -1, dtype=np.int64)
+
+        # Bar being built
+        self.is_open = np.zeros(capacity, dtype=bool)
+        self.start = np.zeros(capacity, dtype=np.int64)
+        self.open = np.zeros(capacity)
+        self.high = np.zeros(capacity)
+        self.low = np.zeros(capacity)
+        self.close = np.zeros(capacity)
+        self.volume = np.zeros(capacity)
+
+        # Completed bars
+        self.done = {
+            field: np.zeros((capacity, depth), dtype=np.int64 if field == "start" else np.float64)
+            for field in BAR_FIELDS
+        }
+        self.head = np.zeros(capacity, dtype=np.int64)
+        self.count = np.zeros(capacity, dtype=np.int64)
+
+    def grow(self, capacity: int):
+        extra = capacity - self._capacity
+        for name in ("loaded", "valid_from", "last_base", "is_open", "start", "open", "high", "low",
+                     "close", "volume", "head", "count"):
+            array = getattr(self, name)
+            fill = -1 if name == "last_base" else 0
+            setattr(self, name, np.concatenate([array, np.full(extra, fill, dtype=array.dtype)]))
+        for field, array in self.done.items():
+            self.done[field] = np.concatenate([array, np.zeros((extra, self.depth), dtype=array.dtype)])
+        self._capacity = capacity
+
+    def reset(self, row: int):
+        if row < self._capacity:
+            self.loaded[row] = False
+            self.is_open[row] = False
+            self.count[row] = 0
+            self.head[row] = 0
+            self.last_base[row] = -1
+
+    def last_completed(self, row: int) -> int:
+        """Start of the row's newest completed bar, -1 if none"""
+        if not self.count[row]:
+            return -1
+        return int(self.done["start"][row, (self.head[row] - 1) % self.depth])
+
+    def load(self, row: int, bars: Dict[str, np.ndarray], now: float):
+        """Replace a row's history with fetched completed bars
+
+        Base bars already streamed for the bucket in progress are unknown,
+        so that bucket is left to be caught up when it closes.
+        """
+        self.reset(row)
+        self.loaded[row] = True
+        self.valid_from[row] = (int(now) // self.seconds + 1) * self.seconds
+        self.append(row, bars)
+
+    def append(self, row: int, bars: Dict[str, np.ndarray]):
+        """Add fetched completed bars newer than the row's newest one"""
+        last = self.last_completed(row)
+        keep = bars["start"] > last
+        n = int(keep.sum())
+        if n == 0:
+            return
+        if n > self.depth:
+            keep[np.flatnonzero(keep)[:-self.depth]] = False
+            n = self.depth
+        slots = (self.head[row] + np.arange(n)) % self.depth
+        for field in BAR_FIELDS:
+            self.done[field][row, slots] = bars[field][keep]
+        self.head[row] = (self.head[row] + n) % self.depth
+        self.count[row] = min(int(self.count[row]) + n, self.depth)
+        newest = int(bars["start"][keep][-1])
+        # An open bar the fetch already covered is complete history now
+        if self.is_open[row] and self.start[row] <= newest:
+            self.is_open[row] = False
+        self.last_base[row] = max(int(self.last_base[row]), newest + self.seconds - BASE_SECONDS)
+
+    def completed(self, row: int, count: int, since: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Up to `count` most recent completed bars of a row (only those after `since`), oldest first"""
+        n = int(self.count[row])
+        end = int(self.head[row])
+        order = np.arange(end - n, end) % self.depth
+        bars = {field: self.done[field][row, order] for field in BAR_FIELDS}
+        if since is not None:
+            keep = bars["start"] > since
+            bars = {field: column[keep] for field, column in bars.items()}
+        return {field: column[-count:] for field, column in bars.items()}
+
+    def update(self, rows: np.ndarray, bars: Dict[str, np.ndarray]) -> List[Dict[str, np.ndarray]]:
+        """Fold one base bar per row; returns the bars this sealed, in order"""
+        fresh = bars["start"] > self.last_base[rows]
+        rows = rows[fresh]
+        bars = {field: column[fresh] for field, column in bars.items()}
+        if rows.size == 0:
+            return []
+        self.last_base[rows] = bars["start"]
+        bucket = bars["start"] // self.seconds * self.seconds
+        closes = (bars["start"] + BASE_SECONDS) % self.seconds == 0
+        trusted = bucket >= self.valid_from[rows]
+        sealed = []
+
+        # The bucket moved on without its closing base bar: seal what was built
+        rolled = trusted & self.is_open[rows] & (bucket != self.start[rows])
+        if rolled.any():
+            sealed.append(self._seal(rows[rolled]))
+
+        # A bucket that began before the row was loaded is never built or sealed
+        rows, bucket, closes = rows[trusted], bucket[trusted], closes[trusted]
+        bars = {field: column[trusted] for field, column in bars.items()}
+
+        starting = ~self.is_open[rows]
+        if starting.any():
+            new = rows[starting]
+            self.is_open[new] = True
+            self.start[new] = bucket[starting]
+            self.open[new] = bars["open"][starting]
+            self.high[new] = bars["high"][starting]
+            self.low[new] = bars["low"][starting]
+            self.close[new] = bars["close"][starting]
+            self.volume[new] = bars["volume"][starting]
+        going = ~starting
+        if going.any():
+            cur = rows[going]
+            self.high[cur] = np.maximum(self.high[cur], bars["high"][going])
+            self.low[cur] = np.minimum(self.low[cur], bars["low"][going])
+            self.close[cur] = bars["close"][going]
+            self.volume[cur] += bars["volume"][going]
+
+        if closes.any():
+            sealed.append(self._seal(rows[closes]))
+        return sealed
+
+    def _seal(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        bars = {
+            "rows": rows,
+            "start": self.start[rows].copy(),
+            "open": self.open[rows].copy(),
+            "high": self.high[rows].copy(),
+            "low": self.low[rows].copy(),
+            "close": self.close[rows].copy(),
+            "volume": self.volume[rows].copy(),
+        }
+        slots = self.head[rows]
+        for field in BAR_FIELDS:
+            self.done[field][rows, slots] = bars[field]
+        self.head[rows] = (slots + 1) % self.depth
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.depth)
+        self.is_open[rows] = False
+        return bars
+
+
+class BarCache:
+    """Completed bars per symbol for every strategy timeframe, shared by all readers
+
+    A timeframe's history is fetched from market data once per symbol and
+    from then on extended by `ingest` as 1m bars stream in, so no reader
+    re-fetches or re-aggregates it. If the stream falls behind, reads
+    catch up with an incremental fetch. At most `max_symbols` symbols are
+    kept; the least recently read one gives up its row to a new symbol.
+    """
+
+    def __init__(self, client: MarketDataClient, depth: int, max_symbols: int, capacity: int = 64):
+        self.client = client
+        self.depth = depth
+        self.max_symbols = max_symbols
+        self._capacity = min(capacity, max_symbols)
+        self._rows: "OrderedDict[str, int]" = OrderedDict()
+        self._free: List[int] = list(range(self._capacity - 1, -1, -1))
+        self.series: Dict[str, TimeframeBars] = {}
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._rows
+
+    def _series(self, timeframe: str) -> TimeframeBars:
+        series = self.series.get(timeframe)
+        if series is None:
+            series = self.series[timeframe] = TimeframeBars(TIMEFRAMES[timeframe][1], self.depth, self._capacity)
+        return series
+
+    def _row(self, symbol: str) -> int:
+        """The symbol's row, taking a free one or the least recently read symbol's"""
+        row = self._rows.get(symbol)
+        if row is not None:
+            self._rows.move_to_end(symbol)
+            return row
+        if not self._free and self._capacity < self.max_symbols:
+            capacity = min(self._capacity * 2, self.max_symbols)
+            for series in self.series.values():
+                series.grow(capacity)
+            self._free = list(range(capacity - 1, self._capacity - 1, -1))
+            self._capacity = capacity
+        if self._free:
+            row = self._free.pop()
+        else:
+            _, row = self._rows.popitem(last=False)
+            self.evicted += 1
+        for series in self.series.values():
+            series.reset(row)
+        self._rows[symbol] = row
+        return row
+
+    async def bars(self, symbol: str, timeframe: str, count: int, since: Optional[int] = None,
+                   store: bool = True) -> Dict[str, np.ndarray]:
+        """Up to `count` completed bars for `timeframe`, or only those starting after `since`
+
+        Served from the cache when the symbol's timeframe is loaded and
+        current. With store=False a symbol that isn't cached is fetched
+        without taking a row, for one-off reads such as universe scans.
+        Raises httpx.HTTPError if market data has to be fetched and fails.
+        """
+        series = self._series(timeframe)
+        row = self._rows.get(symbol)
+        loaded = row is not None and bool(series.loaded[row])
+        if not loaded and not store:
+            self.misses += 1
+            self.fetches += 1
+            return await self.client.bars(symbol, timeframe, count, since)
+
+        seconds = series.seconds
+        expected = int(time.time()) // seconds * seconds - seconds
+        if loaded and series.last_completed(row) >= expected:
+            self.hits += 1
+            self._rows.move_to_end(symbol)
+            return series.completed(row, count, since)
+
+        self.misses += 1
+        self.fetches += 1
+        if loaded:
+            fetched = await self.client.bars(symbol, timeframe, self.depth, series.last_completed(row))
+        else:
+            fetched = await self.client.bars(symbol, timeframe, max(count, self.depth))
+        # Rows may have changed hands while waiting on market data
+        row = self._rows.get(symbol)
+        if loaded and row is not None and series.loaded[row]:
+            series.append(row, fetched)
+            self._rows.move_to_end(symbol)
+        else:
+            row = self._row(symbol)
+            series.load(row, fetched, time.time())
+        return series.completed(row, count, since)
+
+    def ingest(self, symbols: List[str], bars: Dict[str, np.ndarray]) -> Dict[str, List[SealedBatch]]:
+        """Fold streamed 1m bars into every cached timeframe
+
+        Returns, per timeframe, the bars this sealed as (symbols, columns)
+        batches in order. A symbol whose bar closed without being sealed
+        here (not cached on that timeframe, or cached mid-bar) has to be
+        caught up from market data.
+        """
+        positions, rows = [], []
+        for position, symbol in enumerate(symbols):
+            row = self._rows.get(symbol)
+            if row is not None:
+                positions.append(position)
+                rows.append(row)
+        sealed: Dict[str, List[SealedBatch]] = {}
+        if not rows:
+            return sealed
+        positions = np.array(positions)
+        rows = np.array(rows, dtype=np.int64)
+        names = [symbols[position] for position in positions.tolist()]
+        by_row = dict(zip(rows.tolist(), names))
+        base = {field: np.asarray(bars[field])[positions] for field in BAR_FIELDS}
+
+        for timeframe, series in self.series.items():
+            loaded = series.loaded[rows]
+            if not loaded.any():
+                continue
+            batches = series.update(rows[loaded], {field: column[loaded] for field, column in base.items()})
+            if batches:
+                sealed[timeframe] = [
+                    ([by_row[row] for row in batch["rows"].tolist()], {field: batch[field] for field in BAR_FIELDS})
+                    for batch in batches
+                ]
+        return sealed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "symbols": len(self._rows),
+            "max_symbols": self.max_symbols,
+            "timeframes": sorted(self.series),
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,243 @@
+"""
+Rule Expressions - strategy conditions written as text, compiled to array operations
+e.g. "rsi(14) < 30 and volume_ratio > 1.5"
+
+A rule is parsed with Python's expression grammar but only a small set of
+nodes is accepted: numbers, indicator features (optionally called with
+their settings), strategy parameter names, arithmetic, comparisons, and
+and/or/not. It compiles to nested functions of whole indicator columns,
+so one call evaluates every symbol (or every bar) at once.
+"""
+
+import ast
+from functools import lru_cache
+from typing import Any, Callable, Dict, Set, Tuple
+
+import numpy as np
+
+from indicators import setting_value
+
+Columns = Dict[str, np.ndarray]
+
+MAX_RULE_LENGTH = 1000
+
+# Feature -> indicator settings its call arguments set, in order
+FEATURES: Dict[str, Tuple[str, ...]] = {
+    "close": (),
+    "rsi": ("rsi_period",),
+    "macd": ("fast_period", "slow_period", "signal_period"),
+    "macd_signal": ("fast_period", "slow_period", "signal_period"),
+    "macd_hist": ("fast_period", "slow_period", "signal_period"),
+    "prev_macd_hist": ("fast_period", "slow_period", "signal_period"),
+    "bb_middle": ("bb_period", "bb_std"),
+    "bb_upper": ("bb_period", "bb_std"),
+    "bb_lower": ("bb_period", "bb_std"),
+    "bb_width": ("bb_period", "bb_std"),
+    "prev_bb_width": ("bb_period", "bb_std"),
+    "bb_width_avg": ("bb_period", "bb_std"),
+    "atr": ("atr_period",),
+    "volume_ratio": ("volume_period",),
+}
+
+FUNCTIONS = {
+    "abs": (np.abs, 1),
+    "min": (np.minimum, 2),
+    "max": (np.maximum, 2),
+}
+
+ARITHMETIC = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+}
+
+COMPARISONS = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+
+# A compiled node: (indicator columns, strategy parameters) -> array or scalar
+Node = Callable[[Columns, Dict[str, Any]], Any]
+
+
+class RuleError(ValueError):
+    """A rule expression that can't be parsed or uses something outside the rule language"""
+
+
+class Rule:
+    """A compiled rule expression
+
+    `settings` are the indicator settings pinned by call arguments (rsi(14)
+    pins rsi_period=14), `features` the indicator outputs read, and
+    `parameters` the strategy parameter names resolved at evaluation time,
+    so thresholds can change without recompiling.
+    """
+
+    def __init__(self, text: str):
+        if not isinstance(text, str) or not text.strip():
+            raise RuleError("A rule must be a non-empty expression")
+        if len(text) > MAX_RULE_LENGTH:
+            raise RuleError(f"A rule may be at most {MAX_RULE_LENGTH} characters")
+        self.text = text
+        self.settings: Dict[str, Any] = {}
+        self.features: Set[str] = set()
+        self.parameters: Set[str] = set()
+        try:
+            tree = ast.parse(text.strip(), mode="eval")
+        except SyntaxError as e:
+            raise RuleError(f"Invalid rule {text!r}: {e.msg}")
+        kind, self._root = self._compile(tree.body)
+        if kind != "bool":
+            raise RuleError(f"Rule {text!r} must be a condition, e.g. a comparison")
+
+    def __call__(self, values: Columns, parameters: Dict[str, Any]) -> np.ndarray:
+        """Boolean mask with one element per row of the columns
+
+        A row where any feature the rule reads is NaN (still warming up)
+        never holds, however the rule combines or negates it.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = self._root(values, parameters)
+        result = np.broadcast_to(np.asarray(result, dtype=bool), values["close"].shape)
+        for feature in self.features:
+            result = result & np.isfinite(values[feature])
+        return result
+
+    # Compilation: each node returns its kind ("bool" or "number") and a function
+    def _compile(self, node: ast.AST) -> Tuple[str, Node]:
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool):
+                value = node.value
+                return "bool", lambda values, parameters: value
+            if isinstance(node.value, (int, float)):
+                value = float(node.value)
+                return "number", lambda values, parameters: value
+            raise RuleError(f"Unsupported constant {node.value!r}")
+
+        if isinstance(node, ast.Name):
+            return "number", self._name(node.id)
+
+        if isinstance(node, ast.Call):
+            return "number", self._call(node)
+
+        if isinstance(node, ast.BinOp):
+            op = ARITHMETIC.get(type(node.op))
+            if op is None:
+                raise RuleError(f"Unsupported operator {type(node.op).__name__}; use +, -, *, / and and/or/not")
+            left = self._number(node.left)
+            right = self._number(node.right)
+            return "number", lambda values, parameters: op(left(values, parameters), right(values, parameters))
+
+        if isinstance(node, ast.UnaryOp):
+            if isinstance(node.op, ast.Not):
+                operand = self._condition(node.operand)
+                return "bool", lambda values, parameters: np.logical_not(operand(values, parameters))
+            if isinstance(node.op, (ast.USub, ast.UAdd)):
+                operand = self._number(node.operand)
+                sign = -1.0 if isinstance(node.op, ast.USub) else 1.0
+                return "number", lambda values, parameters: sign * operand(values, parameters)
+            raise RuleError(f"Unsupported operator {type(node.op).__name__}")
+
+        if isinstance(node, ast.BoolOp):
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            operands = [self._condition(value) for value in node.values]
+
+            def boolean(values, parameters):
+                result = operands[0](values, parameters)
+                for operand in operands[1:]:
+                    result = combine(result, operand(values, parameters))
+                return result
+            return "bool", boolean
+
+        if isinstance(node, ast.Compare):
+            terms = [self._number(node.left)] + [self._number(term) for term in node.comparators]
+            ops = []
+            for op in node.ops:
+                compare = COMPARISONS.get(type(op))
+                if compare is None:
+                    raise RuleError(f"Unsupported comparison {type(op).__name__}")
+                ops.append(compare)
+
+            def comparison(values, parameters):
+                # Chained comparisons (20 < rsi < 30) hold where every pair holds
+                current = terms[0](values, parameters)
+                result = True
+                for compare, term in zip(ops, terms[1:]):
+                    following = term(values, parameters)
+                    result = np.logical_and(result, compare(current, following))
+                    current = following
+                return result
+            return "bool", comparison
+
+        raise RuleError(f"Unsupported syntax in rule: {type(node).__name__}")
+
+    def _number(self, node: ast.AST) -> Node:
+        kind, compiled = self._compile(node)
+        if kind != "number":
+            raise RuleError("Conditions can't be used as numbers; combine them with and/or/not")
+        return compiled
+
+    def _condition(self, node: ast.AST) -> Node:
+        kind, compiled = self._compile(node)
+        if kind != "bool":
+            raise RuleError("and/or/not need conditions on both sides, e.g. comparisons")
+        return compiled
+
+    def _name(self, name: str) -> Node:
+        if name in FEATURES:
+            self.features.add(name)
+            return lambda values, parameters: values[name]
+        if name in FUNCTIONS:
+            raise RuleError(f"{name} is a function; call it as {name}(...)")
+        # Anything else is a strategy parameter, read when the rule runs
+        self.parameters.add(name)
+        return lambda values, parameters: float(parameters[name])
+
+    def _call(self, node: ast.Call) -> Node:
+        if not isinstance(node.func, ast.Name) or node.keywords:
+            raise RuleError("Only features and abs/min/max can be called, with positional arguments")
+        name = node.func.id
+        if name in FUNCTIONS:
+            function, arity = FUNCTIONS[name]
+            if len(node.args) != arity:
+                raise RuleError(f"{name} takes {arity} argument{'s' if arity > 1 else ''}")
+            args = [self._number(arg) for arg in node.args]
+            return lambda values, parameters: function(*(arg(values, parameters) for arg in args))
+        if name not in FEATURES:
+            raise RuleError(f"Unknown feature or function: {name}")
+
+        settings = FEATURES[name]
+        if len(node.args) > len(settings):
+            raise RuleError(f"{name} takes at most {len(settings)} setting{'s' if len(settings) != 1 else ''}")
+        for setting, arg in zip(settings, node.args):
+            if not isinstance(arg, ast.Constant) or isinstance(arg.value, bool) or not isinstance(arg.value, (int, float)):
+                raise RuleError(f"Settings of {name} must be numbers")
+            try:
+                value = setting_value(setting, arg.value)
+            except ValueError as e:
+                raise RuleError(f"In {name}(...): {e}")
+            pinned = self.settings.setdefault(setting, value)
+            if pinned != value:
+                raise RuleError(f"{setting} is set to both {pinned} and {value}; a rule uses one setting per indicator")
+        return self._name(name)
+
+
+@lru_cache(maxsize=256)
+def compile_rule(text: str) -> Rule:
+    """The compiled form of a rule, compiled once per process; raises RuleError"""
+    return Rule(text)
+
+
+def check_parameters(rule: Rule, parameters: Dict[str, Any]):
+    """Raise RuleError unless every parameter the rule reads is set to a number"""
+    for name in sorted(rule.parameters):
+        value = parameters.get(name)
+        if value is None:
+            raise RuleError(f"Rule {rule.text!r} reads parameter {name}, which the strategy doesn't set")
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RuleError(f"Parameter {name} used in rule {rule.text!r} must be a number")
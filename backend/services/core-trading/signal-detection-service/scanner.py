@@ -0,0 +1,62 @@
+"""
+Universe Scanner - evaluates strategies over many symbols' bar histories at once
+Shards are plain NumPy arrays so they can be handed to worker processes
+"""
+
+from typing import Dict, Any, List, Sequence, Tuple
+
+import numpy as np
+
+from indicators import IndicatorEngine
+from market_data import BAR_FIELDS
+from strategies import evaluate
+
+
+def stack_bars(histories: Sequence[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Bar columns for many symbols as (symbols, bars) matrices aligned on the newest bar
+
+    Shorter histories are padded at the front; padded slots have start -1.
+    """
+    length = max((history["close"].size for history in histories), default=0)
+    stacked = {
+        field: np.full((len(histories), length), -1 if field == "start" else np.nan,
+                       dtype=np.int64 if field == "start" else np.float64)
+        for field in BAR_FIELDS
+    }
+    for i, history in enumerate(histories):
+        n = history["close"].size
+        if n:
+            for field in BAR_FIELDS:
+                stacked[field][i, length - n:] = history[field]
+    return stacked
+
+
+def scan_shard(timeframe: str, indicator_settings: Dict[str, Any],
+               strategies: List[Tuple[str, Dict[str, Any]]], symbols: List[str],
+               bars: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Run strategies sharing one indicator configuration over a shard of symbols
+
+    Indicators are built by stepping through the stacked bars one bar at a
+    time, each step updating every symbol in the shard with one vectorized
+    update. Returns a dict per buy/sell hit with the indicator values on the
+    symbol's last bar.
+    """
+    engine = IndicatorEngine(timeframe, indicator_settings, capacity=max(1, len(symbols)))
+    rows = engine.register(symbols)
+    engine.warm_up_stacked(rows, bars)
+
+    values = engine.columns(rows)
+    hits = []
+    for key, parameters in strategies:
+        buy, sell, confidence = evaluate(key, values, parameters)
+        for i in np.flatnonzero(buy | sell).tolist():
+            latest = {name: float(column[i]) for name, column in values.items()}
+            hits.append({
+                "strategy": key,
+                "symbol": symbols[i],
+                "signal_type": "buy" if buy[i] else "sell",
+                "confidence": float(confidence[i]),
+                "bar_start": int(engine.last_start[rows[i]]),
+                "indicators": {name: (None if np.isnan(value) else value) for name, value in latest.items()},
+            })
+    return hits
@@ -0,0 +1,164 @@
+"""
+Screener - cross-sectional rankings of the universe by indicator scores
+Top/bottom K come from a partial sort, and rankings are cached until the next bar
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from indicators import IndicatorEngine
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+# Score name -> how it is derived from the engine's values for a set of rows
+METRICS = {
+    "momentum": lambda engine, rows, v: engine.momentum(rows),
+    "rsi": lambda engine, rows, v: v["rsi"],
+    "rsi_distance": lambda engine, rows, v: np.abs(v["rsi"] - 50.0),
+    "volume_surge": lambda engine, rows, v: v["volume_ratio"],
+    "trend": lambda engine, rows, v: _ratio(v["macd_hist"], v["atr"]),
+    "volatility": lambda engine, rows, v: _ratio(v["atr"], v["close"]),
+    "bb_position": lambda engine, rows, v: _ratio(v["close"] - v["bb_lower"], v["bb_upper"] - v["bb_lower"]),
+}
+
+# Indicator values returned alongside each ranked symbol
+DETAIL_FIELDS = ("close", "rsi", "volume_ratio", "macd_hist", "atr")
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """'momentum:1,volume_surge:0.5' -> weights per metric; raises ValueError"""
+    weights = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition(":")
+        name = name.strip()
+        if name not in METRICS:
+            raise ValueError(f"Unknown metric: {name}")
+        weights[name] = float(weight) if weight.strip() else 1.0
+    if not weights:
+        raise ValueError("A composite score needs at least one weighted metric")
+    return weights
+
+
+def zscore(values: np.ndarray) -> np.ndarray:
+    """Cross-sectional z-score, ignoring NaNs; all-equal columns score 0"""
+    finite = np.isfinite(values)
+    if not finite.any():
+        return values
+    mean = values[finite].mean()
+    std = values[finite].std()
+    return (values - mean) / std if std > 0 else np.where(finite, 0.0, np.nan)
+
+
+def top_k(scores: np.ndarray, k: int, largest: bool = True) -> np.ndarray:
+    """Positions of the k best finite scores, best first, without sorting the rest
+
+    argpartition finds the k in linear time; only those k are then sorted.
+    """
+    candidates = np.flatnonzero(np.isfinite(scores))
+    if candidates.size == 0 or k <= 0:
+        return candidates[:0]
+    keyed = -scores[candidates] if largest else scores[candidates]
+    if k < candidates.size:
+        chosen = np.argpartition(keyed, k - 1)[:k]
+    else:
+        chosen = np.arange(candidates.size)
+    chosen = chosen[np.argsort(keyed[chosen], kind="stable")]
+    return candidates[chosen]
+
+
+class Screener:
+    """Rankings over one indicator engine's symbols
+
+    The engine's value columns are the feature matrix, already kept
+    current as bars close; metric columns derived from them are computed
+    once per engine version, and each distinct ranking request is cached
+    until the next bar moves the version on.
+    """
+
+    def __init__(self, engine: IndicatorEngine, max_cached: int = 256):
+        self.engine = engine
+        self.max_cached = max_cached
+        self._version = -1
+        self._rows = np.zeros(0, dtype=np.int64)
+        self._metrics: Dict[str, np.ndarray] = {}
+        self._results: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _refresh(self):
+        if self._version == self.engine.version:
+            return
+        self._version = self.engine.version
+        rows = np.arange(len(self.engine))
+        self._rows = rows[self.engine.count[rows] > 0]
+        self._metrics = {}
+        self._results.clear()
+
+    def metric(self, name: str) -> np.ndarray:
+        """One score per live engine row, cached for the current version"""
+        column = self._metrics.get(name)
+        if column is None:
+            values = self.engine.columns(self._rows)
+            column = self._metrics[name] = np.asarray(METRICS[name](self.engine, self._rows, values), dtype=np.float64)
+        return column
+
+    def scores(self, weights: Dict[str, float]) -> np.ndarray:
+        if len(weights) == 1 and next(iter(weights.values())) == 1.0:
+            return self.metric(next(iter(weights)))
+        # Composite: weighted sum of z-scores, so metrics on different scales are comparable
+        key = "composite:" + ",".join(f"{name}:{weight}" for name, weight in sorted(weights.items()))
+        column = self._metrics.get(key)
+        if column is None:
+            column = np.zeros(self._rows.size)
+            for name, weight in weights.items():
+                column = column + weight * zscore(self.metric(name))
+            self._metrics[key] = column
+        return column
+
+    def rank(self, weights: Dict[str, float], k: int, sides: Tuple[str, ...] = ("top", "bottom"),
+             symbols: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+        """Top and/or bottom k symbols by score, restricted to `symbols` if given"""
+        self._refresh()
+        key = (tuple(sorted(weights.items())), k, sides, symbols)
+        cached = self._results.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._results.move_to_end(key)
+            return cached
+        self.misses += 1
+
+        scores = self.scores(weights)
+        if symbols is not None:
+            names = self.engine.symbols
+            scores = np.where([names[row] in symbols for row in self._rows.tolist()], scores, np.nan)
+        result: Dict[str, Any] = {
+            "universe": int(np.isfinite(scores).sum()),
+            "as_of": int(self.engine.last_start[self._rows].max()) if self._rows.size else None,
+        }
+        for side in sides:
+            result[side] = self._entries(scores, top_k(scores, k, largest=side == "top"))
+
+        self._results[key] = result
+        if len(self._results) > self.max_cached:
+            self._results.popitem(last=False)
+        return result
+
+    def _entries(self, scores: np.ndarray, positions: np.ndarray) -> List[Dict[str, Any]]:
+        rows = self._rows[positions]
+        details = {name: self.engine.values[name][rows].tolist() for name in DETAIL_FIELDS}
+        entries = []
+        for i, (row, score) in enumerate(zip(rows.tolist(), scores[positions].tolist())):
+            entry = {"rank": i + 1, "symbol": self.engine.symbols[row], "score": round(score, 6)}
+            for name in DETAIL_FIELDS:
+                value = details[name][i]
+                entry[name] = None if np.isnan(value) else round(value, 4)
+            entries.append(entry)
+        return entries
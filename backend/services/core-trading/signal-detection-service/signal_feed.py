@@ -0,0 +1,96 @@
+"""
+Signal Feed - pushes newly generated signals to WebSocket subscribers
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Set
+
+from fastapi import WebSocket
+
+from shared.websocket_queue import QueuedWebSocket
+
+
+class SignalSubscriber(QueuedWebSocket):
+    """A WebSocket client with symbol/strategy filters and a bounded send queue
+
+    Messages that don't fit in the queue are dropped; a client that keeps
+    missing them is disconnected rather than buffered without bound.
+    """
+
+    def __init__(self, websocket: WebSocket, queue_size: int, max_dropped: int):
+        super().__init__(websocket, queue_size, max_dropped)
+        self.symbols: Set[str] = set()  # empty = every symbol
+        self.strategies: Set[str] = set()  # empty = every strategy
+
+    def wants(self, signal: Dict[str, Any]) -> bool:
+        return ((not self.symbols or signal["symbol"] in self.symbols)
+                and (not self.strategies or signal["strategy"] in self.strategies))
+
+    def send(self, payload: Dict[str, Any]) -> bool:
+        return self.offer(json.dumps(payload))
+
+
+class SignalFeed:
+    """Connected signal subscribers; each batch of new signals is serialized once"""
+
+    def __init__(self, queue_size: int = 256, max_dropped: int = 64):
+        self.queue_size = queue_size
+        self.max_dropped = max_dropped
+        self.subscribers: Set[SignalSubscriber] = set()
+        self.published = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self.subscribers)
+
+    def connect(self, websocket: WebSocket, symbols: Iterable[str] = (), strategies: Iterable[str] = ()) -> SignalSubscriber:
+        subscriber = SignalSubscriber(websocket, self.queue_size, self.max_dropped)
+        subscriber.symbols.update(symbols)
+        subscriber.strategies.update(strategies)
+        subscriber.start()
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def disconnect(self, subscriber: SignalSubscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, signals: List[Dict[str, Any]]) -> int:
+        """Queue JSON-ready signals to every subscriber whose filters match; returns messages queued"""
+        if not signals or not self.subscribers:
+            return 0
+        self.published += len(signals)
+        everything = None
+        delivered = 0
+        for subscriber in list(self.subscribers):
+            if subscriber.symbols or subscriber.strategies:
+                matching = [signal for signal in signals if subscriber.wants(signal)]
+                if not matching:
+                    continue
+                frame = json.dumps({"type": "signals", "data": matching})
+            else:
+                if everything is None:
+                    everything = json.dumps({"type": "signals", "data": signals})
+                frame = everything
+            if subscriber.offer(frame):
+                delivered += 1
+            elif subscriber.closed or subscriber.lagging:
+                self._evict(subscriber)
+        return delivered
+
+    def _evict(self, subscriber: SignalSubscriber):
+        self.disconnect(subscriber)
+        if subscriber.evict():
+            self.evicted += 1
+
+    async def close_all(self):
+        for subscriber in list(self.subscribers):
+            await subscriber.close()
+        self.subscribers.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "evicted": self.evicted,
+            "dropped": sum(subscriber.dropped for subscriber in self.subscribers),
+        }
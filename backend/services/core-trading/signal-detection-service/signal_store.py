@@ -0,0 +1,155 @@
+"""
+Signal Store - in-memory signals with maintained indexes and expiry eviction
+"""
+
+import heapq
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Newest-first ordering key: (created_at timestamp, insertion sequence)
+OrderKey = Tuple[float, int]
+
+INDEXED_FIELDS = ("symbol", "strategy", "signal_type")
+
+
+class OrderedIds:
+    """Signal ids sorted by creation, with removals applied lazily
+
+    Removed ids are skipped while iterating and compacted away once they
+    outnumber the live ones, so removal is O(1) and iteration stays linear
+    in the live entries.
+    """
+
+    def __init__(self):
+        self.keys: List[Tuple[float, int, str]] = []
+        self.dead = 0
+
+    def __len__(self) -> int:
+        return len(self.keys) - self.dead
+
+    def add(self, key: OrderKey, signal_id: str):
+        entry = (key[0], key[1], signal_id)
+        if not self.keys or entry > self.keys[-1]:
+            self.keys.append(entry)
+        else:
+            insort(self.keys, entry)
+
+    def discard(self, live: Dict[str, OrderKey]):
+        self.dead += 1
+        if self.dead > len(self.keys) // 2:
+            self.keys = [entry for entry in self.keys if live.get(entry[2]) == entry[:2]]
+            self.dead = 0
+
+    def newest_first(self, live: Dict[str, OrderKey], before: Optional[Tuple[float, int, str]] = None) -> Iterator[str]:
+        """Live ids from newest to oldest; `live` maps each stored id to its current key"""
+        end = len(self.keys) if before is None else bisect_left(self.keys, before)
+        for i in range(end - 1, -1, -1):
+            entry = self.keys[i]
+            if live.get(entry[2]) == entry[:2]:
+                yield entry[2]
+
+
+class SignalStore:
+    """Signals by id, indexed by symbol, strategy and type, newest first
+
+    A min-heap on expires_at drops signals once they have been expired for
+    `retention`, so memory and query time track the active set rather than
+    everything ever generated.
+    """
+
+    def __init__(self, retention: timedelta = timedelta(0)):
+        self.retention = retention
+        self.signals: Dict[str, Any] = {}
+        self._keys: Dict[str, OrderKey] = {}
+        self._ordered = OrderedIds()
+        self._indexes: Dict[str, Dict[str, OrderedIds]] = {name: {} for name in INDEXED_FIELDS}
+        self._expiry: List[Tuple[datetime, str]] = []
+        self._sequence = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self.signals)
+
+    def __contains__(self, signal_id: str) -> bool:
+        return signal_id in self.signals
+
+    def get(self, signal_id: str) -> Optional[Any]:
+        return self.signals.get(signal_id)
+
+    def add(self, signal: Any):
+        if signal.id in self.signals:
+            self.remove(signal.id)
+        self._sequence += 1
+        key = (signal.created_at.timestamp(), self._sequence)
+        self.signals[signal.id] = signal
+        self._keys[signal.id] = key
+        self._ordered.add(key, signal.id)
+        for name in INDEXED_FIELDS:
+            self._indexes[name].setdefault(getattr(signal, name), OrderedIds()).add(key, signal.id)
+        if signal.expires_at is not None:
+            heapq.heappush(self._expiry, (signal.expires_at, signal.id))
+
+    def remove(self, signal_id: str) -> Optional[Any]:
+        signal = self.signals.pop(signal_id, None)
+        if signal is None:
+            return None
+        del self._keys[signal_id]
+        self._ordered.discard(self._keys)
+        for name in INDEXED_FIELDS:
+            value = getattr(signal, name)
+            ids = self._indexes[name][value]
+            ids.discard(self._keys)
+            if not ids:
+                del self._indexes[name][value]
+        return signal
+
+    def evict_expired(self, now: Optional[datetime] = None) -> int:
+        """Drop signals expired for longer than the retention; returns how many went"""
+        cutoff = (now or datetime.now()) - self.retention
+        expiry = self._expiry
+        evicted = 0
+        while expiry and expiry[0][0] <= cutoff:
+            expires_at, signal_id = heapq.heappop(expiry)
+            signal = self.signals.get(signal_id)
+            # Skip heap entries left behind by a signal that was replaced or removed
+            if signal is not None and signal.expires_at == expires_at:
+                self.remove(signal_id)
+                evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def query(self, symbol: Optional[str] = None, signal_type: Optional[str] = None,
+              strategy: Optional[str] = None, active_only: bool = True, limit: Optional[int] = None,
+              before: Optional[str] = None) -> List[Any]:
+        """Matching signals newest first, optionally only those created before signal `before`
+
+        Walks the smallest index among the requested filters and checks the
+        rest per signal, stopping as soon as `limit` matches are found.
+        Raises KeyError if `before` is not a stored signal.
+        """
+        now = datetime.now()
+        self.evict_expired(now)
+        cursor = None
+        if before is not None:
+            key = self._keys[before]
+            cursor = (key[0], key[1], "")
+
+        filters = {"symbol": symbol, "strategy": strategy, "signal_type": signal_type}
+        filters = {name: value for name, value in filters.items() if value is not None}
+        candidates = [self._indexes[name].get(value) for name, value in filters.items()]
+        if any(ids is None for ids in candidates):
+            return []
+        ids = min(candidates, key=len) if candidates else self._ordered
+
+        results = []
+        for signal_id in ids.newest_first(self._keys, cursor):
+            signal = self.signals[signal_id]
+            if any(getattr(signal, name) != value for name, value in filters.items()):
+                continue
+            if active_only and signal.expires_at is not None and signal.expires_at <= now:
+                continue
+            results.append(signal)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
@@ -0,0 +1,163 @@
+"""
+Strategy Rules - buy/sell conditions over indicator values
+Each rule takes indicator columns (one element per symbol or per bar) and
+returns boolean buy/sell arrays plus a confidence per element. Strategies
+can also give their conditions as buy_rule/sell_rule expressions instead
+of using a built-in rule
+"""
+
+from typing import Dict, Any, Callable, Tuple
+
+import numpy as np
+
+from indicators import DEFAULT_PARAMETERS, PARAMETER_ALIASES, setting_value
+from rules import RuleError, check_parameters, compile_rule
+
+Columns = Dict[str, np.ndarray]
+RuleResult = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _finite(*columns: np.ndarray) -> np.ndarray:
+    ok = np.ones(columns[0].shape, dtype=bool)
+    for column in columns:
+        ok &= np.isfinite(column)
+    return ok
+
+
+def rsi_oversold(values: Columns, parameters: Dict[str, Any]) -> RuleResult:
+    """Buy when RSI drops below the threshold, optionally only on above-average volume"""
+    threshold = float(parameters.get("rsi_threshold", 30))
+    rsi = values["rsi"]
+    buy = _finite(rsi) & (rsi < threshold)
+    if parameters.get("volume_confirm", False):
+        buy &= np.nan_to_num(values["volume_ratio"], nan=0.0) >= 1.0
+    sell = np.zeros_like(buy)
+    depth = np.clip((threshold - np.nan_to_num(rsi, nan=threshold)) / max(threshold, 1e-9), 0.0, 1.0)
+    return buy, sell, 0.6 + 0.35 * depth
+
+
+def macd_crossover(values: Columns, parameters: Dict[str, Any]) -> RuleResult:
+    """Buy when the MACD histogram turns positive, sell when it turns negative"""
+    hist, prev = values["macd_hist"], values["prev_macd_hist"]
+    ok = _finite(hist, prev)
+    buy = ok & (prev <= 0) & (hist > 0)
+    sell = ok & (prev >= 0) & (hist < 0)
+    # Stronger the wider the histogram opens relative to the bar's typical range
+    atr = np.nan_to_num(values["atr"], nan=0.0)
+    strength = np.abs(np.nan_to_num(hist)) / np.where(atr > 0, atr, np.inf)
+    return buy, sell, 0.6 + 0.35 * np.clip(strength * 4, 0.0, 1.0)
+
+
+def bollinger_squeeze(values: Columns, parameters: Dict[str, Any]) -> RuleResult:
+    """Trade a close outside the bands right after the bands were unusually narrow"""
+    squeeze_ratio = float(parameters.get("squeeze_ratio", 0.8))
+    close, upper, lower = values["close"], values["bb_upper"], values["bb_lower"]
+    prev_width, average = values["prev_bb_width"], values["bb_width_avg"]
+    ok = _finite(close, upper, lower, prev_width, average)
+    squeezed = ok & (prev_width < average * squeeze_ratio)
+    buy = squeezed & (close > upper)
+    sell = squeezed & (close < lower)
+    band = np.where(ok, upper - lower, np.inf)
+    breakout = np.where(buy, close - upper, np.where(sell, lower - close, 0.0)) / np.where(band > 0, band, np.inf)
+    return buy, sell, 0.6 + 0.35 * np.clip(breakout * 4, 0.0, 1.0)
+
+
+RULES: Dict[str, Callable[[Columns, Dict[str, Any]], RuleResult]] = {
+    "rsi_oversold": rsi_oversold,
+    "macd_crossover": macd_crossover,
+    "bollinger_squeeze": bollinger_squeeze,
+}
+
+# Rule settings each strategy reads from its parameters, besides indicator settings
+RULE_PARAMETERS: Dict[str, Tuple[str, ...]] = {
+    "rsi_oversold": ("rsi_threshold", "volume_confirm"),
+    "macd_crossover": (),
+    "bollinger_squeeze": ("squeeze_ratio",),
+}
+
+
+# Strategy parameters holding rule expressions
+EXPRESSION_PARAMETERS = ("buy_rule", "sell_rule")
+DEFAULT_RULE_CONFIDENCE = 0.7
+
+
+def uses_expressions(parameters: Dict[str, Any]) -> bool:
+    return any(parameters.get(name) for name in EXPRESSION_PARAMETERS)
+
+
+def expression_rule(values: Columns, parameters: Dict[str, Any]) -> RuleResult:
+    """Buy where buy_rule holds, sell where sell_rule holds (and buy_rule doesn't), at a fixed confidence"""
+    shape = values["close"].shape
+    masks = [
+        compile_rule(parameters[name])(values, parameters) if parameters.get(name) else np.zeros(shape, dtype=bool)
+        for name in EXPRESSION_PARAMETERS
+    ]
+    buy, sell = masks
+    confidence = np.full(shape, float(parameters.get("confidence", DEFAULT_RULE_CONFIDENCE)))
+    return buy, sell & ~buy, confidence
+
+
+def has_rule(strategy: str, parameters: Dict[str, Any]) -> bool:
+    return uses_expressions(parameters) or strategy in RULES
+
+
+def rule_parameters(strategy: str, parameters: Dict[str, Any]) -> Tuple[str, ...]:
+    """Parameters a strategy's rule reads besides indicator settings"""
+    if uses_expressions(parameters):
+        names = {"confidence"}
+        for name in EXPRESSION_PARAMETERS:
+            if parameters.get(name):
+                names |= compile_rule(parameters[name]).parameters
+        return tuple(sorted(names))
+    return RULE_PARAMETERS.get(strategy, ())
+
+
+def pinned_settings(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Indicator settings fixed by call arguments in the strategy's rule expressions"""
+    settings: Dict[str, Any] = {}
+    for name in EXPRESSION_PARAMETERS:
+        if not parameters.get(name):
+            continue
+        for setting, value in compile_rule(parameters[name]).settings.items():
+            if settings.setdefault(setting, value) != value:
+                raise RuleError(f"{setting} is set to both {settings[setting]} and {value} across the strategy's rules")
+    return settings
+
+
+def prepare_parameters(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Check a strategy's indicator settings, compile its rule expressions and fold the settings they pin into its parameters
+
+    Raises RuleError if an indicator setting isn't a number in range, a rule
+    doesn't compile, reads a parameter that isn't a number, or pins a
+    setting the parameters set to something else.
+    """
+    parameters = dict(parameters)
+    for name, value in parameters.items():
+        setting = PARAMETER_ALIASES.get(name, name)
+        if setting in DEFAULT_PARAMETERS:
+            try:
+                parameters[name] = setting_value(setting, value)
+            except ValueError as e:
+                raise RuleError(str(e))
+    if not uses_expressions(parameters):
+        return parameters
+    for name in EXPRESSION_PARAMETERS:
+        value = parameters.get(name)
+        if value is not None and not isinstance(value, str):
+            raise RuleError(f"{name} must be a rule expression")
+        if value:
+            check_parameters(compile_rule(value), parameters)
+    prepared = dict(parameters)
+    for setting, value in pinned_settings(parameters).items():
+        for name, current in parameters.items():
+            if PARAMETER_ALIASES.get(name, name) == setting and current != value:
+                raise RuleError(f"Rule sets {setting} to {value} but parameter {name} is {current}")
+        prepared[setting] = value
+    return prepared
+
+
+def evaluate(strategy: str, values: Columns, parameters: Dict[str, Any]) -> RuleResult:
+    """Buy/sell masks and confidence for a named strategy; raises KeyError if it has no rule"""
+    if uses_expressions(parameters):
+        return expression_rule(values, parameters)
+    return RULES[strategy](values, parameters)
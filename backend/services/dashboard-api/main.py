@@ -17,7 +17,7 @@ from sqlalchemy.orm import Session
 # Add path to shared modules
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
-from shared.database import get_db, Portfolio, Position, Order, MarketData, TradingSignal, Alert, RiskMetrics, User
+from shared.database import get_db, latest_market_data, Portfolio, Position, Order, TradingSignal, Alert, RiskMetrics, User
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -73,11 +73,10 @@ async def get_complete_dashboard(db: Session = Depends(get_db)):
         # Market Data (latest for portfolio symbols)
         portfolio_symbols = [pos.symbol for pos in 
                            db.query(Position).filter(Position.portfolio_id == portfolio.id).all()]
+        latest_by_symbol = latest_market_data(db, portfolio_symbols)
         market_data = []
         for symbol in portfolio_symbols:
-            latest_data = db.query(MarketData).filter(
-                MarketData.symbol == symbol
-            ).order_by(MarketData.timestamp.desc()).first()
+            latest_data = latest_by_symbol.get(symbol)
             if latest_data:
                 market_data.append({
                     "symbol": latest_data.symbol,
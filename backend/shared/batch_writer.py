@@ -0,0 +1,195 @@
+"""
+Write-behind batching for database persistence
+Rows are buffered in memory and flushed to a sink in large batches
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    """Buffers rows and flushes them in batches from a background task
+
+    A flush happens when `batch_size` rows are pending or `flush_interval`
+    seconds have passed. The sink runs in a worker thread so blocking
+    database drivers do not stall the event loop. When the sink is slow or
+    failing, the buffer grows up to `max_pending` rows; `put_many` then
+    waits for room, pushing backpressure onto the producer, while
+    `offer_many` never waits and sheds the oldest buffered rows instead,
+    for producers that must keep up in real time. Failed batches are
+    retried with exponential backoff; a batch that still fails after
+    `max_attempts` tries (e.g. one holding a row the database rejects) is
+    dropped and logged so it can't hold up everything behind it. `stop`
+    drains what is left.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[List[Any]], None],
+        name: str = "batch-writer",
+        batch_size: int = 5000,
+        flush_interval: float = 1.0,
+        max_pending: int = 100000,
+        max_retry_delay: float = 30.0,
+        max_attempts: int = 8,
+        on_flushed: Optional[Callable[[List[Any]], None]] = None,
+    ):
+        self.sink = sink
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max(max_pending, batch_size)
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max(1, max_attempts)
+        self.on_flushed = on_flushed
+
+        self._buffer: Deque[Any] = deque()
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._attempts = 0
+
+        self.written = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.shed = 0
+        self.discarded = 0
+        self.blocked_seconds = 0.0
+        self.last_flush_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def put_many(self, rows: Iterable[Any]):
+        """Buffer rows, waiting while the writer is `max_pending` rows behind"""
+        rows = list(rows)
+        if not rows:
+            return
+        if self._stopping:
+            self.dropped += len(rows)
+            return
+        if len(self._buffer) >= self.max_pending:
+            started = time.monotonic()
+            while len(self._buffer) >= self.max_pending and not self._stopping:
+                self._space.clear()
+                await self._space.wait()
+            self.blocked_seconds += time.monotonic() - started
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def offer_many(self, rows: Iterable[Any]) -> int:
+        """Buffer rows without waiting, shedding the oldest buffered rows to stay within `max_pending`
+
+        Returns how many rows were shed.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        if self._stopping:
+            self.dropped += len(rows)
+            return 0
+        self._buffer.extend(rows)
+        excess = len(self._buffer) - self.max_pending
+        for _ in range(max(0, excess)):
+            self._buffer.popleft()
+        if excess > 0:
+            if not self.shed:
+                logger.warning(f"{self.name}: buffer full, shedding the oldest rows (counted in stats)")
+            self.shed += excess
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return max(0, excess)
+
+    async def stop(self, timeout: float = 30.0):
+        """Flush everything still buffered, then stop the background task"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._space.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            self.dropped += len(self._buffer)
+            logger.error(f"{self.name}: drain timed out, dropping {len(self._buffer)} rows")
+            self._buffer.clear()
+        self._task = None
+
+    async def _run(self):
+        retry_delay = 0.0
+        while True:
+            if retry_delay:
+                await asyncio.sleep(retry_delay)
+            else:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+
+            if await self._flush_pending():
+                retry_delay = 0.0
+            else:
+                retry_delay = min(max(retry_delay * 2, 0.5), self.max_retry_delay)
+
+            if self._stopping and not self._buffer:
+                return
+
+    async def _flush_pending(self) -> bool:
+        """Flush buffered rows batch by batch; returns False if the sink failed"""
+        while self._buffer:
+            count = min(self.batch_size, len(self._buffer))
+            batch = [self._buffer.popleft() for _ in range(count)]
+            started = time.monotonic()
+            try:
+                await asyncio.to_thread(self.sink, batch)
+            except Exception as e:
+                self.failed_flushes += 1
+                self._attempts += 1
+                if self._attempts >= self.max_attempts:
+                    self._attempts = 0
+                    self.discarded += count
+                    logger.error(f"{self.name}: dropping {count} rows after {self.max_attempts} failed flushes: {e}; "
+                                 f"first row: {batch[0]!r}")
+                    continue
+                # Put the batch back in front so ordering is preserved on retry
+                self._buffer.extendleft(reversed(batch))
+                logger.error(f"{self.name}: flush of {count} rows failed (attempt {self._attempts}): {e}")
+                return False
+
+            self._attempts = 0
+            self.last_flush_seconds = time.monotonic() - started
+            self.written += count
+            if len(self._buffer) < self.max_pending:
+                self._space.set()
+            if self.on_flushed is not None:
+                try:
+                    self.on_flushed(batch)
+                except Exception as e:
+                    logger.error(f"{self.name}: on_flushed callback failed: {e}")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._buffer),
+            "written": self.written,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+            "shed": self.shed,
+            "discarded": self.discarded,
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "last_flush_seconds": round(self.last_flush_seconds, 3),
+        }
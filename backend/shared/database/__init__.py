@@ -4,6 +4,7 @@ Database package for SAMRDDHI platform
 
 from .connection import engine, SessionLocal, get_db, create_tables, test_connection, Base
 from .models import Portfolio, Position, Order, MarketData, TradingSignal, RiskMetrics, Alert, User
+from .queries import latest_market_data, trading_signals_page, encode_signal_cursor, decode_signal_cursor
 
 __all__ = [
     "engine",
@@ -19,5 +20,9 @@ __all__ = [
     "TradingSignal",
     "RiskMetrics",
     "Alert",
-    "User"
+    "User",
+    "latest_market_data",
+    "trading_signals_page",
+    "encode_signal_cursor",
+    "decode_signal_cursor"
 ]
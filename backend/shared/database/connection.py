@@ -45,10 +45,13 @@ def get_db() -> Generator:
 
 def create_tables():
     """
-    Create all tables in the database
+    Create all tables in the database, plus indexes added to existing tables
     """
     try:
         Base.metadata.create_all(bind=engine)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Error creating database tables: {e}")
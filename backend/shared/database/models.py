@@ -2,7 +2,7 @@
 Database models for SAMRDDHI trading platform
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .connection import Base
@@ -75,6 +75,11 @@ class MarketData(Base):
     volume = Column(Integer, nullable=False)
     vwap = Column(Float, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
+    
+    # Serves "latest row per symbol" lookups straight from the index
+    __table_args__ = (
+        Index("ix_market_data_symbol_timestamp", symbol, timestamp.desc()),
+    )
 
 class TradingSignal(Base):
     __tablename__ = "trading_signals"
@@ -90,6 +95,13 @@ class TradingSignal(Base):
     indicators = Column(JSON, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     expires_at = Column(DateTime, nullable=True)
+    
+    # Newest-first keyset pages on (created_at, id), overall and per symbol or strategy
+    __table_args__ = (
+        Index("ix_trading_signals_created_at_id", created_at.desc(), id.desc()),
+        Index("ix_trading_signals_symbol_created_at_id", symbol, created_at.desc(), id.desc()),
+        Index("ix_trading_signals_strategy_created_at_id", strategy, created_at.desc(), id.desc()),
+    )
 
 class RiskMetrics(Base):
     __tablename__ = "risk_metrics"
@@ -0,0 +1,82 @@
+"""
+Shared query helpers for SAMRDDHI services
+"""
+
+import base64
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from .models import MarketData, TradingSignal
+
+
+def latest_market_data(db: Session, symbols: List[str]) -> Dict[str, MarketData]:
+    """
+    Latest market_data row for each symbol in one round-trip
+    """
+    if not symbols:
+        return {}
+
+    ranked = db.query(
+        MarketData.id.label("id"),
+        func.row_number().over(
+            partition_by=MarketData.symbol,
+            order_by=MarketData.timestamp.desc()
+        ).label("rank")
+    ).filter(MarketData.symbol.in_(symbols)).subquery()
+
+    rows = db.query(MarketData).join(ranked, MarketData.id == ranked.c.id).filter(ranked.c.rank == 1).all()
+    return {row.symbol: row for row in rows}
+
+
+def encode_signal_cursor(signal: TradingSignal) -> str:
+    """Opaque cursor pointing just past a signal in newest-first order"""
+    raw = f"{signal.created_at.isoformat()}|{signal.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_signal_cursor(cursor: str) -> Tuple[datetime, str]:
+    """(created_at, id) from a cursor; raises ValueError if it is malformed"""
+    try:
+        created_at, signal_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), signal_id
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def trading_signals_page(
+    db: Session,
+    limit: int,
+    cursor: Optional[str] = None,
+    symbol: Optional[str] = None,
+    signal_type: Optional[str] = None,
+    strategy: Optional[str] = None,
+    active_at: Optional[datetime] = None
+) -> Tuple[List[TradingSignal], Optional[str]]:
+    """
+    One newest-first page of trading signals and the cursor for the next page
+    
+    Pages by keyset on (created_at, id) rather than OFFSET, so every page
+    is a range scan of the (created_at, id) indexes however deep it is.
+    """
+    query = db.query(TradingSignal)
+    if symbol:
+        query = query.filter(TradingSignal.symbol == symbol)
+    if signal_type:
+        query = query.filter(TradingSignal.signal_type == signal_type)
+    if strategy:
+        query = query.filter(TradingSignal.strategy == strategy)
+    if active_at is not None:
+        query = query.filter(or_(TradingSignal.expires_at.is_(None), TradingSignal.expires_at > active_at))
+    if cursor:
+        created_at, signal_id = decode_signal_cursor(cursor)
+        query = query.filter(or_(
+            TradingSignal.created_at < created_at,
+            and_(TradingSignal.created_at == created_at, TradingSignal.id < signal_id)
+        ))
+
+    rows = query.order_by(TradingSignal.created_at.desc(), TradingSignal.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_signal_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
@@ -0,0 +1,178 @@
+"""
+Append-only on-disk tick archive for SAMRDDHI services
+One fixed-record file per symbol, read back through memory maps
+"""
+
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# One tick on disk: epoch microseconds, trade price, trade size
+TICK_RECORD = np.dtype([
+    ("timestamp", "<i8"),
+    ("price", "<f8"),
+    ("size", "<i8"),
+])
+
+_SYMBOL_PATTERN = re.compile(r"^[A-Z0-9._-]{1,32}$")
+
+
+def is_valid_symbol(symbol: str) -> bool:
+    """Whether a symbol can name an archive file"""
+    return bool(_SYMBOL_PATTERN.match(symbol))
+
+
+def to_micros(value) -> int:
+    """Epoch microseconds for a datetime or epoch seconds"""
+    if isinstance(value, datetime):
+        value = value.timestamp()
+    return int(round(value * 1_000_000))
+
+
+class TickArchive:
+    """Per-symbol append-only tick files with zero-copy range reads
+
+    Writers buffer ticks in memory as columnar chunks; `flush` groups them by
+    symbol and appends each group to `<root>/<SYMBOL>.ticks` in one write.
+    Readers memory-map a symbol's file and binary-search the timestamp
+    column, so a time range comes back as a view of the mapped file.
+    Timestamps per symbol are kept non-decreasing; ticks older than the
+    last archived one are skipped.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._pending: List[Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]] = []
+        self._last_written: Dict[str, int] = {}
+        self._maps: Dict[str, np.memmap] = {}
+        self._invalid: Set[str] = set()
+        self.records_written = 0
+        self.records_skipped = 0
+
+    def path(self, symbol: str) -> str:
+        if not is_valid_symbol(symbol):
+            raise ValueError(f"Invalid symbol for tick archive: {symbol}")
+        return os.path.join(self.root, f"{symbol}.ticks")
+
+    # Writes
+    def append(self, symbols: List[str], prices: np.ndarray, sizes: np.ndarray, timestamps: np.ndarray):
+        """Buffer one batch of ticks; nothing touches disk until `flush`"""
+        if symbols:
+            self._pending.append((symbols, np.asarray(prices, dtype=np.float64),
+                                  np.asarray(sizes, dtype=np.int64), np.asarray(timestamps, dtype=np.float64)))
+
+    def take_pending(self) -> List[Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]]:
+        """Hand buffered batches to a writer and start a new buffer"""
+        pending, self._pending = self._pending, []
+        return pending
+
+    def write(self, pending: List[Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]]) -> int:
+        """Append buffered batches to the symbol files; returns the number of records written
+
+        Ticks for symbols that can't name a file are skipped (and logged
+        once per symbol) so they don't hold back the rest of the batch.
+        """
+        if not pending:
+            return 0
+        symbols = [symbol for batch in pending for symbol in batch[0]]
+        records = np.empty(len(symbols), dtype=TICK_RECORD)
+        records["price"] = np.concatenate([batch[1] for batch in pending])
+        records["size"] = np.concatenate([batch[2] for batch in pending])
+        records["timestamp"] = np.round(np.concatenate([batch[3] for batch in pending]) * 1_000_000)
+
+        # Group by symbol while keeping arrival order inside each group
+        names, codes = np.unique(np.array(symbols), return_inverse=True)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        written = 0
+        for name, chunk in zip(names.tolist(), np.split(records[order], bounds)):
+            if not is_valid_symbol(name):
+                self.records_skipped += chunk.size
+                if name not in self._invalid:
+                    self._invalid.add(name)
+                    logger.warning(f"Skipping ticks for {name!r}: not a valid tick archive symbol")
+                continue
+            last = self._last_written.get(name)
+            if last is None:
+                last = self._last_timestamp_on_disk(name)
+            chunk = chunk[chunk["timestamp"] >= last] if last is not None else chunk
+            if chunk.size == 0:
+                continue
+            with open(self.path(name), "ab") as f:
+                f.write(chunk.tobytes())
+            self._last_written[name] = int(chunk["timestamp"].max())
+            written += chunk.size
+        self.records_written += written
+        return written
+
+    def flush(self) -> int:
+        return self.write(self.take_pending())
+
+    def _last_timestamp_on_disk(self, symbol: str) -> Optional[int]:
+        records = self._map(symbol)
+        if records is None or records.size == 0:
+            return None
+        return int(records["timestamp"][-1])
+
+    # Reads
+    def _map(self, symbol: str) -> Optional[np.memmap]:
+        """Memory map of a symbol's file, remapped when the file has grown"""
+        try:
+            path = self.path(symbol)
+            size = os.path.getsize(path)
+        except (OSError, ValueError):
+            return None
+        count = size // TICK_RECORD.itemsize
+        records = self._maps.get(symbol)
+        if records is None or records.size != count:
+            if count == 0:
+                return np.empty(0, dtype=TICK_RECORD)
+            records = np.memmap(path, dtype=TICK_RECORD, mode="r", shape=(count,))
+            self._maps[symbol] = records
+        return records
+
+    def symbols(self) -> List[str]:
+        return sorted(name[:-6] for name in os.listdir(self.root) if name.endswith(".ticks"))
+
+    def range(self, symbol: str, start=None, end=None) -> np.ndarray:
+        """Ticks with start <= timestamp < end as a view of the memory-mapped file"""
+        records = self._map(symbol)
+        if records is None:
+            return np.empty(0, dtype=TICK_RECORD)
+        timestamps = records["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(timestamps, to_micros(start), side="left"))
+        hi = records.size if end is None else int(np.searchsorted(timestamps, to_micros(end), side="left"))
+        return records[lo:hi]
+
+    def bars(self, symbol: str, start, end, seconds: int) -> Dict[str, np.ndarray]:
+        """OHLCV/VWAP bars of `seconds` length over a range, aggregated without a Python loop"""
+        ticks = self.range(symbol, start, end)
+        if ticks.size == 0:
+            empty = np.empty(0)
+            return {"start": empty.astype(np.int64), "open": empty, "high": empty, "low": empty,
+                    "close": empty, "volume": empty.astype(np.int64), "vwap": empty}
+
+        prices = ticks["price"]
+        sizes = ticks["size"]
+        buckets = ticks["timestamp"] // (seconds * 1_000_000)
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(buckets)) + 1])
+        ends = np.concatenate([starts[1:], [ticks.size]])
+        volume = np.add.reduceat(sizes, starts)
+        notional = np.add.reduceat(prices * sizes, starts)
+        close = prices[ends - 1]
+        return {
+            "start": buckets[starts] * seconds,
+            "open": prices[starts],
+            "high": np.maximum.reduceat(prices, starts),
+            "low": np.minimum.reduceat(prices, starts),
+            "close": close,
+            "volume": volume,
+            "vwap": np.divide(notional, volume, out=close.astype(np.float64), where=volume > 0),
+        }
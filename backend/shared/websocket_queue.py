@@ -0,0 +1,99 @@
+"""
+Queued WebSocket clients - a bounded send queue and writer task per connection
+Producers never wait on a slow client: frames that don't fit are dropped, and
+a client that keeps missing them is disconnected rather than buffered without bound
+"""
+
+import asyncio
+import logging
+from typing import Union
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+# A frame ready for the socket: text (JSON) or binary
+Frame = Union[str, bytes]
+
+
+class QueuedWebSocket:
+    """A WebSocket with its own bounded send queue, drained by a writer task
+
+    `offer` queues a frame without waiting and counts it as dropped when
+    the queue is full; after more than `max_dropped` drops in a row the
+    client is `lagging` and should be `evict`ed. Subclasses can extend
+    `_after_send` to send more once a frame has gone out.
+    """
+
+    def __init__(self, websocket: WebSocket, queue_size: int, max_dropped: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.max_dropped = max_dropped
+        self.sent = 0
+        self.dropped = 0
+        self.consecutive_dropped = 0
+        self.closed = False
+        self._writer = None
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_loop())
+
+    @property
+    def lagging(self) -> bool:
+        """True once the client has missed too many frames in a row"""
+        return self.consecutive_dropped > self.max_dropped
+
+    def offer(self, frame: Frame) -> bool:
+        """Queue a pre-encoded frame without waiting; returns False if it was dropped"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            self.consecutive_dropped += 1
+            return False
+        self.consecutive_dropped = 0
+        return True
+
+    async def _send(self, frame: Frame):
+        if isinstance(frame, bytes):
+            await self.websocket.send_bytes(frame)
+        else:
+            await self.websocket.send_text(frame)
+        self.sent += 1
+
+    async def _after_send(self):
+        """Called by the writer after each queued frame is sent"""
+
+    async def _write_loop(self):
+        try:
+            while True:
+                frame = await self.queue.get()
+                await self._send(frame)
+                await self._after_send()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.debug(f"WebSocket writer stopped: {e}")
+        finally:
+            self.closed = True
+
+    async def close(self, code: int = 1000):
+        """Stop the writer and close the socket"""
+        self.closed = True
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def evict(self) -> bool:
+        """Close a client that fell too far behind; returns False if it had already closed"""
+        if self.closed:
+            return False
+        logger.warning(f"Disconnecting slow WebSocket client after {self.dropped} dropped frames")
+        # 1013 = try again later
+        asyncio.create_task(self.close(code=1013))
+        return True